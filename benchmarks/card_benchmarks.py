@@ -0,0 +1,171 @@
+import argparse
+import gc
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Sets up the import path and working directory, so it comes before the game modules
+from _common import REPO_ROOT
+# Card surfaces need a display, but not a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from card import Card, create_deck_template, decode_cards, encode_cards, load_card_faces
+from engine import HAND_SIZE, GameState
+from path_utils import get_path
+from protocol import Opcode, decode_card_identities, receive_reply, send_reply
+from socket_utils import ReceiveBuffer, frame_packet, receive_packet
+
+BASELINE_DIRECTORY = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+PAYOFF_PILE_SIZE = 30
+# Bytes handed out per recv_into call by FragmentedSocket
+FRAGMENT_SIZE = 7
+
+class FragmentedSocket:
+    # Replays the same packet a few bytes at a time, the worst case for recv_all
+    def __init__(self, data: bytes, fragment_size: int):
+        self.data = data
+        self.fragment_size = fragment_size
+        self.offset = 0
+
+    def recv_into(self, buffer, nbytes: int = 0) -> int:
+        if self.offset == len(self.data):
+            self.offset = 0
+        fragment = self.data[self.offset:self.offset + min(nbytes or len(buffer), self.fragment_size)]
+        buffer[:len(fragment)] = fragment
+        self.offset += len(fragment)
+        return len(fragment)
+
+
+def build_benchmarks() -> dict:
+    # Name -> function taking no arguments, each call is one operation
+    deck_template = create_deck_template(get_path("assets/card_faces"))
+    rng = random.Random(0)
+    benchmarks = {}
+
+    for num_decks in range(2, 7, 1):
+        def deal(num_decks: int = num_decks) -> None:
+            GameState(rng).deal(num_decks, PAYOFF_PILE_SIZE, deck_template)
+        benchmarks[f"deal ({num_decks} decks)"] = deal
+
+    state = GameState(rng)
+    state.deal(2, PAYOFF_PILE_SIZE, deck_template)
+    hand = state.draw_pile[-HAND_SIZE:]
+    encoded_hand = encode_cards(hand)
+    benchmarks["encode_cards (hand)"] = lambda: encode_cards(hand)
+    benchmarks["decode_card_identities (hand)"] = lambda: decode_card_identities(encoded_hand)
+    benchmarks["decode_cards (hand)"] = lambda: decode_cards(encoded_hand)
+
+    # A hand going through the real send and receive path, one process on both ends
+    server_end, client_end = socket.socketpair()
+    receive_buffer = ReceiveBuffer()
+    def send_receive_hand() -> None:
+        send_reply(server_end, Opcode.DRAW_CARDS, tail=encode_cards(hand))
+        decode_cards(receive_reply(client_end, Opcode.DRAW_CARDS, receive_buffer)[1])
+    benchmarks["send and receive hand (socketpair)"] = send_receive_hand
+
+    benchmarks["Card.__init__"] = lambda: Card("queen_of_hearts", 1)
+    card = Card("queen_of_hearts", 1)
+    benchmarks["Card.generate_surface"] = card.generate_surface
+
+    whole_shoe = frame_packet(b"\x00" + encode_cards(state.draw_pile))
+    fragmented_socket = FragmentedSocket(whole_shoe, FRAGMENT_SIZE)
+    benchmarks[f"receive_packet (draw pile, {FRAGMENT_SIZE} byte fragments)"] = lambda: receive_packet(fragmented_socket, receive_buffer)
+
+    return benchmarks
+
+
+def time_operation(operation, min_time: float, repeats: int) -> tuple[float, float]:
+    # (median, best) seconds per call over the repeats, each repeat runs for at least min_time
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(0, loops, 1):
+            operation()
+        if time.perf_counter() - started >= min_time / 10:
+            break
+        loops *= 2
+    per_call = []
+    for _ in range(0, repeats, 1):
+        started = time.perf_counter()
+        for _ in range(0, loops, 1):
+            operation()
+        per_call.append((time.perf_counter() - started) / loops)
+    return statistics.median(per_call), min(per_call)
+
+
+def measure_allocations(operation, calls: int) -> tuple[int, float]:
+    # Peak bytes allocated during one call, and memory blocks still held per call afterwards
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(0, calls, 1):
+        operation()
+    gc.collect()
+    return peak, (sys.getallocatedblocks() - blocks_before) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the card handling hot paths and compares them against a saved baseline")
+    parser.add_argument("--baseline", default="baseline", help="baseline name in benchmarks/baselines (default baseline)")
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=10, help="percent slower than the baseline reported as a regression (default 10)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat (default 0.2)")
+    parser.add_argument("--repeats", type=int, default=5, help="repeats per benchmark (default 5)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    load_card_faces(get_path("assets/card_faces"))
+
+    baseline_path = os.path.join(BASELINE_DIRECTORY, f"{args.baseline}.json")
+    baseline = {}
+    if os.path.exists(baseline_path) and not args.save:
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<48}{'median':>12}{'best':>12}{'peak B':>10}{'blocks':>8}{'vs base':>10}", flush=True)
+    for name, operation in build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        median, best = time_operation(operation, args.min_time, args.repeats)
+        peak, blocks = measure_allocations(operation, 1000)
+        results[name] = {"median_ns": median * 1e9, "best_ns": best * 1e9, "peak_bytes": peak, "blocks_per_call": blocks}
+
+        comparison = ""
+        if name in baseline:
+            change = (median * 1e9 / baseline[name]["median_ns"] - 1) * 100
+            comparison = f"{change:+.1f}%"
+            if change > args.threshold:
+                regressions.append(name)
+                comparison += " !"
+        print(f"{name:<48}{median * 1e9:>9.0f} ns{best * 1e9:>9.0f} ns{peak:>10}{blocks:>8.2f}{comparison:>10}", flush=True)
+
+    if args.save:
+        os.makedirs(BASELINE_DIRECTORY, exist_ok=True)
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Saved baseline to {baseline_path}", flush=True)
+    elif not baseline:
+        print(f"No baseline at {baseline_path}, run with --save to create one", flush=True)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) more than {args.threshold:g}% slower than the baseline: {', '.join(regressions)}", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
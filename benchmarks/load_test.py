@@ -0,0 +1,232 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+# Sets up the import path and working directory, so it comes before the game modules
+from _common import percentile
+
+from bot import BotPlayer, MoveSearch, run_bot
+from protocol import Opcode, Event
+
+# Requests without a reply are timed until the event the server pushes back for them
+ECHO_EVENTS = {
+    Opcode.MOVE_CARD: Event.CARD_MOVED,
+    Opcode.END_TURN: Event.TURN_CHANGED,
+    Opcode.SUBSCRIBE: Event.TURN_CHANGED,
+    Opcode.RESHUFFLE_DRAW_PILE: Event.DRAW_PILE_RESHUFFLED,
+}
+SERVER_START_TIMEOUT = 10
+
+class CountingSocket:
+    # Just enough of a socket for the protocol helpers, counting the bytes that go through it
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def sendall(self, data: bytes) -> None:
+        self.sock.sendall(data)
+        self.bytes_sent += len(data)
+
+    def recv_into(self, buffer, nbytes: int = 0) -> int:
+        received = self.sock.recv_into(buffer, nbytes)
+        self.bytes_received += received
+        return received
+
+    def close(self) -> None:
+        self.sock.close()
+
+class LoadTestPlayer(BotPlayer):
+    # A bot with scripted moves that times every request it makes
+    join_poll_interval = 0.05
+    rematch_poll_interval = 0.05
+
+    def __init__(self, host: str, port: int, table_id: int, max_games: int, use_search: bool, budget: float):
+        super().__init__(host, port, table_id, budget, 0, max_games, "Load")
+        self.use_search = use_search
+        self.latencies = {}
+        self.pending = {}
+        self.counting_socket = None
+
+    def record(self, name: str, started: float) -> None:
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+    def connect(self) -> CountingSocket:
+        self.counting_socket = CountingSocket(super().connect())
+        return self.counting_socket
+
+    def send(self, opcode: Opcode, *fields: int, tail: bytes = b"") -> None:
+        if opcode in ECHO_EVENTS:
+            self.pending[opcode] = time.perf_counter()
+        super().send(opcode, *fields, tail=tail)
+
+    def request(self, opcode: Opcode, *fields: int, tail: bytes = b"") -> tuple[tuple[int, ...], bytes]:
+        started = time.perf_counter()
+        reply = super().request(opcode, *fields, tail=tail)
+        self.record(opcode.name, started)
+        return reply
+
+    def handle_event(self, event: Event, fields: tuple[int, ...], tail: bytes | memoryview) -> None:
+        if event != Event.CARD_MOVED or fields[0] == self.player_number:
+            for opcode, echo_event in ECHO_EVENTS.items():
+                if echo_event == event and opcode in self.pending:
+                    self.record(opcode.name, self.pending.pop(opcode))
+        super().handle_event(event, fields, tail)
+
+    def deal(self) -> None:
+        # CREATE_DECK has no reply, so it is timed together with the payoff pile top requests after it
+        started = time.perf_counter()
+        super().deal()
+        self.record("CREATE_DECK (with payoff tops)", started)
+
+    def choose_move(self) -> tuple[int, int, int]:
+        if self.use_search:
+            return super().choose_move()
+        # Payoff pile first, then any other build, otherwise the best discard
+        search = MoveSearch(self.player_number, self.pile_counts[self.player_number - 1])
+        position = self.search_position()
+        moves = position.player_moves(self.player_number)
+        build_moves = search.build_moves(position, moves)
+        if build_moves:
+            return build_moves[0][0]
+        return max(search.discard_moves(position, moves), key=lambda discard_move: discard_move[1])[0]
+
+
+def serve(port: int, num_decks: int, payoff_pile_size: int, engine: str, num_workers: int) -> None:
+    # Runs in a child process, with the server's status messages thrown away
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    import spite_and_malice_server
+    spite_and_malice_server.HOST = "127.0.0.1"
+    if num_workers > 1:
+        spite_and_malice_server.run_sharded_server(port, num_decks, payoff_pile_size, num_workers, engine)
+    elif engine == "asyncio":
+        spite_and_malice_server.run_async_server(port, num_decks, payoff_pile_size)
+    else:
+        spite_and_malice_server.run_server(port, num_decks, payoff_pile_size)
+
+def find_free_port() -> int:
+    with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def wait_for_server(host: str, port: int) -> None:
+    give_up_time = time.monotonic() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            socket.create_connection((host, port)).close()
+            return
+        except OSError:
+            if time.monotonic() > give_up_time:
+                raise
+            time.sleep(0.1)
+
+def process_tree_cpu_seconds(pid: int) -> float | None:
+    # User plus system time of a process and its worker processes, from /proc (Linux only)
+    try:
+        clock_ticks = os.sysconf("SC_CLK_TCK")
+        total_ticks = 0
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat_file:
+                    # The command name can contain spaces, the fields after it cannot
+                    stat_fields = stat_file.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            if int(entry) == pid or int(stat_fields[1]) == pid:
+                total_ticks += int(stat_fields[11]) + int(stat_fields[12])
+        return total_ticks / clock_ticks
+    except (OSError, ValueError, IndexError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays full games over the real protocol with many connections and reports how the server keeps up")
+    parser.add_argument("--clients", type=int, default=100, help="connections, two per table (default 100)")
+    parser.add_argument("--games", type=int, default=3, help="games each table plays, re-matches in between (default 3)")
+    parser.add_argument("--first-table", type=int, default=0, help="first table number used (default 0)")
+    parser.add_argument("--search", action="store_true", help="choose moves with the bot's search instead of a simple script")
+    parser.add_argument("--budget-ms", type=float, default=50, help="search time per move with --search (default 50)")
+    parser.add_argument("--host", default="127.0.0.1", help="server address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0, help="test a server that is already running on this port instead of starting one")
+    parser.add_argument("--server-pid", type=int, default=0, help="process id of that server, to report its CPU time")
+    parser.add_argument("--decks", type=int, default=2, help="decks per shoe for the started server (default 2)")
+    parser.add_argument("--payoff-pile-size", type=int, default=20, help="cards per payoff pile for the started server (default 20)")
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default="threads", help="engine of the started server (default threads)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes of the started server (default 1)")
+    args = parser.parse_args()
+
+    if args.clients < 2 or args.clients % 2:
+        print("--clients must be an even number of at least 2", flush=True)
+        sys.exit(1)
+
+    server = None
+    port = args.port
+    server_pid = args.server_pid
+    if not port:
+        port = find_free_port()
+        server = multiprocessing.Process(target=serve, args=(port, args.decks, args.payoff_pile_size, args.engine, args.workers,))
+        server.start()
+        server_pid = server.pid
+    try:
+        wait_for_server(args.host, port)
+
+        players = []
+        for client_index in range(0, args.clients, 1):
+            players.append(LoadTestPlayer(args.host, port, args.first_table + client_index // 2, args.games, args.search, args.budget_ms / 1000))
+        threads = [threading.Thread(target=run_bot, args=(player,), daemon=True) for player in players]
+
+        # Bot status messages would drown out the results
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            server_cpu_before = process_tree_cpu_seconds(server_pid) if server_pid else None
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            server_cpu_after = process_tree_cpu_seconds(server_pid) if server_pid else None
+    finally:
+        if server is not None:
+            # Interrupted like a server stopped with Ctrl+C, so it also stops its worker processes
+            os.kill(server.pid, signal.SIGINT)
+            server.join(SERVER_START_TIMEOUT)
+            if server.is_alive():
+                server.terminate()
+                server.join()
+
+    # Both players count every game
+    games_completed = sum(player.games_played for player in players) / 2
+    bytes_sent = sum(player.counting_socket.bytes_sent for player in players if player.counting_socket)
+    bytes_received = sum(player.counting_socket.bytes_received for player in players if player.counting_socket)
+
+    print(f"{args.clients} clients on {args.clients // 2} tables, {elapsed:.1f} s", flush=True)
+    print(f"Games completed: {games_completed:g} of {args.clients // 2 * args.games} ({games_completed / elapsed:.1f}/s)", flush=True)
+    if games_completed:
+        print(f"Bytes sent: {bytes_sent} ({bytes_sent / games_completed:.0f} per game), received: {bytes_received} ({bytes_received / games_completed:.0f} per game)", flush=True)
+    if server_cpu_before is not None and server_cpu_after is not None:
+        server_cpu = server_cpu_after - server_cpu_before
+        print(f"Server CPU: {server_cpu:.2f} s ({server_cpu / elapsed * 100:.0f}% of one core)", flush=True)
+    else:
+        print("Server CPU: not available (pass --server-pid on Linux for a server started elsewhere)", flush=True)
+
+    latencies = {}
+    for player in players:
+        for name, values in player.latencies.items():
+            latencies.setdefault(name, []).extend(values)
+    print(f"{'request':<32}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}", flush=True)
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        print(f"{name:<32}{len(values):>8}{percentile(values, 0.5) * 1000:>10.2f}{percentile(values, 0.9) * 1000:>10.2f}"
+              f"{percentile(values, 0.99) * 1000:>10.2f}{values[-1] * 1000:>10.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
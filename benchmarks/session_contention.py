@@ -0,0 +1,94 @@
+import argparse
+import contextlib
+import os
+import threading
+import time
+
+# Sets up the import path and working directory, so it comes before the game modules
+from _common import percentile
+
+from engine import create_deck_template
+from protocol import Opcode, RematchDecision
+from spite_and_malice_server import ClientConnection, join_table, process_request
+from path_utils import get_path
+
+POLL_OPCODES = [(Opcode.GET_DRAW_PILE_SIZE, ()), (Opcode.GET_PAYOFF_PILE_SIZE, (1,)),
+                (Opcode.GET_HAND_SIZE, (2,)), (Opcode.HAS_GAME_RESULT, ())]
+
+class DiscardingClientConnection(ClientConnection):
+    # Replies are thrown away, only the time spent in process_request is measured
+    def write(self, packet: bytes) -> None:
+        pass
+
+def join_benchmark_table(table_id: int) -> tuple[ClientConnection, ClientConnection]:
+    players = []
+    for _ in range(0, 2, 1):
+        client = DiscardingClientConnection(("benchmark", 0))
+        client.session, client.player_number = join_table(table_id)
+        players.append(client)
+    return players[0], players[1]
+
+def run_writer(player1: ClientConnection, player2: ClientConnection, deck_template: list[int], num_decks: int,
+               payoff_pile_size: int, stop: threading.Event, game_count: list[int]) -> None:
+    # Plays the expensive part of a game over and over: a rematch reset, a fresh shoe and some draws
+    while not stop.is_set():
+        for player in (player1, player2):
+            process_request(player, Opcode.SET_REMATCH_DECISION, (player.player_number, RematchDecision.YES), b"", deck_template, num_decks, payoff_pile_size)
+            process_request(player, Opcode.SET_UP_NEW_GAME, (), b"", deck_template, num_decks, payoff_pile_size)
+        process_request(player1, Opcode.CREATE_DECK, (), b"", deck_template, num_decks, payoff_pile_size)
+        # Only the player whose turn it is may draw
+        process_request(player1, Opcode.GET_CURRENT_TURN, (), b"", deck_template, num_decks, payoff_pile_size)
+        drawing_player = (player1, player2)[player1.session.state.current_turn - 1]
+        for _ in range(0, 5, 1):
+            process_request(drawing_player, Opcode.DRAW_CARDS, (drawing_player.player_number,), b"", deck_template, num_decks, payoff_pile_size)
+        game_count[0] += 1
+
+def run_poller(player: ClientConnection, deck_template: list[int], num_decks: int, payoff_pile_size: int,
+               stop: threading.Event, latencies: list[float]) -> None:
+    request_index = 0
+    while not stop.is_set():
+        opcode, fields = POLL_OPCODES[request_index % len(POLL_OPCODES)]
+        started = time.perf_counter()
+        process_request(player, opcode, fields, b"", deck_template, num_decks, payoff_pile_size)
+        latencies.append(time.perf_counter() - started)
+        request_index += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures read request latency while one table is rebuilt continuously")
+    parser.add_argument("--pollers", type=int, default=4, help="threads polling pile counts (default 4)")
+    parser.add_argument("--decks", type=int, default=6, help="decks per shoe (default 6)")
+    parser.add_argument("--payoff-pile-size", type=int, default=30, help="cards per payoff pile (default 30)")
+    parser.add_argument("--duration", type=float, default=5, help="seconds to run (default 5)")
+    args = parser.parse_args()
+
+    deck_template = create_deck_template(get_path("assets/card_faces"))
+    player1, player2 = join_benchmark_table(0)
+
+    stop = threading.Event()
+    game_count = [0]
+    poller_latencies = [[] for _ in range(0, args.pollers, 1)]
+    threads = [threading.Thread(target=run_writer, args=(player1, player2, deck_template, args.decks, args.payoff_pile_size, stop, game_count,))]
+    for latencies in poller_latencies:
+        threads.append(threading.Thread(target=run_poller, args=(player2, deck_template, args.decks, args.payoff_pile_size, stop, latencies,)))
+
+    # Keep the server's status messages out of the results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        process_request(player1, Opcode.CREATE_DECK, (), b"", deck_template, args.decks, args.payoff_pile_size)
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    all_latencies = sorted(latency for latencies in poller_latencies for latency in latencies)
+    print(f"{args.pollers} pollers, {args.decks} decks, {args.duration:g} s", flush=True)
+    print(f"Shoes rebuilt: {game_count[0]} ({game_count[0] / args.duration:.0f}/s)", flush=True)
+    print(f"Polls served: {len(all_latencies)} ({len(all_latencies) / args.duration:.0f}/s)", flush=True)
+    for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999)):
+        print(f"  {label:>5}: {percentile(all_latencies, fraction) * 1e6:9.1f} us", flush=True)
+    print(f"    max: {all_latencies[-1] * 1e6:9.1f} us", flush=True)
+
+
+if __name__ == "__main__":
+    main()
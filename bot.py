@@ -0,0 +1,562 @@
+import argparse
+import socket
+import sys
+import threading
+import time
+from array import array
+from engine import (DISCARD_PILES, KING_RANK, NUM_BUILD_PILES, GameState, Hand, card_id, card_identity, card_rank,
+                    clear_completed_build_piles)
+from protocol import (PROTOCOL_VERSION, ProtocolError, Opcode, Event, Pile, JoinStatus, RematchDecision, GameResult,
+                      REPLY_FORMATS, EVENT_FORMATS, decode_message, decode_card_identities, send_request, is_event)
+from socket_utils import ReceiveBuffer, receive_packet
+
+# Computer player speaking the same protocol as the client. No pygame here, so
+# hundreds of bots can share one process for load testing.
+
+BOT_NAME = "Bot"
+DEFAULT_BUDGET_MS = 50
+# How often player 1 asks whether player 2 has joined, and how long to wait for a re-match answer
+JOIN_POLL_INTERVAL = 2
+REMATCH_POLL_INTERVAL = 0.5
+REMATCH_TIMEOUT = 60
+
+# Search values. A payoff pile card is worth more than any number of other moves
+# since it is the only way to win.
+PAYOFF_REWARD = 100
+WINNING_REWARD = 10000
+HAND_BUILD_REWARD = 2
+DISCARD_BUILD_REWARD = 3
+EMPTY_HAND_REWARD = 15
+OPPONENT_PAYOFF_PENALTY = 60
+OWN_PAYOFF_BONUS = 5
+KING_KEPT_BONUS = 4
+MAX_SEARCH_DEPTH = 32
+# Nodes searched between deadline checks
+DEADLINE_CHECK_INTERVAL = 16
+
+class BotError(Exception):
+    pass
+
+class SearchTimeout(Exception):
+    pass
+
+
+def discard_score(rank: int, discard_pile: tuple[int, ...]) -> int:
+    # Kings are too useful to bury, and discard piles are best kept counting down
+    if rank == KING_RANK:
+        return -30
+    if not discard_pile:
+        return 2
+    if discard_pile[-1] == rank:
+        return 4
+    if discard_pile[-1] == rank + 1:
+        return 6
+    if discard_pile[-1] < rank:
+        return -4
+    return 0
+
+
+class MoveSearch:
+    # Depth first search over the rest of one turn with iterative deepening and a
+    # transposition table keyed by GameState.key. Positions are GameStates holding
+    # what the player can see: their hand, the build and discard piles and both
+    # payoff pile top cards. Moves are listed by GameState.player_moves and made
+    # with GameState.move_card, the checks the server runs on MOVE_CARD, so every
+    # move found is one the server accepts. A turn ends with a discard, and the
+    # search stops at a payoff pile play or an emptied hand since the cards that
+    # follow are unknown.
+    __slots__ = ("player", "payoff_pile_size", "deadline", "nodes", "table")
+
+    def __init__(self, player: int, payoff_pile_size: int):
+        self.player = player
+        self.payoff_pile_size = payoff_pile_size
+        self.deadline = 0.0
+        self.nodes = 0
+        self.table = {}
+
+    def payoff_top_rank(self, position: GameState, player: int) -> int:
+        payoff_pile = position.payoff_piles[player - 1]
+        if not payoff_pile:
+            return 0
+        return card_rank(payoff_pile[-1])
+
+    def board_value(self, position: GameState) -> int:
+        # Leaving the opponent a build pile for their payoff pile card is the worst thing a turn can do
+        build_pile_sizes = [len(build_pile) for build_pile in position.build_piles]
+        opponent_payoff_top = self.payoff_top_rank(position, 3 - self.player)
+        payoff_top = self.payoff_top_rank(position, self.player)
+        value = 0
+        if opponent_payoff_top and opponent_payoff_top != KING_RANK and opponent_payoff_top - 1 in build_pile_sizes:
+            value -= OPPONENT_PAYOFF_PENALTY
+        if payoff_top and payoff_top - 1 in build_pile_sizes:
+            value += OWN_PAYOFF_BONUS
+        return value
+
+    def kings_in_hand(self, position: GameState) -> int:
+        return sum(1 for card in position.hands[self.player - 1] if card_rank(card) == KING_RANK)
+
+    def evaluate(self, position: GameState) -> int:
+        return KING_KEPT_BONUS * self.kings_in_hand(position) + self.board_value(position)
+
+    def discard_moves(self, position: GameState, moves: list[tuple[int, int, int]]) -> list[tuple[tuple[int, int, int], int]]:
+        # (move, value) for every way to end the turn. Only the king count of the
+        # hand left behind changes the evaluation, and cards of the same rank onto
+        # discard piles of the same ranks are the same move.
+        board_value = self.board_value(position)
+        kings = self.kings_in_hand(position)
+        discard_piles = position.discard_piles[self.player - 1]
+        discard_moves = []
+        seen = set()
+        for move in moves:
+            moving_from, moving_to, card = move
+            if not Pile.DISCARD_PILE_0 <= moving_to <= Pile.DISCARD_PILE_3:
+                continue
+            rank = card_rank(card)
+            discard_pile = tuple(card_rank(discard_card) for discard_card in discard_piles[moving_to - Pile.DISCARD_PILE_0])
+            if (rank, discard_pile) in seen:
+                continue
+            seen.add((rank, discard_pile))
+            if rank == KING_RANK:
+                kept_value = board_value + KING_KEPT_BONUS * (kings - 1)
+            else:
+                kept_value = board_value + KING_KEPT_BONUS * kings
+            discard_moves.append((move, discard_score(rank, discard_pile) + kept_value))
+        return discard_moves
+
+    def build_moves(self, position: GameState, moves: list[tuple[int, int, int]]) -> list[tuple[tuple[int, int, int], int, GameState | None]]:
+        # (move, reward, next position), the next position is None when the move
+        # ends the search. Payoff pile moves come first so the best moves are tried
+        # first. Only the size of the build pile a card lands on matters, and hand
+        # cards of the same rank are interchangeable.
+        player_index = self.player - 1
+        build_moves = []
+        seen = set()
+        for move in moves:
+            moving_from, moving_to, card = move
+            if not Pile.BUILD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+                continue
+            move_kind = (moving_from, card_rank(card), len(position.build_piles[moving_to - Pile.BUILD_PILE_0]))
+            if move_kind in seen:
+                continue
+            seen.add(move_kind)
+
+            if moving_from == Pile.PAYOFF_PILE:
+                if self.payoff_pile_size == 1:
+                    build_moves.append((move, WINNING_REWARD, None))
+                else:
+                    build_moves.append((move, PAYOFF_REWARD, None))
+                continue
+
+            next_position = position.copy()
+            next_position.move_card(self.player, moving_from, moving_to, card)
+            # The cards of a completed build pile go back into the unseen draw pile
+            clear_completed_build_piles(next_position.build_piles)
+            if moving_from != Pile.HAND:
+                build_moves.append((move, DISCARD_BUILD_REWARD, next_position))
+            elif next_position.hands[player_index]:
+                build_moves.append((move, HAND_BUILD_REWARD, next_position))
+            else:
+                # A fresh hand is drawn, which the search cannot see
+                build_moves.append((move, HAND_BUILD_REWARD + EMPTY_HAND_REWARD, None))
+        return build_moves
+
+    def search_position(self, position: GameState, depth: int) -> tuple[int, bool]:
+        # Best value reachable from the position and whether it was searched to the end of the turn
+        self.nodes += 1
+        if self.nodes % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        key = position.key()
+        entry = self.table.get(key)
+        if entry is not None and (entry[2] or entry[0] >= depth):
+            return entry[1], entry[2]
+
+        if depth == 0:
+            return self.evaluate(position), False
+
+        # Ending the turn here is always possible, the hand is never empty
+        moves = position.player_moves(self.player)
+        best_value = max(value for _, value in self.discard_moves(position, moves))
+        complete = True
+        for _, reward, next_position in self.build_moves(position, moves):
+            if next_position is None:
+                value = reward
+            else:
+                next_value, next_complete = self.search_position(next_position, depth - 1)
+                value = reward + next_value
+                complete = complete and next_complete
+            if value > best_value:
+                best_value = value
+
+        self.table[key] = (depth, best_value, complete)
+        return best_value, complete
+
+    def choose_move(self, position: GameState, budget: float) -> tuple[int, int, int]:
+        # Deepens until the whole turn is searched or the budget runs out, then
+        # plays the best move of the deepest search that finished
+        self.deadline = time.perf_counter() + budget
+        moves = position.player_moves(self.player)
+        root_build_moves = self.build_moves(position, moves)
+        best_move, best_discard_value = max(self.discard_moves(position, moves), key=lambda discard_move: discard_move[1])
+
+        # Used if not even the first search finishes: the best immediate reward
+        best_reward = best_discard_value
+        for move, reward, _ in root_build_moves:
+            if reward > best_reward:
+                best_move = move
+                best_reward = reward
+
+        for depth in range(1, MAX_SEARCH_DEPTH + 1, 1):
+            try:
+                depth_best_move = best_move
+                depth_best_value = best_discard_value
+                complete = True
+                for move, reward, next_position in root_build_moves:
+                    if next_position is None:
+                        value = reward
+                    else:
+                        next_value, next_complete = self.search_position(next_position, depth - 1)
+                        value = reward + next_value
+                        complete = complete and next_complete
+                    if value > depth_best_value:
+                        depth_best_move = move
+                        depth_best_value = value
+            except SearchTimeout:
+                break
+            best_move = depth_best_move
+            if complete:
+                break
+        return best_move
+
+
+class BotPlayer:
+    # One connection playing games at one table. Events and replies are read on
+    # the calling thread, events are applied as they arrive.
+    join_poll_interval = JOIN_POLL_INTERVAL
+    rematch_poll_interval = REMATCH_POLL_INTERVAL
+
+    def __init__(self, host: str, port: int, table_id: int, budget: float = DEFAULT_BUDGET_MS / 1000, move_delay: float = 0,
+                 max_games: int = 1, name: str = BOT_NAME):
+        self.host = host
+        self.port = port
+        self.table_id = table_id
+        self.budget = budget
+        self.move_delay = move_delay
+        self.max_games = max_games
+        self.name = name
+        self.server_socket = None
+        self.receive_buffer = ReceiveBuffer()
+        self.player_number = 0
+        self.opponent_player = 0
+        self.games_played = 0
+        self.search_times = []
+        self.reset_game()
+
+    def reset_game(self) -> None:
+        self.current_turn = 0
+        self.game_result = None
+        self.hand = []
+        self.build_piles = [[] for _ in range(0, NUM_BUILD_PILES, 1)]
+        # Indexed by player number - 1
+        self.discard_piles = [[[] for _ in range(0, len(DISCARD_PILES), 1)] for _ in range(0, 2, 1)]
+        self.payoff_pile_tops = [None, None]
+        self.pile_counts = (0, 0, 0, 0, 0)
+        self.pile_counts_received = 0
+        self.own_moves_sent = 0
+        self.own_moves_seen = 0
+        self.pile_counts_at_own_move = 0
+
+    def read_message(self) -> tuple[Opcode, tuple[int, ...], bytes] | None:
+        # Applies an event, or returns a reply
+        payload = receive_packet(self.server_socket, self.receive_buffer)
+        if payload is None:
+            raise ProtocolError("Connection to the server was closed")
+        if is_event(payload):
+            event, fields, tail = decode_message(EVENT_FORMATS, Event, payload)
+            self.handle_event(event, fields, tail)
+            return None
+        opcode, fields, tail = decode_message(REPLY_FORMATS, Opcode, payload)
+        # The receive buffer is reused, so keep a copy of the tail
+        return opcode, fields, bytes(tail)
+
+    def send(self, opcode: Opcode, *fields: int, tail: bytes = b"") -> None:
+        send_request(self.server_socket, opcode, *fields, tail=tail)
+
+    def request(self, opcode: Opcode, *fields: int, tail: bytes = b"") -> tuple[tuple[int, ...], bytes]:
+        self.send(opcode, *fields, tail=tail)
+        while True:
+            reply = self.read_message()
+            if reply is None:
+                continue
+            if reply[0] != opcode:
+                raise ProtocolError(f"Expected a {opcode.name} reply but received {reply[0].name}")
+            return reply[1], reply[2]
+
+    def request_cards(self, opcode: Opcode, *fields: int) -> list[int]:
+        card_identities = decode_card_identities(self.request(opcode, *fields)[1])
+        if card_identities is None:
+            raise ProtocolError(f"Received an invalid card list in a {opcode.name} reply")
+        return [card_id(deck_index, card_index) for deck_index, card_index in card_identities]
+
+    def handle_event(self, event: Event, fields: tuple[int, ...], tail: bytes | memoryview) -> None:
+        if event == Event.CARD_MOVED:
+            moved_player, moving_from, moving_to, deck_index, card_index = fields
+            # Opponent moves are read from the server's move queue at the start of our
+            # turn instead, which also has the moves made before we subscribed
+            if moved_player != self.player_number:
+                return
+            # Our own moves are already applied locally, only the newly flipped payoff pile card is new
+            if moving_from == Pile.PAYOFF_PILE:
+                card_identities = decode_card_identities(tail)
+                if card_identities:
+                    self.payoff_pile_tops[moved_player - 1] = card_id(*card_identities[0])
+                else:
+                    self.payoff_pile_tops[moved_player - 1] = None
+            self.own_moves_seen += 1
+            self.pile_counts_at_own_move = self.pile_counts_received
+
+        elif event == Event.TURN_CHANGED:
+            self.current_turn = fields[0]
+
+        elif event == Event.PILE_COUNTS:
+            self.pile_counts = fields
+            self.pile_counts_received += 1
+
+        elif event == Event.GAME_OVER:
+            self.game_result = GameResult(fields[0])
+
+        elif event == Event.PLAYER_DISCONNECTED:
+            if fields[0] == self.opponent_player and self.game_result is None:
+                raise BotError(f"Player {self.opponent_player} disconnected")
+
+    def connect(self) -> socket.socket:
+        server_socket = socket.create_connection((self.host, self.port))
+        server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return server_socket
+
+    def join(self) -> bool:
+        self.server_socket = self.connect()
+        join_status, assigned_player = self.request(Opcode.PLAYER_READY, PROTOCOL_VERSION, self.table_id, tail=self.name.encode())[0]
+        if join_status == JoinStatus.LOBBY_FULL:
+            print(f"[*] Bot could not join table {self.table_id}, it is full", flush=True)
+            return False
+        elif join_status != JoinStatus.JOINED:
+            raise BotError(f"Server does not speak protocol version {PROTOCOL_VERSION}")
+        self.player_number = assigned_player
+        self.opponent_player = 3 - assigned_player
+
+        if self.player_number == 1:
+            while not self.request(Opcode.HAS_PLAYER2_JOINED)[0][0]:
+                time.sleep(self.join_poll_interval)
+        opponent_name = str(self.request(Opcode.GET_PLAYER_NAME, self.opponent_player)[1], "utf-8")
+        print(f"[+] Bot joined table {self.table_id} as player {self.player_number} against {opponent_name}", flush=True)
+        return True
+
+    def deal(self) -> None:
+        self.send(Opcode.CREATE_DECK)
+        for player in (self.player_number, self.opponent_player):
+            payoff_pile_top = self.request_cards(Opcode.GET_PAYOFF_PILE_TOP, player)
+            if not payoff_pile_top:
+                raise BotError("Could not receive payoff pile top card from server")
+            self.payoff_pile_tops[player - 1] = payoff_pile_top[0]
+
+    def catch_up_opponent_moves(self) -> None:
+        opponent_index = self.opponent_player - 1
+        while True:
+            has_move, moving_from, moving_to, deck_index, card_index = self.request(Opcode.GET_LAST_MOVE, self.opponent_player)[0]
+            if not has_move:
+                break
+            moved_card = card_id(deck_index, card_index)
+            if Pile.DISCARD_PILE_0 <= moving_from <= Pile.DISCARD_PILE_3:
+                source_pile = self.discard_piles[opponent_index][moving_from - Pile.DISCARD_PILE_0]
+                if not source_pile or source_pile[-1] != moved_card:
+                    raise BotError("Issue syncing card moves with the server")
+                source_pile.pop()
+            if Pile.DISCARD_PILE_0 <= moving_to <= Pile.DISCARD_PILE_3:
+                self.discard_piles[opponent_index][moving_to - Pile.DISCARD_PILE_0].append(moved_card)
+            elif Pile.BUILD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+                self.build_piles[moving_to - Pile.BUILD_PILE_0].append(moved_card)
+                # The opponent's client asks the server to reshuffle completed piles
+                clear_completed_build_piles(self.build_piles)
+            else:
+                raise BotError("Issue syncing card moves with the server")
+
+        payoff_pile_top = self.request_cards(Opcode.GET_PAYOFF_PILE_TOP, self.opponent_player)
+        if payoff_pile_top:
+            self.payoff_pile_tops[opponent_index] = payoff_pile_top[0]
+        else:
+            self.payoff_pile_tops[opponent_index] = None
+
+    def wait_until(self, condition) -> None:
+        while not condition():
+            if self.read_message() is not None:
+                raise ProtocolError("Received a reply nothing was waiting for")
+
+    def draw_cards(self) -> None:
+        pile_counts_before = self.pile_counts_received
+        self.hand = self.request_cards(Opcode.DRAW_CARDS, self.player_number)
+        # The new pile counts show whether the draw pile ran out, which ends the game
+        self.wait_until(lambda: self.pile_counts_received > pile_counts_before)
+
+    def search_position(self) -> GameState:
+        # Everything this player can see, as a game state for the search
+        position = GameState()
+        position.current_turn = self.player_number
+        position.hands[self.player_number - 1] = Hand(self.hand)
+        position.build_piles = [array("H", build_pile) for build_pile in self.build_piles]
+        position.discard_piles = [[array("H", discard_pile) for discard_pile in discard_piles] for discard_piles in self.discard_piles]
+        for player_index in range(0, 2, 1):
+            if self.payoff_pile_tops[player_index] is not None:
+                position.payoff_piles[player_index] = array("H", (self.payoff_pile_tops[player_index],))
+        return position
+
+    def choose_move(self) -> tuple[int, int, int]:
+        search = MoveSearch(self.player_number, self.pile_counts[self.player_number - 1])
+        return search.choose_move(self.search_position(), self.budget)
+
+    def play_move(self, moving_from: int, moving_to: int, moved_card: int) -> None:
+        player_index = self.player_number - 1
+        if moving_from == Pile.HAND:
+            self.hand.remove(moved_card)
+        elif Pile.DISCARD_PILE_0 <= moving_from <= Pile.DISCARD_PILE_3:
+            self.discard_piles[player_index][moving_from - Pile.DISCARD_PILE_0].pop()
+
+        if Pile.DISCARD_PILE_0 <= moving_to <= Pile.DISCARD_PILE_3:
+            self.discard_piles[player_index][moving_to - Pile.DISCARD_PILE_0].append(moved_card)
+        else:
+            self.build_piles[moving_to - Pile.BUILD_PILE_0].append(moved_card)
+
+        self.send(Opcode.MOVE_CARD, self.player_number, moving_from, moving_to, *card_identity(moved_card))
+        self.own_moves_sent += 1
+        # Wait for the move to come back, with the next payoff pile card and the new pile counts
+        self.wait_until(lambda: self.own_moves_seen == self.own_moves_sent and self.pile_counts_received > self.pile_counts_at_own_move)
+
+        if clear_completed_build_piles(self.build_piles):
+            self.send(Opcode.RESHUFFLE_DRAW_PILE)
+
+    def game_over_pending(self) -> bool:
+        # The server follows the pile counts that end the game with a game over event
+        payoff_pile1_size, payoff_pile2_size, draw_pile_size = self.pile_counts[:3]
+        return not payoff_pile1_size or not payoff_pile2_size or not draw_pile_size
+
+    def take_turn(self) -> None:
+        self.catch_up_opponent_moves()
+        while True:
+            if self.game_over_pending():
+                self.wait_until(lambda: self.game_result is not None)
+            if self.game_result is not None:
+                return
+            if not self.hand:
+                self.draw_cards()
+                continue
+
+            search_started = time.perf_counter()
+            moving_from, moving_to, moved_card = self.choose_move()
+            self.search_times.append(time.perf_counter() - search_started)
+
+            if self.move_delay:
+                time.sleep(self.move_delay)
+            self.play_move(moving_from, moving_to, moved_card)
+
+            if Pile.DISCARD_PILE_0 <= moving_to <= Pile.DISCARD_PILE_3:
+                # Discarding ends the turn, the server confirms it with a turn changed event
+                self.send(Opcode.END_TURN, self.player_number)
+                self.current_turn = self.opponent_player
+                return
+
+    def play_game(self) -> GameResult:
+        self.send(Opcode.SUBSCRIBE)
+        while self.game_result is None:
+            if self.current_turn == self.player_number:
+                self.take_turn()
+            elif self.read_message() is not None:
+                raise ProtocolError("Received a reply nothing was waiting for")
+        self.request(Opcode.UNSUBSCRIBE)
+        self.games_played += 1
+        return self.game_result
+
+    def agree_to_rematch(self) -> bool:
+        if self.max_games and self.games_played >= self.max_games:
+            self.send(Opcode.SET_REMATCH_DECISION, self.player_number, RematchDecision.NO)
+            return False
+
+        self.send(Opcode.SET_REMATCH_DECISION, self.player_number, RematchDecision.YES)
+        give_up_time = time.monotonic() + REMATCH_TIMEOUT
+        while time.monotonic() < give_up_time:
+            decision = self.request(Opcode.GET_REMATCH_DECISION, self.opponent_player)[0][0]
+            if decision == RematchDecision.YES:
+                return True
+            elif decision == RematchDecision.NO:
+                return False
+            if not self.request(Opcode.IS_OTHER_PLAYER_CONNECTED)[0][0]:
+                return False
+            time.sleep(self.rematch_poll_interval)
+        return False
+
+    def run(self) -> None:
+        try:
+            if not self.join():
+                return
+            self.deal()
+            while True:
+                game_result = self.play_game()
+                print(f"[*] Bot at table {self.table_id} finished game {self.games_played}: {game_result.name}", flush=True)
+                if not self.agree_to_rematch():
+                    break
+                self.send(Opcode.SET_UP_NEW_GAME)
+                self.reset_game()
+                self.deal()
+        finally:
+            if self.server_socket is not None:
+                self.server_socket.close()
+
+
+def run_bot(bot: BotPlayer) -> None:
+    # Thread target, a bot that fails only takes itself down
+    try:
+        bot.run()
+    except (BotError, ProtocolError) as be:
+        print(f"[*] Bot at table {bot.table_id} stopped: {be}", flush=True)
+    except OSError as ose:
+        print(f"[*] Bot at table {bot.table_id} lost its connection: {ose}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays Spite and Malice against people or other bots")
+    parser.add_argument("--host", default="127.0.0.1", help="server address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, required=True, help="server port")
+    parser.add_argument("--table", type=int, default=0, help="first table number, bots fill tables two at a time (default 0)")
+    parser.add_argument("--count", type=int, default=1, help="number of bots (default 1)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"search time per move in milliseconds (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--move-delay", type=float, default=0, help="seconds to wait before each move (default 0)")
+    parser.add_argument("--games", type=int, default=1, help="games each bot plays, 0 to keep playing (default 1)")
+    args = parser.parse_args()
+
+    if not 0 <= args.table + (args.count - 1) // 2 <= 65535:
+        print("Table numbers must be between 0 and 65535", flush=True)
+        sys.exit(1)
+
+    bots = []
+    threads = []
+    for bot_index in range(0, args.count, 1):
+        bot = BotPlayer(args.host, args.port, args.table + bot_index // 2, args.budget_ms / 1000, args.move_delay, args.games)
+        bots.append(bot)
+        threads.append(threading.Thread(target=run_bot, args=(bot,), daemon=True))
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("\n[*] KeyboardInterrupt received. Stopping bots...", flush=True)
+
+    search_times = sorted(search_time for bot in bots for search_time in bot.search_times)
+    if search_times:
+        print(f"{sum(bot.games_played for bot in bots)} games, {len(search_times)} moves searched", flush=True)
+        for label, fraction in (("p50", 0.5), ("p99", 0.99)):
+            print(f"  {label:>5}: {search_times[min(len(search_times) - 1, int(len(search_times) * fraction))] * 1000:7.2f} ms", flush=True)
+        print(f"    max: {search_times[-1] * 1000:7.2f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 from enum import Enum
-from typing import Any
 import pygame
-import socket
-import struct
-import pickle
-import random
 import os
-from socket_utils import recv_all, HEADER_SIZE
+# encode_cards and create_deck_template live in the pygame free engine for the
+# server, and are re-exported here for the client
+from engine import CARD_NAMES, CARD_INDICES, CARDS_PER_DECK, card_rank, encode_cards, create_deck_template
+from protocol import decode_card_identities
+
+
+# Client side card face surfaces, keyed by card name and shared by every Card
+# with that name
+card_faces = {}
+
+# Client side card back surfaces, keyed by colour name as offered on the title
+# screen ("Red", "Blue", ...) and shared by every game the client plays
+card_backs = {}
+CARD_BACK_PREFIX = "card_back_"
+# Offered first on the title screen and used when the configured colour has no card back
+DEFAULT_CARD_BACK_COLOR = "Red"
 
 class CardPosition(Enum):
     FACE_DOWN = 0,
@@ -14,110 +24,87 @@ class CardPosition(Enum):
 
 
 class Card:
-    def __init__(self, name: str, surface_array: Any):
+    def __init__(self, name: str, deck_index: int = 0):
         self.name = name
-        self.surface_array = surface_array
+        self.deck_index = deck_index
+        self.card_index = CARD_INDICES[name]
         self.position = CardPosition.FACE_DOWN
         self.surface = None
         self.rect = None
         self.order = 0
-
-        if self.name[0].isdigit():
-            if self.name[:2].isdigit():
-                self.rank = int(self.name[:2])
-            else:
-                self.rank = int(self.name[0])
-        else:
-            if self.name.startswith("ace"):
-                self.rank = 1
-            elif self.name.startswith("jack"):
-                self.rank = 11
-            elif self.name.startswith("queen"):
-                self.rank = 12
-            elif self.name.startswith("king"):
-                self.rank = 13
+        self.rank = card_rank(self.card_index)
 
     def generate_rect(self):
         if self.surface is not None:
             self.rect = self.surface.get_rect()
 
     def generate_surface(self):
-        self.surface = pygame.surfarray.make_surface(self.surface_array)
-
-
-def receive_cards(sock: socket.socket, num_cards_to_receive: int) -> list[Card]:
-
-    received_cards = []
-
-    for _ in range(0, num_cards_to_receive, 1):
-
-        # Receive message length
-        raw_message_length = recv_all(sock, HEADER_SIZE)
-        if not raw_message_length:
-            return []
-        message_length = struct.unpack("!I", raw_message_length)[0]
+        self.surface = card_faces[self.name]
 
-        # Receive the actual data payload
-        pickled_data = recv_all(sock, message_length)
-        if not pickled_data:
-            return []
-
-        card_data = pickle.loads(pickled_data)
-        card_data.generate_surface()
-        card_data.generate_rect()
-        received_cards.append(card_data)
-
-    return received_cards
-
-
-def send_cards(sock: socket.socket, cards_to_send: list[Card]) -> None:
 
-    for sent_card in cards_to_send:
-        # Can't serialize pygame surfaces and rects
-        sent_card.surface = None
-        sent_card.rect = None
-
-        pickled_card = pickle.dumps(sent_card)
-        message_length = struct.pack('!I', len(pickled_card))
-        sock.sendall(message_length + pickled_card)
+def load_card_faces(directory: str) -> None:
+    # Needs the display to be set up so the faces can be converted to its pixel format
+    if card_faces:
+        return
+    for filename in os.listdir(directory):
+        name = os.path.splitext(filename)[0]
+        if name in CARD_INDICES:
+            image_surface = pygame.image.load(os.path.join(directory, filename))
+            image_surface = pygame.transform.scale(image_surface, (100, 150))
+            card_faces[name] = image_surface.convert()
 
 
-def create_deck(directory: str, num_decks: int) -> list[Card]:
-    cards = []
-    for _ in range(0, num_decks, 1):
-        for filename in os.listdir(directory):
+def load_card_backs(directory: str) -> None:
+    # Needs the display to be set up so the backs can be converted to its pixel format
+    if card_backs:
+        return
+    for filename in os.listdir(directory):
+        name = os.path.splitext(filename)[0]
+        if name.startswith(CARD_BACK_PREFIX):
             image_surface = pygame.image.load(os.path.join(directory, filename))
             image_surface = pygame.transform.scale(image_surface, (100, 150))
-            cards.append(Card(os.path.splitext(filename)[0], pygame.surfarray.array3d(image_surface)))
-
-    random.shuffle(cards)
-    return cards
-
-
-def deal(all_cards: list[Card], payoff_pile_size: int) -> tuple[list[Card], list[Card], list[Card]]:
-    pile1 = []
-    pile2 = []
-
-    for index in range(0, payoff_pile_size, 1):
-        if index == payoff_pile_size - 1:
-            dealt_card = all_cards.pop()
-            dealt_card.position = CardPosition.FACE_UP
-            dealt_card.order = index
-            pile1.append(dealt_card)
-            dealt_card = all_cards.pop()
-            dealt_card.position = CardPosition.FACE_UP
-            dealt_card.order = index
-            pile2.append(dealt_card)
-        else:
-            dealt_card = all_cards.pop()
-            dealt_card.order = index
-            pile1.append(dealt_card)
-            dealt_card = all_cards.pop()
-            dealt_card.order = index
-            pile2.append(dealt_card)
-
-    remaining_cards = all_cards
-    for index, remaining_card in enumerate(list(remaining_cards)):
-        remaining_card.order = index
-
-    return pile1, pile2, remaining_cards
\ No newline at end of file
+            card_backs[name[len(CARD_BACK_PREFIX):].capitalize()] = image_surface.convert_alpha()
+    if not card_backs:
+        raise FileNotFoundError(f"No card back images ({CARD_BACK_PREFIX}<colour>) found in {directory}")
+
+
+def card_back_colors() -> list[str]:
+    # Every colour with a card back, the default first
+    if not card_backs:
+        raise RuntimeError("Card backs must be loaded with load_card_backs first")
+    return sorted(card_backs.keys(), key=lambda color: (color != DEFAULT_CARD_BACK_COLOR, color))
+
+
+def resolve_card_back_color(color: str) -> str:
+    # The colour if it has a card back, otherwise the default (or first available) one
+    card_back_color_choices = card_back_colors()
+    if color in card_back_color_choices:
+        return color
+    print(f"Warning: no card back found for colour {color}, using {card_back_color_choices[0]}")
+    return card_back_color_choices[0]
+
+
+def card_from_identity(deck_index: int, card_index: int) -> Card | None:
+    if card_index >= CARDS_PER_DECK or CARD_NAMES[card_index] not in card_faces:
+        return None
+    card_data = Card(CARD_NAMES[card_index], deck_index)
+    # The client is only ever sent cards it shows face up
+    card_data.position = CardPosition.FACE_UP
+    card_data.generate_surface()
+    card_data.generate_rect()
+    return card_data
+
+
+def decode_cards(payload: bytes | memoryview) -> list[Card]:
+    card_identities = decode_card_identities(payload)
+    if card_identities is None:
+        return []
+
+    decoded_cards = []
+    for deck_index, card_index in card_identities:
+        card_data = card_from_identity(deck_index, card_index)
+        if card_data is None:
+            return []
+        decoded_cards.append(card_data)
+
+    return decoded_cards
@@ -0,0 +1,348 @@
+import os
+import random
+import struct
+from array import array
+from collections.abc import Collection, Iterable, Iterator
+from protocol import CARD_COUNT_FORMAT, CARD_RECORD_FORMAT, Pile, GameResult
+
+# Pure game rules shared by the server, the client and anything that plays games
+# without a display. Nothing in here may import pygame.
+
+SUITS = ["clubs", "diamonds", "hearts", "spades"]
+RANKS = ["ace", "2", "3", "4", "5", "6", "7", "8", "9", "10", "jack", "queen", "king"]
+
+# Fixed card ordering shared by the client and server so a card can be sent as
+# a (deck index, card index) pair instead of its name and pixel data
+CARD_NAMES = [f"{rank}_of_{suit}" for suit in SUITS for rank in RANKS]
+CARD_INDICES = {name: index for index, name in enumerate(CARD_NAMES)}
+CARDS_PER_DECK = len(CARD_NAMES)
+
+KING_RANK = 13
+# A build pile is complete, and goes back into the draw pile, once it reaches a queen
+COMPLETE_BUILD_PILE_SIZE = 12
+HAND_SIZE = 5
+NUM_DISCARD_PILES = 4
+NUM_BUILD_PILES = 4
+
+DISCARD_PILES = [Pile.DISCARD_PILE_0, Pile.DISCARD_PILE_1, Pile.DISCARD_PILE_2, Pile.DISCARD_PILE_3]
+BUILD_PILES = [Pile.BUILD_PILE_0, Pile.BUILD_PILE_1, Pile.BUILD_PILE_2, Pile.BUILD_PILE_3]
+PILE_SEPARATOR = 0xFFFF
+
+class EngineError(Exception):
+    pass
+
+
+def card_id(deck_index: int, card_index: int) -> int:
+    return deck_index * CARDS_PER_DECK + card_index
+
+
+def card_identity(card: int) -> tuple[int, int]:
+    # (deck index, card index), the pair sent over the wire
+    return divmod(card, CARDS_PER_DECK)
+
+
+def card_rank(card: int) -> int:
+    # Works on card ids and card indices alike since a deck holds whole suits
+    return card % len(RANKS) + 1
+
+
+def encode_cards(cards_to_encode: Collection[int]) -> bytes:
+    # Only the card identities are sent, the client already has the card faces
+    payload = bytearray(struct.pack(CARD_COUNT_FORMAT, len(cards_to_encode)))
+    for encoded_card in cards_to_encode:
+        payload += struct.pack(CARD_RECORD_FORMAT, *card_identity(encoded_card))
+    return bytes(payload)
+
+
+def create_deck_template(directory: str) -> list[int]:
+    # Built once at startup, the card indices of one deck that have a card face
+    available_cards = {os.path.splitext(filename)[0] for filename in os.listdir(directory)}
+    return [card_index for card_index, name in enumerate(CARD_NAMES) if name in available_cards]
+
+
+def can_build(rank: int, build_pile_size: int) -> bool:
+    # Kings are wild, anything else must continue the count from ace to queen
+    return rank == KING_RANK or rank == build_pile_size + 1
+
+
+def clear_completed_build_piles(build_piles: list) -> list:
+    # Empties every complete build pile in place and returns its cards for the draw pile
+    completed_cards = []
+    for build_pile in build_piles:
+        if len(build_pile) == COMPLETE_BUILD_PILE_SIZE:
+            completed_cards.extend(build_pile)
+            del build_pile[:]
+    return completed_cards
+
+
+def determine_winner(payoff_pile1_size: int, payoff_pile2_size: int, draw_pile_size: int) -> GameResult:
+    if not payoff_pile1_size:
+        return GameResult.PLAYER1_WON
+    elif not payoff_pile2_size:
+        return GameResult.PLAYER2_WON
+    elif not draw_pile_size and payoff_pile1_size < payoff_pile2_size:
+        return GameResult.PLAYER1_WON
+    elif not draw_pile_size and payoff_pile1_size > payoff_pile2_size:
+        return GameResult.PLAYER2_WON
+    elif not draw_pile_size and payoff_pile1_size == payoff_pile2_size:
+        return GameResult.STALEMATE
+    else:
+        return GameResult.UNDETERMINED
+
+
+def first_player(payoff_top_rank1: int, payoff_top_rank2: int, rng: random.Random | None = None) -> int:
+    # Highest payoff pile card starts, a tie is settled by chance
+    if payoff_top_rank1 > payoff_top_rank2:
+        return 1
+    elif payoff_top_rank1 < payoff_top_rank2:
+        return 2
+    return (rng or random).randint(1, 2)
+
+
+class Hand:
+    # A player's hand as an insertion ordered dict keyed by card id, so checking
+    # for and removing the card named in a move request take constant time
+    # however large the hand grows. Iterates in the order the cards were drawn.
+    __slots__ = ("cards",)
+
+    def __init__(self, cards: Iterable[int] = ()):
+        self.cards = dict.fromkeys(cards)
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cards)
+
+    def __contains__(self, card: int) -> bool:
+        return card in self.cards
+
+    def append(self, card: int) -> None:
+        self.cards[card] = None
+
+    def extend(self, cards: Iterable[int]) -> None:
+        self.cards.update(dict.fromkeys(cards))
+
+    def remove(self, card: int) -> None:
+        try:
+            del self.cards[card]
+        except KeyError:
+            raise ValueError(f"Card {card} is not in the hand")
+
+    def copy(self) -> "Hand":
+        hand = Hand.__new__(Hand)
+        hand.cards = self.cards.copy()
+        return hand
+
+
+class GameState:
+    # One game between two players. Cards are card ids stored in compact
+    # array('H') piles, since six decks hold more ids than fit in a byte, except
+    # for the hands. Piles are indexed by player number - 1 and the last element
+    # of a pile is its top card. face_up is a bitset over card ids.
+    __slots__ = ("rng", "payoff_piles", "hands", "discard_piles", "build_piles", "draw_pile",
+                 "face_up", "current_turn", "turn_count", "draw_counts", "reshuffle_count")
+
+    def __init__(self, rng: random.Random | None = None):
+        self.rng = rng or random.Random()
+        self.payoff_piles = [array("H"), array("H")]
+        self.hands = [Hand(), Hand()]
+        self.discard_piles = [[array("H") for _ in range(0, NUM_DISCARD_PILES, 1)] for _ in range(0, 2, 1)]
+        self.build_piles = [array("H") for _ in range(0, NUM_BUILD_PILES, 1)]
+        self.draw_pile = array("H")
+        self.face_up = 0
+        # 0 until decide_first_player has run
+        self.current_turn = 0
+        self.turn_count = 0
+        # Cards each player has drawn since their turn started
+        self.draw_counts = [0, 0]
+        self.reshuffle_count = 0
+
+    @classmethod
+    def new_game(cls, num_decks: int, payoff_pile_size: int, rng: random.Random | None = None) -> "GameState":
+        state = cls(rng)
+        state.deal(num_decks, payoff_pile_size)
+        state.decide_first_player()
+        state.draw_if_hand_empty()
+        return state
+
+    def deal(self, num_decks: int, payoff_pile_size: int, deck_template: list[int] | None = None) -> None:
+        # deck_template lists the card indices making up one deck, all 52 by default
+        if deck_template is None:
+            deck_template = range(0, CARDS_PER_DECK, 1)
+        cards = array("H", [deck_index * CARDS_PER_DECK + card_index for deck_index in range(0, num_decks, 1) for card_index in deck_template])
+        self.rng.shuffle(cards)
+        # Dealt alternately from the end of the shoe
+        dealt_cards = cards[len(cards) - 2 * payoff_pile_size:]
+        dealt_cards.reverse()
+        self.payoff_piles = [dealt_cards[0::2], dealt_cards[1::2]]
+        del cards[len(cards) - 2 * payoff_pile_size:]
+        self.draw_pile = cards
+        self.face_up = (1 << self.payoff_piles[0][-1]) | (1 << self.payoff_piles[1][-1])
+
+    def copy(self) -> "GameState":
+        # The copy shares the random number generator
+        state = GameState.__new__(GameState)
+        state.rng = self.rng
+        state.payoff_piles = [pile[:] for pile in self.payoff_piles]
+        state.hands = [hand.copy() for hand in self.hands]
+        state.discard_piles = [[pile[:] for pile in piles] for piles in self.discard_piles]
+        state.build_piles = [pile[:] for pile in self.build_piles]
+        state.draw_pile = self.draw_pile[:]
+        state.face_up = self.face_up
+        state.current_turn = self.current_turn
+        state.turn_count = self.turn_count
+        state.draw_counts = self.draw_counts[:]
+        state.reshuffle_count = self.reshuffle_count
+        return state
+
+    def key(self) -> bytes:
+        # Identifies the position for hashing, piles are separated by an id no card can have
+        packed = array("H", (self.current_turn,))
+        for pile in (*self.payoff_piles, *self.hands, *self.discard_piles[0], *self.discard_piles[1], *self.build_piles, self.draw_pile):
+            packed.extend(pile)
+            packed.append(PILE_SEPARATOR)
+        return packed.tobytes()
+
+    def is_face_up(self, card: int) -> bool:
+        return bool(self.face_up >> card & 1)
+
+    def return_to_draw_pile(self, cards: list[int]) -> None:
+        # Completed build piles go back into the draw pile face down and it is reshuffled
+        for card in cards:
+            self.face_up &= ~(1 << card)
+        self.draw_pile.extend(cards)
+        self.rng.shuffle(self.draw_pile)
+        self.reshuffle_count += 1
+
+    def winner(self) -> GameResult:
+        return determine_winner(len(self.payoff_piles[0]), len(self.payoff_piles[1]), len(self.draw_pile))
+
+    def is_over(self) -> bool:
+        return self.winner() != GameResult.UNDETERMINED
+
+    def draw_if_hand_empty(self) -> None:
+        # The current player draws a fresh hand whenever theirs runs out
+        if not self.hands[self.current_turn - 1] and not self.is_over():
+            self.draw_cards(self.current_turn)
+
+    def decide_first_player(self) -> bool:
+        # Once the payoff piles are dealt the highest top card starts. Returns
+        # True if the first player was decided by this call.
+        if self.current_turn != 0:
+            return False
+        self.current_turn = first_player(card_rank(self.payoff_piles[0][-1]), card_rank(self.payoff_piles[1][-1]), self.rng)
+        self.turn_count = 1
+        return True
+
+    def draw_cards(self, player: int) -> int:
+        # Moves up to a hand's worth of cards off the draw pile into the player's
+        # hand, in the order popping them one at a time would. Returns how many were drawn.
+        drawn_cards = self.draw_pile[-HAND_SIZE:]
+        drawn_cards.reverse()
+        self.hands[player - 1].extend(drawn_cards)
+        del self.draw_pile[-HAND_SIZE:]
+        self.draw_counts[player - 1] += len(drawn_cards)
+        return len(drawn_cards)
+
+    def end_turn(self) -> None:
+        player = self.current_turn
+        self.draw_counts[player - 1] = 0
+        self.current_turn = 3 - player
+        self.turn_count += 1
+
+    def get_source_pile(self, player: int, moving_from: int) -> array | Hand:
+        if moving_from == Pile.HAND:
+            return self.hands[player - 1]
+        elif moving_from == Pile.PAYOFF_PILE:
+            return self.payoff_piles[player - 1]
+        elif Pile.DISCARD_PILE_0 <= moving_from <= Pile.DISCARD_PILE_3:
+            return self.discard_piles[player - 1][moving_from - Pile.DISCARD_PILE_0]
+        raise EngineError(f"Invalid 'moving from' location {moving_from}")
+
+    def legal_moves(self) -> list[tuple[int, int, int]]:
+        # Moves for the current player, none once the game is over
+        if self.is_over():
+            return []
+        return self.player_moves(self.current_turn)
+
+    def player_moves(self, player: int) -> list[tuple[int, int, int]]:
+        # Every move move_card accepts from the player, as (moving from, moving to,
+        # card id). A hand card can go onto a build pile or a discard pile (which
+        # ends the turn), a discard pile or payoff pile top card only onto a build
+        # pile. Build moves come first, payoff pile ones leading.
+        player_index = player - 1
+        build_pile_sizes = [len(build_pile) for build_pile in self.build_piles]
+        moves = []
+
+        tops = []
+        if self.payoff_piles[player_index]:
+            tops.append((Pile.PAYOFF_PILE, self.payoff_piles[player_index][-1]))
+        for moving_from, discard_pile in zip(DISCARD_PILES, self.discard_piles[player_index]):
+            if discard_pile:
+                tops.append((moving_from, discard_pile[-1]))
+        for card in self.hands[player_index]:
+            tops.append((Pile.HAND, card))
+
+        for moving_from, card in tops:
+            rank = card_rank(card)
+            for moving_to, build_pile_size in zip(BUILD_PILES, build_pile_sizes):
+                if can_build(rank, build_pile_size):
+                    moves.append((moving_from, moving_to, card))
+
+        for card in self.hands[player_index]:
+            for moving_to in DISCARD_PILES:
+                moves.append((Pile.HAND, moving_to, card))
+
+        return moves
+
+    def move_card(self, player: int, moving_from: int, moving_to: int, card: int) -> None:
+        # Checks and carries out just the card transfer. A hand card can go onto a
+        # build pile or a discard pile, a discard pile or payoff pile top card only
+        # onto a build pile. Turns, drawing and completed build piles are left to
+        # the caller, the server does those on separate requests.
+        source_pile = self.get_source_pile(player, moving_from)
+
+        if moving_from == Pile.HAND:
+            if not Pile.DISCARD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+                raise EngineError(f"Invalid 'moving to' location {moving_to}")
+            if card not in source_pile:
+                raise EngineError("Card is not in the player's hand")
+        else:
+            if not Pile.BUILD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+                raise EngineError(f"Invalid 'moving to' location {moving_to}")
+            if not source_pile or source_pile[-1] != card:
+                raise EngineError(f"Card is not the top card of {Pile(moving_from).name}")
+
+        if Pile.BUILD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+            target_pile = self.build_piles[moving_to - Pile.BUILD_PILE_0]
+            if not can_build(card_rank(card), len(target_pile)):
+                raise EngineError(f"Card cannot be played on {Pile(moving_to).name}")
+        else:
+            target_pile = self.discard_piles[player - 1][moving_to - Pile.DISCARD_PILE_0]
+
+        if moving_from == Pile.HAND:
+            source_pile.remove(card)
+        else:
+            source_pile.pop()
+            if moving_from == Pile.PAYOFF_PILE and source_pile:
+                # Flip over the next payoff pile card
+                self.face_up |= 1 << source_pile[-1]
+        self.face_up |= 1 << card
+        target_pile.append(card)
+
+    def apply_move(self, moving_from: int, moving_to: int, card: int) -> None:
+        # A whole move by the current player, with everything that follows from it
+        if self.is_over():
+            raise EngineError("The game is already over")
+        player = self.current_turn
+        self.move_card(player, moving_from, moving_to, card)
+
+        if Pile.BUILD_PILE_0 <= moving_to <= Pile.BUILD_PILE_3:
+            completed_cards = clear_completed_build_piles(self.build_piles)
+            if completed_cards:
+                self.return_to_draw_pile(completed_cards)
+        else:
+            # Discarding ends the turn
+            self.end_turn()
+        self.draw_if_hand_empty()
@@ -0,0 +1,228 @@
+import asyncio
+import socket
+import struct
+from enum import IntEnum
+from socket_utils import ReceiveBuffer, receive_packet, send_packet, async_receive_packet
+
+# Bumped whenever a message layout changes, clients and servers must match
+PROTOCOL_VERSION = 4
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Opcode(IntEnum):
+    PLAYER_READY = 1
+    HAS_PLAYER2_JOINED = 2
+    GET_PLAYER_NAME = 3
+    SET_REMATCH_DECISION = 4
+    GET_REMATCH_DECISION = 5
+    SET_UP_NEW_GAME = 6
+    RESHUFFLE_DRAW_PILE = 7
+    CREATE_DECK = 8
+    IS_OTHER_PLAYER_CONNECTED = 9
+    GET_HAND_SIZE = 10
+    GET_PAYOFF_PILE_SIZE = 11
+    GET_PAYOFF_PILE_TOP = 12
+    HAS_GAME_RESULT = 13
+    GET_GAME_RESULT = 14
+    GET_DRAW_PILE_SIZE = 15
+    GET_LAST_MOVE = 16
+    GET_CURRENT_TURN = 17
+    END_TURN = 18
+    DRAW_CARDS = 19
+    MOVE_CARD = 20
+    SUBSCRIBE = 21
+    UNSUBSCRIBE = 22
+    GET_STATE = 23
+
+
+# Pushed by the server to subscribed connections. Events share the leading
+# byte with replies, so they are numbered well above the last opcode.
+class Event(IntEnum):
+    CARD_MOVED = 128
+    TURN_CHANGED = 129
+    PILE_COUNTS = 130
+    DRAW_PILE_RESHUFFLED = 131
+    GAME_OVER = 132
+    PLAYER_DISCONNECTED = 133
+
+
+class Pile(IntEnum):
+    HAND = 0
+    DISCARD_PILE_0 = 1
+    DISCARD_PILE_1 = 2
+    DISCARD_PILE_2 = 3
+    DISCARD_PILE_3 = 4
+    BUILD_PILE_0 = 5
+    BUILD_PILE_1 = 6
+    BUILD_PILE_2 = 7
+    BUILD_PILE_3 = 8
+    PAYOFF_PILE = 9
+
+
+class JoinStatus(IntEnum):
+    JOINED = 0
+    LOBBY_FULL = 1
+    VERSION_MISMATCH = 2
+
+
+class RematchDecision(IntEnum):
+    UNDECIDED = 0
+    YES = 1
+    NO = 2
+
+
+class GameResult(IntEnum):
+    UNDETERMINED = 0
+    PLAYER1_WON = 1
+    PLAYER2_WON = 2
+    STALEMATE = 3
+
+
+# Card lists in message tails: card count followed by one (deck index, card index) record per card
+CARD_COUNT_FORMAT = "!H"
+CARD_COUNT_SIZE = struct.calcsize(CARD_COUNT_FORMAT)
+CARD_RECORD_FORMAT = "!BB"
+CARD_RECORD_SIZE = struct.calcsize(CARD_RECORD_FORMAT)
+
+# Tail of a GET_STATE reply when the state changed: payoff pile 1, payoff pile 2,
+# draw pile, hand 1, hand 2, current turn, game result, then the two payoff pile
+# tops as card lists
+GAME_STATE_FORMAT = struct.Struct("!HHHHHBB")
+
+
+# Fixed layout of the fields following the opcode byte. Anything after the
+# fixed fields is the message tail (a player name or a list of cards).
+REQUEST_FORMATS = {
+    Opcode.PLAYER_READY: struct.Struct("!BH"),             # protocol version, table id, tail: name
+    Opcode.HAS_PLAYER2_JOINED: struct.Struct(""),
+    Opcode.GET_PLAYER_NAME: struct.Struct("!B"),           # player
+    Opcode.SET_REMATCH_DECISION: struct.Struct("!BB"),     # player, rematch decision
+    Opcode.GET_REMATCH_DECISION: struct.Struct("!B"),      # player
+    Opcode.SET_UP_NEW_GAME: struct.Struct(""),
+    Opcode.RESHUFFLE_DRAW_PILE: struct.Struct(""),
+    Opcode.CREATE_DECK: struct.Struct(""),
+    Opcode.IS_OTHER_PLAYER_CONNECTED: struct.Struct(""),
+    Opcode.GET_HAND_SIZE: struct.Struct("!B"),             # player
+    Opcode.GET_PAYOFF_PILE_SIZE: struct.Struct("!B"),      # player
+    Opcode.GET_PAYOFF_PILE_TOP: struct.Struct("!B"),       # player
+    Opcode.HAS_GAME_RESULT: struct.Struct(""),
+    Opcode.GET_GAME_RESULT: struct.Struct(""),
+    Opcode.GET_DRAW_PILE_SIZE: struct.Struct(""),
+    Opcode.GET_LAST_MOVE: struct.Struct("!B"),             # player
+    Opcode.GET_CURRENT_TURN: struct.Struct(""),
+    Opcode.END_TURN: struct.Struct("!B"),                  # player
+    Opcode.DRAW_CARDS: struct.Struct("!B"),                # player
+    Opcode.MOVE_CARD: struct.Struct("!BBBBB"),             # player, source pile, destination pile, deck index, card index
+    Opcode.SUBSCRIBE: struct.Struct(""),
+    Opcode.UNSUBSCRIBE: struct.Struct(""),
+    Opcode.GET_STATE: struct.Struct("!I"),                 # state version the client already has
+}
+
+REPLY_FORMATS = {
+    Opcode.PLAYER_READY: struct.Struct("!BB"),             # join status, player
+    Opcode.HAS_PLAYER2_JOINED: struct.Struct("!?"),
+    Opcode.GET_PLAYER_NAME: struct.Struct(""),             # tail: name
+    Opcode.GET_REMATCH_DECISION: struct.Struct("!B"),      # rematch decision
+    Opcode.IS_OTHER_PLAYER_CONNECTED: struct.Struct("!?"),
+    Opcode.GET_HAND_SIZE: struct.Struct("!H"),
+    Opcode.GET_PAYOFF_PILE_SIZE: struct.Struct("!H"),
+    Opcode.GET_PAYOFF_PILE_TOP: struct.Struct(""),         # tail: cards
+    Opcode.HAS_GAME_RESULT: struct.Struct("!?"),
+    Opcode.GET_GAME_RESULT: struct.Struct("!B"),           # game result
+    Opcode.GET_DRAW_PILE_SIZE: struct.Struct("!H"),
+    Opcode.GET_LAST_MOVE: struct.Struct("!?BBBB"),         # has move, source pile, destination pile, deck index, card index
+    Opcode.GET_CURRENT_TURN: struct.Struct("!B"),          # player
+    Opcode.DRAW_CARDS: struct.Struct(""),                  # tail: cards
+    Opcode.UNSUBSCRIBE: struct.Struct(""),                 # no events follow this reply
+    Opcode.GET_STATE: struct.Struct("!I?"),                # state version, modified, tail: game state if modified
+}
+
+EVENT_FORMATS = {
+    Event.CARD_MOVED: struct.Struct("!BBBBB"),             # player, source pile, destination pile, deck index, card index, tail: next payoff pile top
+    Event.TURN_CHANGED: struct.Struct("!B"),               # player
+    Event.PILE_COUNTS: struct.Struct("!HHHHH"),            # payoff pile 1, payoff pile 2, draw pile, hand 1, hand 2
+    Event.DRAW_PILE_RESHUFFLED: struct.Struct("!H"),       # draw pile size
+    Event.GAME_OVER: struct.Struct("!B"),                  # game result
+    Event.PLAYER_DISCONNECTED: struct.Struct("!B"),        # player
+}
+
+
+def encode_message(formats: dict[IntEnum, struct.Struct], opcode: IntEnum, *fields: int, tail: bytes = b"") -> bytes:
+    return bytes((opcode,)) + formats[opcode].pack(*fields) + tail
+
+
+def decode_message(formats: dict[IntEnum, struct.Struct], message_type: type[IntEnum], payload: bytes | memoryview) -> tuple[IntEnum, tuple[int, ...], bytes | memoryview]:
+    if not payload:
+        raise ProtocolError("Received an empty message")
+    try:
+        opcode = message_type(payload[0])
+        message_format = formats[opcode]
+    except (ValueError, KeyError):
+        raise ProtocolError(f"Received a message with an unknown opcode ({payload[0]})")
+    if len(payload) < 1 + message_format.size:
+        raise ProtocolError(f"Received a truncated {opcode.name} message")
+    fields = message_format.unpack_from(payload, 1)
+    return opcode, fields, payload[1 + message_format.size:]
+
+
+def decode_card_identities(payload: bytes | memoryview) -> list[tuple[int, int]] | None:
+    # None if the payload is not a well formed card list
+    if len(payload) < CARD_COUNT_SIZE:
+        return None
+    num_cards = struct.unpack_from(CARD_COUNT_FORMAT, payload)[0]
+    if len(payload) != CARD_COUNT_SIZE + num_cards * CARD_RECORD_SIZE:
+        return None
+    return list(struct.iter_unpack(CARD_RECORD_FORMAT, payload[CARD_COUNT_SIZE:]))
+
+
+def decode_game_state(payload: bytes | memoryview) -> tuple[tuple[int, ...], list[tuple[int, int]], list[tuple[int, int]]] | None:
+    # (GAME_STATE_FORMAT fields, payoff pile 1 top, payoff pile 2 top), None if the payload is not well formed
+    if len(payload) < GAME_STATE_FORMAT.size + 2 * CARD_COUNT_SIZE:
+        return None
+    fields = GAME_STATE_FORMAT.unpack_from(payload)
+    payoff_pile1_top_start = GAME_STATE_FORMAT.size
+    payoff_pile2_top_start = payoff_pile1_top_start + CARD_COUNT_SIZE + struct.unpack_from(CARD_COUNT_FORMAT, payload, payoff_pile1_top_start)[0] * CARD_RECORD_SIZE
+    payoff_pile1_top = decode_card_identities(payload[payoff_pile1_top_start:payoff_pile2_top_start])
+    payoff_pile2_top = decode_card_identities(payload[payoff_pile2_top_start:])
+    if payoff_pile1_top is None or payoff_pile2_top is None:
+        return None
+    return fields, payoff_pile1_top, payoff_pile2_top
+
+
+def send_request(sock: socket.socket, opcode: Opcode, *fields: int, tail: bytes = b"") -> None:
+    send_packet(sock, encode_message(REQUEST_FORMATS, opcode, *fields, tail=tail))
+
+
+def send_reply(sock: socket.socket, opcode: Opcode, *fields: int, tail: bytes = b"") -> None:
+    send_packet(sock, encode_message(REPLY_FORMATS, opcode, *fields, tail=tail))
+
+
+def is_event(payload: memoryview) -> bool:
+    return len(payload) > 0 and payload[0] >= Event.CARD_MOVED
+
+
+def receive_request(sock: socket.socket, receive_buffer: ReceiveBuffer | None = None) -> tuple[Opcode, tuple[int, ...], memoryview] | None:
+    payload = receive_packet(sock, receive_buffer)
+    if payload is None:
+        return None
+    return decode_message(REQUEST_FORMATS, Opcode, payload)
+
+
+async def async_receive_request(reader: asyncio.StreamReader) -> tuple[Opcode, tuple[int, ...], bytes] | None:
+    payload = await async_receive_packet(reader)
+    if payload is None:
+        return None
+    return decode_message(REQUEST_FORMATS, Opcode, payload)
+
+
+def receive_reply(sock: socket.socket, expected_opcode: Opcode, receive_buffer: ReceiveBuffer | None = None) -> tuple[tuple[int, ...], memoryview]:
+    payload = receive_packet(sock, receive_buffer)
+    if payload is None:
+        raise ProtocolError("Connection to the server was closed")
+    opcode, fields, tail = decode_message(REPLY_FORMATS, Opcode, payload)
+    if opcode != expected_opcode:
+        raise ProtocolError(f"Expected a {expected_opcode.name} reply but received {opcode.name}")
+    return fields, tail
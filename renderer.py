@@ -0,0 +1,133 @@
+import threading
+import pygame
+from collections import OrderedDict
+from card import Card, CardPosition
+
+# Most rendered texts kept before the least recently used are dropped
+TEXT_CACHE_SIZE = 256
+
+# Fonts keyed by (name, size, bold, italic), SysFont looks the font file up on every call
+fonts = {}
+# Rendered text keyed by (font, text, antialias, color, background), least recently used first
+text_surfaces = OrderedDict()
+# The networking thread renders the game result text while the main thread draws
+text_cache_lock = threading.Lock()
+
+
+def get_font(name: str, size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+    key = (name, size, bold, italic)
+    text_cache_lock.acquire()
+    font = fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size, bold, italic)
+        fonts[key] = font
+    text_cache_lock.release()
+    return font
+
+
+def render_text(font: pygame.font.Font, text: str, antialias: bool, color: tuple[int, int, int],
+                background: tuple[int, int, int] | None = None) -> pygame.Surface:
+    # Same arguments as font.render, but each text is only rasterized again once
+    # it has dropped out of the cache. Callers must not draw on the returned surface.
+    key = (font, text, antialias, color, background)
+    text_cache_lock.acquire()
+    try:
+        text_surface = text_surfaces.get(key)
+        if text_surface is None:
+            text_surface = font.render(text, antialias, color, background)
+            text_surfaces[key] = text_surface
+            if len(text_surfaces) > TEXT_CACHE_SIZE:
+                text_surfaces.popitem(last=False)
+        else:
+            text_surfaces.move_to_end(key)
+    finally:
+        text_cache_lock.release()
+    return text_surface
+
+
+class DirtyRectRenderer:
+    # Retained mode drawing for the game screen. Each frame the game loop lists
+    # what should be on screen in drawing order, without touching the display.
+    # draw() then compares the list with the previous frame's and repaints and
+    # returns only the areas where something appeared, disappeared, moved or
+    # changed, ready for pygame.display.update(rects).
+    def __init__(self, display_surface: pygame.Surface, background_color: tuple[int, int, int]):
+        self.display_surface = display_surface
+        self.background_color = background_color
+        self.items = []
+        self.previous_items = set()
+        self.needs_full_redraw = True
+
+    def begin_frame(self) -> None:
+        self.items = []
+
+    def blit(self, surface: pygame.Surface, rect: pygame.Rect | tuple[int, int, int, int]) -> pygame.Rect:
+        # The rect is copied, callers move card and card back rects around after queueing them
+        item_rect = pygame.Rect(rect)
+        self.items.append((surface, item_rect))
+        return item_rect
+
+    def invalidate(self) -> None:
+        # Something else drew over the display, repaint everything next frame
+        self.needs_full_redraw = True
+
+    def draw(self) -> list[pygame.Rect]:
+        # Piles stack their cards at one position, and many cards share a face
+        # surface, so items also carry how deep in their stack they sit
+        current_items = set()
+        stack_depths = {}
+        for surface, rect in self.items:
+            position = tuple(rect)
+            depth = stack_depths.get(position, 0)
+            stack_depths[position] = depth + 1
+            current_items.add((surface, position, depth))
+
+        if self.needs_full_redraw:
+            dirty_rects = [self.display_surface.get_rect()]
+            self.needs_full_redraw = False
+        else:
+            dirty_rects = [pygame.Rect(position) for _, position, _ in current_items.symmetric_difference(self.previous_items)]
+        self.previous_items = current_items
+
+        for dirty_rect in dirty_rects:
+            self.display_surface.set_clip(dirty_rect)
+            self.display_surface.fill(self.background_color)
+            for surface, rect in self.items:
+                if rect.colliderect(dirty_rect):
+                    self.display_surface.blit(surface, rect)
+        self.display_surface.set_clip(None)
+
+        return dirty_rects
+
+
+class PileView:
+    # A pile drawn as a single surface, rebuilt only when the cards showing
+    # change, so a pile costs one blit however long it grows. With a fan
+    # offset the edges of up to fan_depth cards under the top card peek out
+    # above it to show the pile's depth, otherwise the surface is simply the
+    # top card's.
+    def __init__(self, fan_offset: int, fan_depth: int):
+        self.fan_offset = fan_offset
+        self.fan_depth = fan_depth
+        self.showing = None
+        self.surface = None
+
+    def render(self, cards: list[Card], end: int, card_back: pygame.Surface) -> pygame.Surface:
+        # Draws cards[:end], end must be at least 1. The top card sits at the
+        # bottom of the returned surface.
+        first = end - 1
+        if self.fan_offset:
+            first = max(0, end - 1 - self.fan_depth)
+        showing = tuple(cards[i].surface if cards[i].position == CardPosition.FACE_UP else card_back for i in range(first, end, 1))
+        if showing == self.showing:
+            return self.surface
+
+        self.showing = showing
+        if len(showing) == 1:
+            self.surface = showing[0]
+        else:
+            card_width, card_height = showing[-1].get_size()
+            self.surface = pygame.Surface((card_width, card_height + (len(showing) - 1) * self.fan_offset), pygame.SRCALPHA)
+            for i in range(0, len(showing), 1):
+                self.surface.blit(showing[i], (0, i * self.fan_offset))
+        return self.surface
@@ -0,0 +1,249 @@
+import argparse
+import sys
+import time
+import numpy as np
+from engine import CARDS_PER_DECK, COMPLETE_BUILD_PILE_SIZE, HAND_SIZE, KING_RANK, NUM_BUILD_PILES, NUM_DISCARD_PILES, RANKS
+
+# Plays many games at once with every piece of game state held in NumPy arrays
+# indexed by game. Only ranks matter to the rules so cards are stored as ranks
+# (0 marks an empty hand slot). Each step every unfinished game makes one move
+# for its current player using a greedy scripted policy:
+#   1. play the payoff pile card onto a build pile
+#   2. play a hand card, then a discard pile card, that continues a build pile
+#   3. play a king from the hand where it lets the payoff pile card go next
+#   4. otherwise discard a hand card, which ends the turn
+
+# Game results, matching protocol.GameResult, 0 marks a game cut off at max_turns
+PLAYER1_WON = 1
+PLAYER2_WON = 2
+STALEMATE = 3
+
+class BatchGames:
+    def __init__(self, num_games: int, num_decks: int, payoff_pile_size: int, rng: np.random.Generator):
+        self.rng = rng
+        self.num_games = num_games
+        self.num_cards = num_decks * CARDS_PER_DECK
+        games = np.arange(num_games)
+        self.games = games
+
+        # Batched shuffle, every row is an independent permutation of the shoe
+        shoe_ranks = np.arange(self.num_cards, dtype=np.int8) % len(RANKS) + 1
+        shoes = rng.permuted(np.broadcast_to(shoe_ranks, (num_games, self.num_cards)), axis=1)
+
+        self.payoff = np.stack((shoes[:, :payoff_pile_size], shoes[:, payoff_pile_size:2 * payoff_pile_size]), axis=1)
+        self.payoff_len = np.full((num_games, 2), payoff_pile_size, dtype=np.int16)
+        self.draw = np.zeros((num_games, self.num_cards), dtype=np.int8)
+        self.draw_len = np.full(num_games, self.num_cards - 2 * payoff_pile_size, dtype=np.int16)
+        self.draw[:, :self.draw_len[0]] = shoes[:, 2 * payoff_pile_size:]
+        self.hand = np.zeros((num_games, 2, HAND_SIZE), dtype=np.int8)
+        self.discard = np.zeros((num_games, 2, NUM_DISCARD_PILES, self.num_cards), dtype=np.int8)
+        self.discard_len = np.zeros((num_games, 2, NUM_DISCARD_PILES), dtype=np.int16)
+        self.build = np.zeros((num_games, NUM_BUILD_PILES, COMPLETE_BUILD_PILE_SIZE), dtype=np.int8)
+        self.build_len = np.zeros((num_games, NUM_BUILD_PILES), dtype=np.int16)
+
+        # Highest payoff pile card starts, ties are settled by chance
+        top1 = self.payoff[:, 0, -1]
+        top2 = self.payoff[:, 1, -1]
+        self.first_player = np.where(top1 > top2, 0, np.where(top1 < top2, 1, rng.integers(0, 2, num_games))).astype(np.int8)
+        self.current = self.first_player.copy()
+
+        self.turns = np.ones(num_games, dtype=np.int32)
+        self.reshuffles = np.zeros(num_games, dtype=np.int32)
+        self.result = np.zeros(num_games, dtype=np.int8)
+        self.draw_pile_exhausted = np.zeros(num_games, dtype=bool)
+        self.done = np.zeros(num_games, dtype=bool)
+
+        self.draw_hands(games)
+
+    def draw_hands(self, rows: np.ndarray) -> None:
+        # Batched draw of up to a full hand for the current player of each row with an empty hand
+        rows = rows[~self.hand[rows, self.current[rows]].any(axis=1)]
+        players = self.current[rows]
+        drawn = np.minimum(HAND_SIZE, self.draw_len[rows])
+        for slot in range(0, HAND_SIZE, 1):
+            drawing = slot < drawn
+            self.hand[rows[drawing], players[drawing], slot] = self.draw[rows[drawing], self.draw_len[rows[drawing]] - 1 - slot]
+        self.draw_len[rows] -= drawn
+
+    def reshuffle(self, rows: np.ndarray, piles: np.ndarray) -> None:
+        # Completed build piles go back into the draw pile, which is shuffled by sorting random keys
+        columns = self.draw_len[rows, None] + np.arange(COMPLETE_BUILD_PILE_SIZE)
+        self.draw[rows[:, None], columns] = self.build[rows, piles]
+        self.draw_len[rows] += COMPLETE_BUILD_PILE_SIZE
+        self.build_len[rows, piles] = 0
+
+        keys = self.rng.random((len(rows), self.num_cards))
+        keys[np.arange(self.num_cards) >= self.draw_len[rows, None]] = 2
+        self.draw[rows] = np.take_along_axis(self.draw[rows], np.argsort(keys, axis=1), axis=1)
+        self.reshuffles[rows] += 1
+
+    def finish_games(self, rows: np.ndarray) -> None:
+        payoff_len = self.payoff_len[rows]
+        draw_pile_empty = self.draw_len[rows] == 0
+        result = np.where(payoff_len[:, 0] == 0, PLAYER1_WON,
+                 np.where(payoff_len[:, 1] == 0, PLAYER2_WON,
+                 np.where(~draw_pile_empty, 0,
+                 np.where(payoff_len[:, 0] < payoff_len[:, 1], PLAYER1_WON,
+                 np.where(payoff_len[:, 0] > payoff_len[:, 1], PLAYER2_WON, STALEMATE)))))
+        finished = result != 0
+        self.result[rows] = result
+        self.draw_pile_exhausted[rows[finished & draw_pile_empty & (payoff_len.min(axis=1) > 0)]] = True
+        self.done[rows[finished]] = True
+
+    def step(self) -> None:
+        rows = np.flatnonzero(~self.done)
+        count = len(rows)
+        players = self.current[rows]
+        build_len = self.build_len[rows]
+        needed = build_len + 1
+
+        payoff_top = self.payoff[rows, players, self.payoff_len[rows, players] - 1]
+        hand = self.hand[rows, players]
+        discard_len = self.discard_len[rows, players]
+        discard_top = np.where(discard_len > 0, self.discard[rows[:, None], players[:, None], np.arange(NUM_DISCARD_PILES), np.maximum(discard_len - 1, 0)], 0)
+
+        # Payoff pile card, a king goes on the fullest build pile
+        payoff_fits = needed == payoff_top[:, None]
+        payoff_move = payoff_fits.any(axis=1) | (payoff_top == KING_RANK)
+        payoff_pile = np.where(payoff_top == KING_RANK, build_len.argmax(axis=1), payoff_fits.argmax(axis=1))
+
+        hand_fits = (hand[:, :, None] == needed[:, None, :]) & (hand[:, :, None] != KING_RANK)
+        hand_move = hand_fits.any(axis=(1, 2))
+        hand_choice = hand_fits.reshape(count, -1).argmax(axis=1)
+
+        discard_fits = (discard_top[:, :, None] == needed[:, None, :]) & (discard_top[:, :, None] != KING_RANK)
+        discard_move = discard_fits.any(axis=(1, 2))
+        discard_choice = discard_fits.reshape(count, -1).argmax(axis=1)
+
+        bridge_fits = needed == payoff_top[:, None] - 1
+        king_slots = hand == KING_RANK
+        king_move = bridge_fits.any(axis=1) & king_slots.any(axis=1)
+
+        hand_move &= ~payoff_move
+        discard_move &= ~payoff_move & ~hand_move
+        king_move &= ~payoff_move & ~hand_move & ~discard_move
+        end_turn = ~(payoff_move | hand_move | discard_move | king_move)
+
+        # Build moves: rank played, build pile it goes on
+        played = np.zeros(count, dtype=np.int8)
+        target = np.zeros(count, dtype=np.int64)
+
+        selected = np.flatnonzero(payoff_move)
+        played[selected] = payoff_top[selected]
+        target[selected] = payoff_pile[selected]
+        self.payoff_len[rows[selected], players[selected]] -= 1
+
+        selected = np.flatnonzero(hand_move)
+        slots = hand_choice[selected] // NUM_BUILD_PILES
+        played[selected] = hand[selected, slots]
+        target[selected] = hand_choice[selected] % NUM_BUILD_PILES
+        self.hand[rows[selected], players[selected], slots] = 0
+
+        selected = np.flatnonzero(discard_move)
+        piles = discard_choice[selected] // NUM_BUILD_PILES
+        played[selected] = discard_top[selected, piles]
+        target[selected] = discard_choice[selected] % NUM_BUILD_PILES
+        self.discard_len[rows[selected], players[selected], piles] -= 1
+
+        selected = np.flatnonzero(king_move)
+        slots = king_slots[selected].argmax(axis=1)
+        played[selected] = KING_RANK
+        target[selected] = bridge_fits[selected].argmax(axis=1)
+        self.hand[rows[selected], players[selected], slots] = 0
+
+        building = ~end_turn
+        build_rows = rows[building]
+        build_piles = target[building]
+        self.build[build_rows, build_piles, self.build_len[build_rows, build_piles]] = played[building]
+        self.build_len[build_rows, build_piles] += 1
+        completed = self.build_len[build_rows, build_piles] == COMPLETE_BUILD_PILE_SIZE
+        if completed.any():
+            self.reshuffle(build_rows[completed], build_piles[completed])
+
+        # Discard the highest card that is not a king (kings only when nothing else is left)
+        selected = np.flatnonzero(end_turn)
+        discarding_hand = hand[selected]
+        card_value = np.where(discarding_hand == KING_RANK, 0, discarding_hand.astype(np.int16) + 1)
+        card_value[discarding_hand == 0] = -1
+        slots = card_value.argmax(axis=1)
+        ranks = discarding_hand[np.arange(len(selected)), slots]
+        # Onto a discard pile showing the same rank, else an empty one, else the shortest
+        tops = discard_top[selected]
+        lengths = discard_len[selected]
+        pile_score = np.where(tops == ranks[:, None], 0, np.where(lengths == 0, 1, 2)) * (self.num_cards + 1) + lengths
+        piles = pile_score.argmin(axis=1)
+        discard_rows = rows[selected]
+        discard_players = players[selected]
+        self.hand[discard_rows, discard_players, slots] = 0
+        self.discard[discard_rows, discard_players, piles, self.discard_len[discard_rows, discard_players, piles]] = ranks
+        self.discard_len[discard_rows, discard_players, piles] += 1
+        self.current[discard_rows] = 1 - discard_players
+        self.turns[discard_rows] += 1
+
+        self.finish_games(rows)
+        rows = rows[~self.done[rows]]
+        self.draw_hands(rows)
+        self.finish_games(rows)
+
+    def run(self, max_turns: int) -> None:
+        while not self.done.all():
+            self.step()
+            # Games still going after max_turns are cut off and left with result 0
+            self.done |= self.turns > max_turns
+
+
+def summarize(games: BatchGames) -> dict[str, float]:
+    finished = games.result != 0
+    turns = games.turns[finished]
+    first_player_won = games.result[finished] == games.first_player[finished] + 1
+    return {
+        "turns_mean": turns.mean(),
+        "turns_p10": np.percentile(turns, 10),
+        "turns_p50": np.percentile(turns, 50),
+        "turns_p90": np.percentile(turns, 90),
+        "reshuffles_mean": games.reshuffles[finished].mean(),
+        "exhausted": games.draw_pile_exhausted[finished].mean(),
+        "stalemate": (games.result[finished] == STALEMATE).mean(),
+        "player1_won": (games.result[finished] == PLAYER1_WON).mean(),
+        "first_player_won": first_player_won.mean(),
+        "cut_off": 1 - finished.mean(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulates batches of games for each server configuration to compare game length, draw pile exhaustion and winner skew")
+    parser.add_argument("--games", type=int, default=10000, help="games per configuration (default 10000)")
+    parser.add_argument("--decks", type=int, nargs="+", default=[2, 3, 4, 5, 6], help="deck counts to simulate (default 2-6)")
+    parser.add_argument("--payoff-pile-sizes", type=int, nargs="+", default=[20, 25, 30], help="payoff pile sizes to simulate (default 20 25 30)")
+    parser.add_argument("--max-turns", type=int, default=2000, help="turns after which a game is cut off (default 2000)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable results")
+    args = parser.parse_args()
+
+    for num_decks in args.decks:
+        if not 2 <= num_decks <= 6:
+            parser.error("decks must be between 2 and 6")
+    for payoff_pile_size in args.payoff_pile_sizes:
+        if not 20 <= payoff_pile_size <= 30:
+            parser.error("payoff pile sizes must be between 20 and 30")
+
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{args.games} games per configuration, greedy scripted policy for both players", flush=True)
+    print(f"{'decks':>5} {'payoff':>6} | {'turns mean':>10} {'p10':>5} {'p50':>5} {'p90':>5} | {'reshuffles':>10} | {'draw pile out':>13} {'stalemate':>9} | {'P1 won':>6} {'1st won':>7} | {'cut off':>7} {'time':>6}", flush=True)
+    for num_decks in args.decks:
+        for payoff_pile_size in args.payoff_pile_sizes:
+            started = time.perf_counter()
+            games = BatchGames(args.games, num_decks, payoff_pile_size, rng)
+            games.run(args.max_turns)
+            elapsed = time.perf_counter() - started
+            summary = summarize(games)
+            print(f"{num_decks:>5} {payoff_pile_size:>6} | {summary['turns_mean']:>10.1f} {summary['turns_p10']:>5.0f} {summary['turns_p50']:>5.0f} {summary['turns_p90']:>5.0f} | "
+                  f"{summary['reshuffles_mean']:>10.1f} | {summary['exhausted']:>13.1%} {summary['stalemate']:>9.1%} | "
+                  f"{summary['player1_won']:>6.1%} {summary['first_player_won']:>7.1%} | {summary['cut_off']:>7.1%} {elapsed:>5.1f}s", flush=True)
+
+
+if __name__ == "__main__":
+    if sys.version_info >= (3, 11):
+        main()
+    else:
+        print("This script requires at least Python 3.11", flush=True)
@@ -1,28 +1,64 @@
+import asyncio
 import socket
 import struct
 
 HEADER_SIZE = 4
 
-def recv_all(sock: socket.socket, n: int):
-    raw_data = b''
-    while len(raw_data) < n:
-        packet = sock.recv(n - len(raw_data))
-        if not packet:
+class ReceiveBuffer:
+    # Reusable per-connection receive buffer. Views returned by recv_all into
+    # this buffer are only valid until the next receive on the connection.
+    def __init__(self, initial_size: int = 4096):
+        self.buffer = bytearray(initial_size)
+
+    def reserve(self, n: int) -> bytearray:
+        if len(self.buffer) < n:
+            # Replace rather than resize so views handed out earlier stay valid
+            self.buffer = bytearray(max(n, len(self.buffer) * 2))
+        return self.buffer
+
+def recv_all(sock: socket.socket, n: int, receive_buffer: ReceiveBuffer | None = None):
+    if receive_buffer is None:
+        raw_data = memoryview(bytearray(n))
+    else:
+        raw_data = memoryview(receive_buffer.reserve(n))[:n]
+    received = 0
+    while received < n:
+        packet_size = sock.recv_into(raw_data[received:], n - received)
+        if not packet_size:
             return None
-        raw_data += packet
+        received += packet_size
     return raw_data
 
-def receive_message(sock: socket.socket) -> str:
-    raw_msg_len = recv_all(sock, HEADER_SIZE)
-    if not raw_msg_len:
-        return ""
-    msg_len = struct.unpack("!I", raw_msg_len)[0]
-    payload = recv_all(sock, msg_len)
-    if not payload:
-        return ""
-    data = payload.decode()
+def receive_packet(sock: socket.socket, receive_buffer: ReceiveBuffer | None = None) -> memoryview | None:
+    raw_packet_len = recv_all(sock, HEADER_SIZE, receive_buffer)
+    if not raw_packet_len:
+        return None
+    packet_len = struct.unpack("!I", raw_packet_len)[0]
+    if packet_len == 0:
+        return memoryview(b"")
+    return recv_all(sock, packet_len, receive_buffer)
+
+def frame_packet(payload: bytes) -> bytes:
+    return struct.pack("!I", len(payload)) + payload
+
+def send_packet(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(frame_packet(payload))
+
+async def async_recv_all(reader: asyncio.StreamReader, n: int) -> bytes | None:
+    try:
+        return await reader.readexactly(n)
+    except asyncio.IncompleteReadError:
+        return None
 
-    return data
+async def async_receive_packet(reader: asyncio.StreamReader) -> bytes | None:
+    raw_packet_len = await async_recv_all(reader, HEADER_SIZE)
+    if not raw_packet_len:
+        return None
+    packet_len = struct.unpack("!I", raw_packet_len)[0]
+    if packet_len == 0:
+        return b""
+    return await async_recv_all(reader, packet_len)
 
-def send_message(sock: socket.socket, message: str) -> None:
-    sock.sendall(struct.pack("!I", len(message)) + message.encode())
\ No newline at end of file
+async def async_send_packet(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    writer.write(frame_packet(payload))
+    await writer.drain()
@@ -0,0 +1,49 @@
+import os
+import pygame
+
+
+# Sound effects decoded once by load_sounds, keyed by file name without the extension
+sounds = {}
+
+# Mixer channels kept back for the effects, so playing one never has to wait
+# for or steal a channel in the middle of a frame
+RESERVED_CHANNELS = 4
+channels = []
+next_channel = 0
+
+
+def load_sounds(directory: str, names: list[str]) -> None:
+    # Needs the mixer to be initialized. Without an audio device the bank
+    # stays empty and play_sound does nothing.
+    if sounds:
+        return
+    if not pygame.mixer.get_init():
+        return
+
+    for name in names:
+        sounds[name] = pygame.mixer.Sound(os.path.join(directory, f"{name}.wav"))
+
+    if pygame.mixer.get_num_channels() < RESERVED_CHANNELS:
+        pygame.mixer.set_num_channels(RESERVED_CHANNELS)
+    pygame.mixer.set_reserved(RESERVED_CHANNELS)
+    for channel_id in range(0, RESERVED_CHANNELS, 1):
+        channels.append(pygame.mixer.Channel(channel_id))
+
+
+def play_sound(name: str) -> None:
+    # Starts the effect and returns straight away. Uses an idle reserved channel,
+    # and if all of them are busy cuts one off, taking turns between them.
+    global next_channel
+
+    sound = sounds.get(name)
+    if sound is None:
+        return
+
+    for i in range(0, len(channels), 1):
+        channel = channels[(next_channel + i) % len(channels)]
+        if not channel.get_busy():
+            break
+    else:
+        channel = channels[next_channel]
+    next_channel = (channels.index(channel) + 1) % len(channels)
+    channel.play(sound)
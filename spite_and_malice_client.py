@@ -1,15 +1,25 @@
 import re
 import socket
 import threading
+import queue
+import selectors
+import time
 import tomllib
 import os
 import sys
 import platform
 import pygame
 import pygame_gui
-from card import CardPosition, receive_cards
-from socket_utils import send_message, receive_message
+from card import (Card, CardPosition, card_backs, card_back_colors, resolve_card_back_color, load_card_backs, load_card_faces,
+                  decode_cards, card_from_identity)
+from engine import can_build, clear_completed_build_piles
+from socket_utils import ReceiveBuffer, receive_packet
+from protocol import (PROTOCOL_VERSION, ProtocolError, Opcode, Event, Pile, JoinStatus, RematchDecision, GameResult,
+                      REPLY_FORMATS, EVENT_FORMATS, send_request, receive_reply, decode_message, is_event)
+from collections import deque
 from path_utils import get_path
+from renderer import DirtyRectRenderer, PileView, get_font, render_text
+from sounds import load_sounds, play_sound
 from enum import Enum
 from pathlib import Path
 
@@ -29,7 +39,8 @@ class SetupErrorStatus(Enum):
     COULD_NOT_CONNECT_TO_SERVER = 1,
     GAME_LOBBY_FULL = 2,
     CARD_DATA_RECEIVE_ERROR = 3,
-    OTHER_PLAYER_DISCONNECTED = 4
+    OTHER_PLAYER_DISCONNECTED = 4,
+    PROTOCOL_VERSION_MISMATCH = 5
 
 class RematchStatus(Enum):
     UNSET = 0,
@@ -45,23 +56,40 @@ class RematchErrorStatus(Enum):
 class NetworkHandlerStatus(Enum):
     UNSET = 0,
     RUNNING = 1,
-    ERROR = 2
+    STOPPING = 2,
+    ERROR = 3
 
 class NetworkHandlerErrorStatus(Enum):
     UNSET = 0,
     OTHER_PLAYER_DISCONNECTED = 1
-    INVALID_PAYOFF_PILE1_LENGTH = 2,
-    INVALID_PAYOFF_PILE2_LENGTH = 3,
-    INVALID_DRAW_PILE_LENGTH = 4,
-    INVALID_OPPONENT_HAND_LENGTH = 5,
-    INVALID_GAME_RESULT_RESPONSE = 6,
-    INVALID_GAME_WINNER = 7
+    INVALID_GAME_WINNER = 2,
+    PROTOCOL_ERROR = 3
 
 
 class ClientError(Exception):
     pass
 
 
+def receive_card_reply(server_socket: socket.socket, opcode: Opcode) -> list[Card]:
+    return decode_cards(receive_reply(server_socket, opcode)[1])
+
+
+def receive_game_reply(expected_opcode: Opcode) -> tuple[tuple[int, ...], bytes]:
+    # While a game is running the networking thread is the only reader of the
+    # socket and hands replies to the main thread through the reply queue
+    reply = reply_queue.get()
+    if reply is None:
+        raise ProtocolError("Connection to the server was lost")
+    opcode, fields, tail = reply
+    if opcode != expected_opcode:
+        raise ProtocolError(f"Expected a {expected_opcode.name} reply but received {opcode.name}")
+    return fields, tail
+
+
+def receive_game_card_reply(expected_opcode: Opcode) -> list[Card]:
+    return decode_cards(receive_game_reply(expected_opcode)[1])
+
+
 VERSION = "1.0.1"
 
 DARK_GREEN = (0, 100, 0)
@@ -74,8 +102,24 @@ WINDOW_HEIGHT = 950
 
 FPS = 60
 
+# Largest pile_fan_offset the config file may set, so a fanned pile stays clear of the pile above it
+PILE_FAN_MAX_OFFSET = 15
+# Most cards under the top card whose edges are shown
+PILE_FAN_DEPTH = 4
+
+# Window events after which the display contents can't be trusted and the game screen is repainted in full
+DISPLAY_LOST_EVENTS = (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE, pygame.WINDOWRESTORED, pygame.WINDOWRESIZED,
+                       pygame.WINDOWSIZECHANGED, pygame.VIDEORESIZE)
+
+# Seconds of silence before the networking thread checks on the server, and
+# seconds without hearing anything back before it gives up on the connection
+HEARTBEAT_INTERVAL = 5
+HEARTBEAT_TIMEOUT = 15
+
 host = ""
 port = 0
+# Games on the server are kept apart by table id, both players must pick the same table
+table = 0
 
 player_number = 0
 player_name = ""
@@ -84,8 +128,10 @@ opponent_player_name = ""
 payoff_pile1_top_card = None
 payoff_pile2_top_card = None
 
-network_timer = 20
-game_in_progress = False
+# Opponent moves and turn changes pushed by the server, applied in order by the main thread
+game_events = deque()
+# Replies to requests the main thread sends while the networking thread owns the socket
+reply_queue = queue.Queue()
 
 payoff_pile1_remaining_cards = 0
 payoff_pile2_remaining_cards = 0
@@ -95,11 +141,13 @@ opponents_hand_size = 0
 
 game_result_text = None
 
-# For syncing network traffic between main thread and network thread
+# For syncing requests sent by the main thread and the network thread
 network_traffic_lock = threading.Lock()
 
 sound_option = "On"
 card_back_color_option = "Red"
+# Pixels the edges of the cards under a pile's top card peek out above it, 0 shows only the top card
+pile_fan_offset = 0
 
 initial_setup_status = SetupStatus.UNSET
 initial_setup_error_status = SetupErrorStatus.UNSET
@@ -112,7 +160,7 @@ network_handler_error_status = NetworkHandlerErrorStatus.UNSET
 
 
 def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
-    global player_number, player_name, host, port, sound_option, card_back_color_option, VERSION
+    global player_number, player_name, host, port, table, sound_option, card_back_color_option, pile_fan_offset, VERSION
 
     getting_user_input = True
     check_user_input = False
@@ -141,12 +189,15 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
     server_port_entry_line = pygame_gui.elements.UITextEntryLine(
         relative_rect=pygame.Rect(425, 475, 125, 50), manager=manager)
     server_port_entry_line.set_text_length_limit(5)
+    table_entry_line = pygame_gui.elements.UITextEntryLine(
+        relative_rect=pygame.Rect(655, 475, 85, 50), manager=manager)
+    table_entry_line.set_text_length_limit(5)
+    table_entry_line.set_text("0")
     ok_button = pygame_gui.elements.UIButton(
         relative_rect=pygame.Rect(WINDOW_WIDTH // 2 - 50, 850, 100, 50), text="OK", manager=manager)
     sound_option_choices = ["On", "Off"]
     sound_starting_option = ""
-    card_back_color_option_choices = ["Red", "Black", "Blue", "Green",
-                                      "Orange", "Purple"]
+    card_back_color_option_choices = card_back_colors()
     card_back_color_starting_option = ""
 
     if config_file_path.exists():
@@ -159,8 +210,13 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
             name_entry_line.set_text(data["name"])
             server_ip_entry_line.set_text(data["server_ip"])
             server_port_entry_line.set_text(str(data["server_port"]))
+            if "table" in data and 0 <= data["table"] <= 65535:
+                table_entry_line.set_text(str(data["table"]))
+            # Only settable in the config file, kept when the file is re-written
+            if "pile_fan_offset" in data and 0 <= data["pile_fan_offset"] <= PILE_FAN_MAX_OFFSET:
+                pile_fan_offset = data["pile_fan_offset"]
             sound_starting_option = data["sound"]
-            card_back_color_starting_option = data["card_back_color"]
+            card_back_color_starting_option = resolve_card_back_color(data["card_back_color"])
 
     if sound_starting_option:
         sound_option_dropdown = pygame_gui.elements.UIDropDownMenu(
@@ -187,6 +243,7 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
     name_input_error = False
     server_ip_input_error = False
     server_port_input_error = False
+    table_input_error = False
     user_quit_game = False
 
     clock = pygame.time.Clock()
@@ -245,18 +302,28 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
                 verified_server_port = False
                 server_port_input_error = True
 
-            if verified_name and verified_server_ip and verified_server_port:
+            if table_entry_line.get_text().isdigit() and int(table_entry_line.get_text()) <= 65535:
+                verified_table = True
+                table_input_error = False
+            else:
+                verified_table = False
+                table_input_error = True
+
+            if verified_name and verified_server_ip and verified_server_port and verified_table:
                 if not unknown_os:
                     config_file_path.parent.mkdir(parents=True, exist_ok=True)
                     with open(config_file_path, "w") as config_file:
                         config_file.write(f"name = \"{name_entry_line.get_text()}\"\n")
                         config_file.write(f"server_ip = \"{server_ip_entry_line.get_text()}\"\n")
                         config_file.write(f"server_port = {server_port_entry_line.get_text()}\n")
+                        config_file.write(f"table = {int(table_entry_line.get_text())}\n")
                         config_file.write(f"sound = \"{sound_option_dropdown.selected_option[0]}\"\n")
                         config_file.write(f"card_back_color = \"{card_back_color_option_dropdown.selected_option[0]}\"\n")
+                        config_file.write(f"pile_fan_offset = {pile_fan_offset}\n")
                 player_name = name_entry_line.get_text()
                 host = server_ip_entry_line.get_text()
                 port = int(server_port_entry_line.get_text())
+                table = int(table_entry_line.get_text())
                 sound_option = sound_option_dropdown.selected_option[0]
                 card_back_color_option = card_back_color_option_dropdown.selected_option[0]
                 getting_user_input = False
@@ -265,14 +332,14 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
 
         display_surface.fill(DARK_GREEN)
 
-        game_title_surface = pygame.font.SysFont("Arial", 60).render(
+        game_title_surface = render_text(get_font("Arial", 60),
             "Spite and Malice", True, WHITE)
         game_title_rect = game_title_surface.get_rect()
         game_title_rect.centerx = WINDOW_WIDTH // 2
         game_title_rect.centery = 100
         display_surface.blit(game_title_surface, game_title_rect)
 
-        game_version_surface = pygame.font.SysFont("Arial", 32).render(
+        game_version_surface = render_text(get_font("Arial", 32),
             f"Client - Version {VERSION}", True, WHITE)
         game_version_rect = game_version_surface.get_rect()
         game_version_rect.centerx = WINDOW_WIDTH // 2
@@ -280,11 +347,9 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
         display_surface.blit(game_version_surface, game_version_rect)
 
         if name_input_error:
-            name_label_surface = (pygame.font.SysFont("Arial", 32,italic=True)
-                                  .render("Player Name:", True, RED))
+            name_label_surface = render_text(get_font("Arial", 32, italic=True), "Player Name:", True, RED)
         else:
-            name_label_surface = (pygame.font.SysFont("Arial", 32)
-                                  .render("Player Name:", True, WHITE))
+            name_label_surface = render_text(get_font("Arial", 32), "Player Name:", True, WHITE)
 
         name_label_rect = name_label_surface.get_rect()
         name_label_rect.x = 250
@@ -293,19 +358,16 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
 
         pygame.draw.rect(display_surface, BLACK, (175, 325, 585, 235), 4)
 
-        connection_label_surface = (pygame.font.SysFont("Arial", 32, bold=True)
-                                    .render("Connection Info", True, WHITE))
+        connection_label_surface = render_text(get_font("Arial", 32, bold=True), "Connection Info", True, WHITE)
         connection_label_rect = connection_label_surface.get_rect()
         connection_label_rect.x = WINDOW_WIDTH // 2 - 125
         connection_label_rect.y = 350
         display_surface.blit(connection_label_surface, connection_label_rect)
 
         if server_ip_input_error:
-            host_label_surface = (pygame.font.SysFont("Arial", 32, italic=True)
-                                  .render("Server IP:", True, RED))
+            host_label_surface = render_text(get_font("Arial", 32, italic=True), "Server IP:", True, RED)
         else:
-            host_label_surface = (pygame.font.SysFont("Arial", 32)
-                                  .render("Server IP:", True, WHITE))
+            host_label_surface = render_text(get_font("Arial", 32), "Server IP:", True, WHITE)
 
         host_label_rect = name_label_surface.get_rect()
         host_label_rect.x = 275
@@ -313,36 +375,41 @@ def show_title_screen_and_get_config(display_surface: pygame.Surface) -> bool:
         display_surface.blit(host_label_surface, host_label_rect)
 
         if server_port_input_error:
-            port_label_surface = (pygame.font.SysFont("Arial", 32, italic=True)
-                                  .render("Server Port:", True, RED))
+            port_label_surface = render_text(get_font("Arial", 32, italic=True), "Server Port:", True, RED)
         else:
-            port_label_surface = (pygame.font.SysFont("Arial", 32)
-                                  .render("Server Port:", True, WHITE))
+            port_label_surface = render_text(get_font("Arial", 32), "Server Port:", True, WHITE)
 
         port_label_rect = name_label_surface.get_rect()
         port_label_rect.x = 245
         port_label_rect.y = 480
         display_surface.blit(port_label_surface, port_label_rect)
 
+        if table_input_error:
+            table_label_surface = render_text(get_font("Arial", 32, italic=True), "Table:", True, RED)
+        else:
+            table_label_surface = render_text(get_font("Arial", 32), "Table:", True, WHITE)
+
+        table_label_rect = table_label_surface.get_rect()
+        table_label_rect.x = 565
+        table_label_rect.y = 480
+        display_surface.blit(table_label_surface, table_label_rect)
+
         pygame.draw.rect(display_surface, BLACK, (225, 585, 485, 230), 4)
 
-        options_label_surface = (pygame.font.SysFont("Arial", 32, bold=True)
-                                 .render("Game Options", True, WHITE))
+        options_label_surface = render_text(get_font("Arial", 32, bold=True), "Game Options", True, WHITE)
 
         options_label_rect = options_label_surface.get_rect()
         options_label_rect.centerx = WINDOW_WIDTH // 2
         options_label_rect.centery = 625
         display_surface.blit(options_label_surface, options_label_rect)
 
-        sound_label_text = (pygame.font.SysFont("Arial", 32)
-                            .render("Sound:",True, WHITE))
+        sound_label_text = render_text(get_font("Arial", 32), "Sound:",True, WHITE)
         sound_label_rect = sound_label_text.get_rect()
         sound_label_rect.x = 355
         sound_label_rect.y = 670
         display_surface.blit(sound_label_text, sound_label_rect)
 
-        card_back_color_text = (pygame.font.SysFont("Arial", 32)
-                                .render("Card Back Color:", True, WHITE))
+        card_back_color_text = render_text(get_font("Arial", 32), "Card Back Color:", True, WHITE)
         card_back_color_rect = card_back_color_text.get_rect()
         card_back_color_rect.x = 290
         card_back_color_rect.y = 745
@@ -372,16 +439,20 @@ def perform_initial_setup(server_socket: socket.socket):
         return
 
     # Receive player number
-    send_message(server_socket, f"Player ready! Name: {player_name}")
-    data = receive_message(server_socket)
+    send_request(server_socket, Opcode.PLAYER_READY, PROTOCOL_VERSION, table, tail=player_name.encode())
+    join_status, assigned_player = receive_reply(server_socket, Opcode.PLAYER_READY)[0]
 
-    if "You are player" in data and data[-1].isdigit():
-        player_number = int(data[-1])
+    if join_status == JoinStatus.JOINED:
+        player_number = assigned_player
         initial_setup_status = SetupStatus.PLAYER_ASSIGNED
-    elif "Game lobby is full":
+    elif join_status == JoinStatus.LOBBY_FULL:
         initial_setup_status = SetupStatus.ERROR
         initial_setup_error_status = SetupErrorStatus.GAME_LOBBY_FULL
         return
+    else:
+        initial_setup_status = SetupStatus.ERROR
+        initial_setup_error_status = SetupErrorStatus.PROTOCOL_VERSION_MISMATCH
+        return
 
     if player_number == 1:
         opponent_player = 2
@@ -391,34 +462,34 @@ def perform_initial_setup(server_socket: socket.socket):
     if player_number == 1:
 
         # Receive other player status message
-        send_message(server_socket, "Has player 2 joined?")
-        data = receive_message(server_socket)
+        send_request(server_socket, Opcode.HAS_PLAYER2_JOINED)
+        player2_joined = receive_reply(server_socket, Opcode.HAS_PLAYER2_JOINED)[0][0]
 
-        if data == "Waiting for player 2":
+        if not player2_joined:
             initial_setup_status = SetupStatus.WAITING_FOR_OTHER_PLAYER
 
             # Wait for player 2
             while True:
-                send_message(server_socket, "Has player 2 joined?")
-                data = receive_message(server_socket)
-                if data == "Player 2 has joined":
+                send_request(server_socket, Opcode.HAS_PLAYER2_JOINED)
+                player2_joined = receive_reply(server_socket, Opcode.HAS_PLAYER2_JOINED)[0][0]
+                if player2_joined:
                     break
                 else:
                     pygame.time.wait(2000)
 
-    send_message(server_socket, f"What is player {opponent_player}'s name?")
-    opponent_player_name = receive_message(server_socket)
+    send_request(server_socket, Opcode.GET_PLAYER_NAME, opponent_player)
+    opponent_player_name = str(receive_reply(server_socket, Opcode.GET_PLAYER_NAME)[1], "utf-8")
 
     if not opponent_player_name:
         raise ClientError("Received empty opponent player name from server")
 
     initial_setup_status = SetupStatus.RECEIVING_CARD_DATA
 
-    send_message(server_socket, "Create new deck and payoff piles")
+    send_request(server_socket, Opcode.CREATE_DECK)
 
-    send_message(server_socket, f"Send the top card of player {player_number}'s payoff pile")
+    send_request(server_socket, Opcode.GET_PAYOFF_PILE_TOP, player_number)
 
-    data = receive_cards(server_socket, 1)
+    data = receive_card_reply(server_socket, Opcode.GET_PAYOFF_PILE_TOP)
 
     if not data:
         initial_setup_status = SetupStatus.ERROR
@@ -430,9 +501,9 @@ def perform_initial_setup(server_socket: socket.socket):
     elif player_number == 2:
         payoff_pile2_top_card = data[0]
 
-    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
+    send_request(server_socket, Opcode.GET_PAYOFF_PILE_TOP, opponent_player)
 
-    data = receive_cards(server_socket, 1)
+    data = receive_card_reply(server_socket, Opcode.GET_PAYOFF_PILE_TOP)
 
     if not data:
         initial_setup_status = SetupStatus.ERROR
@@ -445,10 +516,10 @@ def perform_initial_setup(server_socket: socket.socket):
         payoff_pile2_top_card = data[0]
 
     initial_setup_status = SetupStatus.OTHER_PLAYER_STATUS_CHECK
-    send_message(server_socket, "Is the other player still connected?")
-    data = receive_message(server_socket)
+    send_request(server_socket, Opcode.IS_OTHER_PLAYER_CONNECTED)
+    other_player_connected = receive_reply(server_socket, Opcode.IS_OTHER_PLAYER_CONNECTED)[0][0]
 
-    if data == "No":
+    if not other_player_connected:
         initial_setup_status = SetupStatus.ERROR
         initial_setup_error_status = SetupErrorStatus.OTHER_PLAYER_DISCONNECTED
         return
@@ -464,14 +535,14 @@ def perform_rematch_setup(server_socket: socket.socket):
 
     rematch_setup_status = RematchStatus.IN_PROGRESS
 
-    send_message(server_socket, "Set up a new game")
-    send_message(server_socket, "Create new deck and payoff piles")
+    send_request(server_socket, Opcode.SET_UP_NEW_GAME)
+    send_request(server_socket, Opcode.CREATE_DECK)
 
     rematch_setup_status = RematchStatus.RECEIVING_CARD_DATA
 
-    send_message(server_socket, f"Send the top card of player {player_number}'s payoff pile")
+    send_request(server_socket, Opcode.GET_PAYOFF_PILE_TOP, player_number)
 
-    data = receive_cards(server_socket, 1)
+    data = receive_card_reply(server_socket, Opcode.GET_PAYOFF_PILE_TOP)
 
     if not data:
         rematch_setup_status = SetupStatus.ERROR
@@ -483,9 +554,9 @@ def perform_rematch_setup(server_socket: socket.socket):
     elif player_number == 2:
         payoff_pile2_top_card = data[0]
 
-    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
+    send_request(server_socket, Opcode.GET_PAYOFF_PILE_TOP, opponent_player)
 
-    data = receive_cards(server_socket, 1)
+    data = receive_card_reply(server_socket, Opcode.GET_PAYOFF_PILE_TOP)
 
     if not data:
         rematch_setup_status = SetupStatus.ERROR
@@ -503,104 +574,129 @@ def perform_rematch_setup(server_socket: socket.socket):
 
 
 def game_networking_handler(server_socket: socket.socket):
-    global network_timer, game_in_progress, network_handler_status, network_handler_error_status
+    global network_handler_status, network_handler_error_status
     global payoff_pile1_remaining_cards, payoff_pile2_remaining_cards, draw_pile_remaining_cards
-    global opponents_hand_size, game_result_text, network_traffic_lock
-
-    network_handler_status = NetworkHandlerStatus.RUNNING
-
-    while game_in_progress:
-        if network_timer == 0:
+    global opponents_hand_size, game_result_text
 
-            network_traffic_lock.acquire()
-            send_message(server_socket, "Is the other player still connected?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+    receive_buffer = ReceiveBuffer()
 
-            if data == "No":
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.OTHER_PLAYER_DISCONNECTED
+    # Sleep in the selector until the server sends something or a heartbeat is due
+    selector = selectors.DefaultSelector()
+    selector.register(server_socket, selectors.EVENT_READ)
+    last_received = time.monotonic()
+    next_heartbeat = last_received + HEARTBEAT_INTERVAL
 
-            network_traffic_lock.acquire()
-            send_message(server_socket,"How many cards are left in player 1's payoff pile?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
-
-            if not data.isdigit():
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.INVALID_PAYOFF_PILE1_LENGTH
-
-            payoff_pile1_remaining_cards = int(data)
-
-            network_traffic_lock.acquire()
-            send_message(server_socket,
-                         "How many cards are left in player 2's payoff pile?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+    try:
+        # Runs until the main thread unsubscribes or the connection breaks
+        while network_handler_status != NetworkHandlerStatus.ERROR:
+            if not selector.select(max(0.0, next_heartbeat - time.monotonic())):
+                now = time.monotonic()
+                if now - last_received > HEARTBEAT_TIMEOUT:
+                    raise ProtocolError("Server stopped responding")
+
+                # If the main thread is in the middle of a request its reply keeps the connection alive
+                if network_traffic_lock.acquire(blocking=False):
+                    try:
+                        if network_handler_status == NetworkHandlerStatus.RUNNING:
+                            send_request(server_socket, Opcode.IS_OTHER_PLAYER_CONNECTED)
+                    finally:
+                        network_traffic_lock.release()
 
-            if not data.isdigit():
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.INVALID_PAYOFF_PILE2_LENGTH
+                next_heartbeat = now + HEARTBEAT_INTERVAL
+                continue
 
-            payoff_pile2_remaining_cards = int(data)
+            payload = receive_packet(server_socket, receive_buffer)
+            if payload is None:
+                raise ProtocolError("Connection to the server was closed")
+            last_received = time.monotonic()
+            next_heartbeat = last_received + HEARTBEAT_INTERVAL
 
-            network_traffic_lock.acquire()
-            send_message(server_socket,"How many cards are left in the draw pile?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+            if not is_event(payload):
+                opcode, fields, tail = decode_message(REPLY_FORMATS, Opcode, payload)
+                if opcode == Opcode.UNSUBSCRIBE:
+                    break
+                if opcode == Opcode.IS_OTHER_PLAYER_CONNECTED:
+                    # Heartbeat reply, only the networking thread sends this request during a game
+                    if not fields[0]:
+                        network_handler_status = NetworkHandlerStatus.ERROR
+                        network_handler_error_status = NetworkHandlerErrorStatus.OTHER_PLAYER_DISCONNECTED
+                    continue
+                # The receive buffer is reused, so hand the main thread a copy of the tail
+                reply_queue.put((opcode, fields, bytes(tail)))
+                continue
+
+            event, fields, tail = decode_message(EVENT_FORMATS, Event, payload)
+
+            if event == Event.PILE_COUNTS:
+                payoff_pile1_remaining_cards, payoff_pile2_remaining_cards, draw_pile_remaining_cards = fields[:3]
+                if opponent_player == 1:
+                    opponents_hand_size = fields[3]
+                elif opponent_player == 2:
+                    opponents_hand_size = fields[4]
+
+            elif event == Event.DRAW_PILE_RESHUFFLED:
+                draw_pile_remaining_cards = fields[0]
+
+            elif event == Event.GAME_OVER:
+                game_result = fields[0]
 
-            if data.isdigit():
-                draw_pile_remaining_cards = int(data)
-            else:
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.INVALID_DRAW_PILE_LENGTH
+                # Win / lose / stalemate conditions
+                if player_number == 1 and game_result == GameResult.PLAYER1_WON or player_number == 2 and game_result == GameResult.PLAYER2_WON:
+                    game_result_text = render_text(get_font("Arial", 60), "YOU WIN!", True, WHITE)
+                elif player_number == 2 and game_result == GameResult.PLAYER1_WON or player_number == 1 and game_result == GameResult.PLAYER2_WON:
+                    game_result_text = render_text(get_font("Arial", 60), "Sorry, you lose!", True, WHITE)
+                elif game_result == GameResult.STALEMATE:
+                    game_result_text = render_text(get_font("Arial", 60), "STALEMATE!", True, WHITE)
+                else:
+                    network_handler_status = NetworkHandlerStatus.ERROR
+                    network_handler_error_status = NetworkHandlerErrorStatus.INVALID_GAME_WINNER
 
-            network_traffic_lock.acquire()
-            send_message(server_socket,f"How many cards are in player {opponent_player}'s hand?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+            elif event == Event.PLAYER_DISCONNECTED:
+                if fields[0] == opponent_player:
+                    network_handler_status = NetworkHandlerStatus.ERROR
+                    network_handler_error_status = NetworkHandlerErrorStatus.OTHER_PLAYER_DISCONNECTED
 
-            if data.isdigit():
-                opponents_hand_size = int(data)
             else:
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.INVALID_OPPONENT_HAND_LENGTH
-
-            network_traffic_lock.acquire()
-            send_message(server_socket,"Has the game result been determined?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+                # Card moves and turn changes change what the main thread draws and allows
+                game_events.append((event, fields, decode_cards(tail)))
+
+    except (ProtocolError, OSError):
+        network_handler_status = NetworkHandlerStatus.ERROR
+        network_handler_error_status = NetworkHandlerErrorStatus.PROTOCOL_ERROR
+    finally:
+        selector.close()
+
+    if network_handler_status == NetworkHandlerStatus.ERROR:
+        # Wake up the main thread if it is waiting on a reply that will never come
+        reply_queue.put(None)
+    else:
+        network_handler_status = NetworkHandlerStatus.UNSET
 
-            if data == "Yes":
+    return
 
-                network_traffic_lock.acquire()
-                send_message(server_socket, "Who won the game?")
-                data = receive_message(server_socket)
-                network_traffic_lock.release()
 
-                # Win / lose / stalemate conditions
-                if player_number == 1 and data == "Player 1" or player_number == 2 and data == "Player 2":
-                    game_result_text = pygame.font.SysFont("Arial", 60).render("YOU WIN!", True, WHITE)
-                elif player_number == 2 and data == "Player 1" or player_number == 1 and data == "Player 2":
-                    game_result_text = pygame.font.SysFont("Arial", 60).render("Sorry, you lose!", True, WHITE)
-                elif data == "Stalemate":
-                    game_result_text = pygame.font.SysFont("Arial", 60).render("STALEMATE!", True, WHITE)
-                else:
-                    network_handler_status = NetworkHandlerStatus.ERROR
-                    network_handler_error_status = NetworkHandlerErrorStatus.INVALID_GAME_WINNER
+def start_game_networking(server_socket: socket.socket) -> threading.Thread:
+    global network_handler_status
 
-            elif data != "No":
-                network_handler_status = NetworkHandlerStatus.ERROR
-                network_handler_error_status = NetworkHandlerErrorStatus.INVALID_GAME_RESULT_RESPONSE
+    game_events.clear()
+    network_handler_status = NetworkHandlerStatus.RUNNING
+    with network_traffic_lock:
+        send_request(server_socket, Opcode.SUBSCRIBE)
+    networking_thread = threading.Thread(target=game_networking_handler, args=(server_socket,), daemon=True)
+    networking_thread.start()
+    return networking_thread
 
-        if network_timer == 0:
-            network_timer = 20
-        else:
-            network_timer -= 1
 
-    network_handler_status = NetworkHandlerStatus.UNSET
+def stop_game_networking(server_socket: socket.socket, networking_thread: threading.Thread):
+    global network_handler_status
 
-    return
+    # The networking thread exits once it reads the reply, after which no more events arrive
+    with network_traffic_lock:
+        if networking_thread.is_alive() and network_handler_status == NetworkHandlerStatus.RUNNING:
+            # Stops heartbeats so nothing follows the unsubscribe reply
+            network_handler_status = NetworkHandlerStatus.STOPPING
+            send_request(server_socket, Opcode.UNSUBSCRIBE)
+    networking_thread.join()
 
 
 def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
@@ -608,7 +704,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
     global player_number, opponent_player, sound_option
     global payoff_pile1_top_card, payoff_pile2_top_card, rematch_setup_status, rematch_setup_error_status
     global payoff_pile1_remaining_cards, payoff_pile2_remaining_cards, draw_pile_remaining_cards
-    global opponents_hand_size, game_result_text, game_in_progress
+    global opponents_hand_size, game_result_text
     global network_handler_status, network_handler_error_status
     global network_traffic_lock
 
@@ -633,28 +729,25 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
     build_piles = [[], [], [], []]
     build_piles_rects = [None, None, None, None]
 
+    # Each pile is drawn from one cached surface, rebuilt only when its top cards change
+    discard_piles1_views = [PileView(pile_fan_offset, PILE_FAN_DEPTH) for _ in range(0, 4, 1)]
+    discard_piles2_views = [PileView(pile_fan_offset, PILE_FAN_DEPTH) for _ in range(0, 4, 1)]
+    build_piles_views = [PileView(pile_fan_offset, PILE_FAN_DEPTH) for _ in range(0, 4, 1)]
+
     current_hand = []
 
-    # Make sure card_back has a default value
-    card_back = pygame.image.load(get_path("assets/card_backs/card_back_red.png")).convert_alpha()
-
-    if card_back_color_option == "Black":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_black.png")).convert_alpha()
-    elif card_back_color_option == "Blue":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_blue.png")).convert_alpha()
-    elif card_back_color_option == "Green":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_green.png")).convert_alpha()
-    elif card_back_color_option == "Orange":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_orange.png")).convert_alpha()
-    elif card_back_color_option == "Purple":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_purple.png")).convert_alpha()
-    elif card_back_color_option == "Red":
-        card_back = pygame.image.load(get_path("assets/card_backs/card_back_red.png")).convert_alpha()
-
-    card_back = pygame.transform.scale(card_back, (100, 150))
+    # Loaded once per client
+    card_back = card_backs[resolve_card_back_color(card_back_color_option)]
     card_back_rect = card_back.get_rect()
 
-    font = pygame.font.SysFont("Arial", 30)
+    # Empty piles are shown as a white outline
+    empty_pile_outline = pygame.Surface((100, 150), pygame.SRCALPHA)
+    pygame.draw.rect(empty_pile_outline, WHITE, empty_pile_outline.get_rect(), 2)
+
+    font = get_font("Arial", 30)
+
+    # Only the parts of the table that changed since the last frame are redrawn and pushed to the display
+    renderer = DirtyRectRenderer(display_surface, DARK_GREEN)
 
     currently_dragging_card = False
     card_being_dragged = None
@@ -662,70 +755,121 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
     original_dragging_x = 0
     original_dragging_y = 0
 
-    screen_refresh_timer = 20
-
     running = True
 
     turn_switch = False
 
-    # Used to signal the networking thread that it should keep running
-    game_in_progress = True
-
-    # Start the networking thread
-    networking_thread = threading.Thread(target=game_networking_handler, args=(server_socket,), daemon=True)
-    networking_thread.start()
+    # Start the networking thread, it subscribes to game events from the server
+    networking_thread = start_game_networking(server_socket)
 
     while running:
 
+        # Cap the frame rate, nothing in the game loop needs to run faster
+        clock.tick(FPS)
+
         # Check the networking thread status
         if network_handler_status == NetworkHandlerStatus.ERROR:
-            # Signal the networking thread to stop
-            game_in_progress = False
             networking_thread.join()
             if network_handler_error_status == NetworkHandlerErrorStatus.OTHER_PLAYER_DISCONNECTED:
                 raise ClientError("Other player disconnected!")
-            elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_PAYOFF_PILE1_LENGTH:
-                raise ClientError("Invalid payoff pile 1 length received from server")
-            elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_PAYOFF_PILE2_LENGTH:
-                raise ClientError("Invalid payoff pile 2 length received from server")
-            elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_DRAW_PILE_LENGTH:
-                raise ClientError("Invalid draw pile length received from server")
-            elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_OPPONENT_HAND_LENGTH:
-                raise ClientError("Invalid opponent hand length received from server")
-            elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_GAME_RESULT_RESPONSE:
-                raise ClientError("Invalid game result response received from server")
             elif network_handler_error_status == NetworkHandlerErrorStatus.INVALID_GAME_WINNER:
                 raise ClientError("Invalid game winner received from server")
+            elif network_handler_error_status == NetworkHandlerErrorStatus.PROTOCOL_ERROR:
+                raise ClientError("Invalid data received from server")
 
-        if turn_switch or first_turn:
+        if turn_switch:
+            # Our turn just ended, the server confirms it with a turn changed event
+            current_turn = opponent_player
+            draggable_cards_set = False
+            turn_switch = False
 
-            pygame.time.wait(250)
-            network_traffic_lock.acquire()
-            send_message(server_socket, "Whose turn is it?")
-            data = receive_message(server_socket)
-            network_traffic_lock.release()
+        # Apply the turn changes and opponent moves pushed by the server in the order they happened
+        while game_events:
+            event_type, fields, cards = game_events.popleft()
 
-            if not data or not data[-1].isdigit():
-                raise ClientError("Could not receive current turn number from server")
+            if event_type == Event.TURN_CHANGED:
+                if fields[0] not in (1, 2):
+                    raise ClientError("Could not receive current turn number from server")
 
-            if data == "Player 1":
-                current_turn = 1
-            elif data == "Player 2":
-                current_turn = 2
+                current_turn = fields[0]
+                draggable_cards_set = False
 
-            draggable_cards_set = False
-            turn_switch = False
+            elif event_type == Event.CARD_MOVED:
+                moved_player, moved_from, moved_to, deck_index, card_index = fields
+
+                # Our own moves are already applied locally, apart from the payoff pile's newly flipped top card
+                if moved_player == player_number:
+                    if moved_from == Pile.PAYOFF_PILE:
+                        if cards:
+                            next_top_card = cards[0]
+                        else:
+                            next_top_card = None
+
+                        if player_number == 1:
+                            payoff_pile1_top_card = next_top_card
+                        elif player_number == 2:
+                            payoff_pile2_top_card = next_top_card
+                        draggable_cards_set = False
+                    continue
+
+                if opponent_player == 1:
+                    opponent_discard_piles = discard_piles1
+                else:
+                    opponent_discard_piles = discard_piles2
+
+                if moved_from == Pile.HAND:
+
+                    # The server sends the identity of the card that was moved
+                    received_card = card_from_identity(deck_index, card_index)
+
+                    if received_card is None:
+                        raise ClientError("Could not resolve card received from server")
+
+                    if Pile.DISCARD_PILE_0 <= moved_to <= Pile.DISCARD_PILE_3:
+                        opponent_discard_piles[moved_to - Pile.DISCARD_PILE_0].append(received_card)
+                    elif Pile.BUILD_PILE_0 <= moved_to <= Pile.BUILD_PILE_3:
+                        build_piles[moved_to - Pile.BUILD_PILE_0].append(received_card)
+
+                elif moved_from == Pile.PAYOFF_PILE:
+                    if not Pile.BUILD_PILE_0 <= moved_to <= Pile.BUILD_PILE_3:
+                        raise ClientError("Issue syncing card moves with the server")
+
+                    received_card = card_from_identity(deck_index, card_index)
+
+                    if received_card is None:
+                        raise ClientError("Could not resolve card received from server")
+
+                    # The event carries the payoff pile's newly flipped top card, if any
+                    if cards:
+                        next_top_card = cards[0]
+                    else:
+                        next_top_card = None
+
+                    build_piles[moved_to - Pile.BUILD_PILE_0].append(received_card)
+                    if opponent_player == 1:
+                        payoff_pile1_top_card = next_top_card
+                    elif opponent_player == 2:
+                        payoff_pile2_top_card = next_top_card
+
+                elif Pile.DISCARD_PILE_0 <= moved_from <= Pile.DISCARD_PILE_3:
+                    source_pile = opponent_discard_piles[moved_from - Pile.DISCARD_PILE_0]
+                    if (not Pile.BUILD_PILE_0 <= moved_to <= Pile.BUILD_PILE_3 or not source_pile or
+                            source_pile[-1].deck_index != deck_index or source_pile[-1].card_index != card_index):
+                        raise ClientError("Issue syncing card moves with the server")
+                    build_piles[moved_to - Pile.BUILD_PILE_0].append(source_pile.pop())
+
+                else:
+                    raise ClientError("Issue syncing card moves with the server")
 
         if current_turn == player_number:
             if not current_hand:
                 network_traffic_lock.acquire()
-                send_message(server_socket,f"Player {player_number} draws 5 cards")
-                current_hand = receive_cards(server_socket, 5)
+                send_request(server_socket, Opcode.DRAW_CARDS, player_number)
+                current_hand = receive_game_card_reply(Opcode.DRAW_CARDS)
                 network_traffic_lock.release()
 
                 if sound_option == "On":
-                    draw_cards_sound_effect = pygame.mixer.Sound(get_path("assets/dealing_cards.wav"))
-                    draw_cards_sound_effect.play()
+                    play_sound("dealing_cards")
 
             if not draggable_cards_set:
                 draggable_cards = []
@@ -760,418 +904,21 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                 draggable_cards = []
                 draggable_cards_set = True
 
-            if screen_refresh_timer == 0:
-                network_traffic_lock.acquire()
-                send_message(server_socket, f"What was player {opponent_player}'s last move?")
-                data = receive_message(server_socket)
-
-                if data != "Nothing":
-                    pattern = r"moved\b(.*)\bfrom"
-                    first_match = re.search(pattern, data)
-                    if first_match:
-                        card_name = first_match.group(1).strip()
-                    else:
-                        raise ClientError("Could not parse card name from server message")
-                    pattern = r"from\b(.*)\bto"
-                    first_match = re.search(pattern, data)
-                    if first_match:
-                        moved_from = first_match.group(1).strip()
-                    else:
-                        raise ClientError("Could not parse 'moved from' location from server message")
-                    pattern = r"to\b(.*)$"
-                    first_match = re.search(pattern, data)
-                    if first_match:
-                        moved_to = first_match.group(1).strip()
-                    else:
-                        raise ClientError("Could not parse 'moved to' location from server message")
-
-                    if moved_from == "hand":
-
-                        # Receive a card from the server
-                        received_card = receive_cards(server_socket, 1)[0]
-                        network_traffic_lock.release()
-
-                        if moved_to == "discard pile 0":
-                            if opponent_player == 1:
-                                discard_piles1[0].append(received_card)
-                            elif opponent_player == 2:
-                                discard_piles2[0].append(received_card)
-                            turn_switch = True
-                        elif moved_to == "discard pile 1":
-                            if opponent_player == 1:
-                                discard_piles1[1].append(received_card)
-                            elif opponent_player == 2:
-                                discard_piles2[1].append(received_card)
-                            turn_switch = True
-                        elif moved_to == "discard pile 2":
-                            if opponent_player == 1:
-                                discard_piles1[2].append(received_card)
-                            elif opponent_player == 2:
-                                discard_piles2[2].append(received_card)
-                            turn_switch = True
-                        elif moved_to == "discard pile 3":
-                            if opponent_player == 1:
-                                discard_piles1[3].append(received_card)
-                            elif opponent_player == 2:
-                                discard_piles2[3].append(received_card)
-                            turn_switch = True
-                        elif moved_to == "build pile 0":
-                            build_piles[0].append(received_card)
-                        elif moved_to == "build pile 1":
-                            build_piles[1].append(received_card)
-                        elif moved_to == "build pile 2":
-                            build_piles[2].append(received_card)
-                        elif moved_to == "build pile 3":
-                            build_piles[3].append(received_card)
-
-                    elif moved_from == "payoff pile":
-                        if moved_to == "build pile 0":
-                            if opponent_player == 1:
-                                build_piles[0].append(payoff_pile1_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile1_remaining_cards = int(data)
-
-                                if payoff_pile1_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile1_top_card = None
-
-                            elif opponent_player == 2:
-                                build_piles[0].append(payoff_pile2_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile2_remaining_cards = int(data)
-
-                                if payoff_pile2_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile2_top_card = None
-
-                        elif moved_to == "build pile 1":
-                            if opponent_player == 1:
-                                build_piles[1].append(payoff_pile1_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile1_remaining_cards = int(data)
-
-                                if payoff_pile1_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile1_top_card = None
-
-                            elif opponent_player == 2:
-                                build_piles[1].append(payoff_pile2_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile2_remaining_cards = int(data)
-
-                                if payoff_pile2_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile2_top_card = None
-
-                        elif moved_to == "build pile 2":
-                            if opponent_player == 1:
-                                build_piles[2].append(payoff_pile1_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile1_remaining_cards = int(data)
-
-                                if payoff_pile1_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile1_top_card = None
-
-                            elif opponent_player == 2:
-                                build_piles[2].append(payoff_pile2_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile2_remaining_cards = int(data)
-
-                                if payoff_pile2_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile2_top_card = None
-
-                        elif moved_to == "build pile 3":
-                            if opponent_player == 1:
-                                build_piles[3].append(payoff_pile1_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile1_remaining_cards = int(data)
-
-                                if payoff_pile1_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile1_top_card = None
-
-                            elif opponent_player == 2:
-                                build_piles[3].append(payoff_pile2_top_card)
-
-                                send_message(server_socket, f"How many cards are left in player {opponent_player}'s payoff pile?")
-                                data = receive_message(server_socket)
-
-                                if not data.isdigit():
-                                    raise ClientError("Invalid length of payoff pile received from server")
-
-                                payoff_pile2_remaining_cards = int(data)
-
-                                if payoff_pile2_remaining_cards > 0:
-                                    send_message(server_socket, f"Send the top card of player {opponent_player}'s payoff pile")
-                                    payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                else:
-                                    payoff_pile2_top_card = None
-
-                        network_traffic_lock.release()
-
-                    elif moved_from == "discard pile 0":
-                        network_traffic_lock.release()
-                        if moved_to == "build pile 0":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[0][-1].name:
-                                    build_piles[0].append(discard_piles1[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[0][-1].name:
-                                    build_piles[0].append(discard_piles2[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 1":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[0][-1].name:
-                                    build_piles[1].append(discard_piles1[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[0][-1].name:
-                                    build_piles[1].append(discard_piles2[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 2":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[0][-1].name:
-                                    build_piles[2].append(discard_piles1[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[0][-1].name:
-                                    build_piles[2].append(discard_piles2[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 3":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[0][-1].name:
-                                    build_piles[3].append(discard_piles1[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[0][-1].name:
-                                    build_piles[3].append(discard_piles2[0].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-
-                    elif moved_from == "discard pile 1":
-                        network_traffic_lock.release()
-                        if moved_to == "build pile 0":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[1][-1].name:
-                                    build_piles[0].append(discard_piles1[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[1][-1].name:
-                                    build_piles[0].append(discard_piles2[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 1":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[1][-1].name:
-                                    build_piles[1].append(discard_piles1[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[1][-1].name:
-                                    build_piles[1].append(discard_piles2[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 2":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[1][-1].name:
-                                    build_piles[2].append(discard_piles1[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[1][-1].name:
-                                    build_piles[2].append(discard_piles2[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 3":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[1][-1].name:
-                                    build_piles[3].append(discard_piles1[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[1][-1].name:
-                                    build_piles[3].append(discard_piles2[1].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-
-                    elif moved_from == "discard pile 2":
-                        network_traffic_lock.release()
-                        if moved_to == "build pile 0":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[2][-1].name:
-                                    build_piles[0].append(discard_piles1[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[2][-1].name:
-                                    build_piles[0].append(discard_piles2[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 1":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[2][-1].name:
-                                    build_piles[1].append(discard_piles1[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[2][-1].name:
-                                    build_piles[1].append(discard_piles2[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 2":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[2][-1].name:
-                                    build_piles[2].append(discard_piles1[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[2][-1].name:
-                                    build_piles[2].append(discard_piles2[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 3":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[2][-1].name:
-                                    build_piles[3].append(discard_piles1[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[2][-1].name:
-                                    build_piles[3].append(discard_piles2[2].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-
-                    elif moved_from == "discard pile 3":
-                        network_traffic_lock.release()
-                        if moved_to == "build pile 0":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[3][-1].name:
-                                    build_piles[0].append(discard_piles1[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[3][-1].name:
-                                    build_piles[0].append(discard_piles2[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 1":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[3][-1].name:
-                                    build_piles[1].append(discard_piles1[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[3][-1].name:
-                                    build_piles[1].append(discard_piles2[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 2":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[3][-1].name:
-                                    build_piles[2].append(discard_piles1[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[3][-1].name:
-                                    build_piles[2].append(discard_piles2[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                        elif moved_to == "build pile 3":
-                            if opponent_player == 1:
-                                if card_name == discard_piles1[3][-1].name:
-                                    build_piles[3].append(discard_piles1[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                            elif opponent_player == 2:
-                                if card_name == discard_piles2[3][-1].name:
-                                    build_piles[3].append(discard_piles2[3].pop())
-                                else:
-                                    raise ClientError("Issue syncing card moves with the server")
-                else:
-                    network_traffic_lock.release()
-
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 # Signal the networking thread to stop
-                game_in_progress = False
-                networking_thread.join()
+                stop_game_networking(server_socket, networking_thread)
                 running = False
 
+            if event.type in DISPLAY_LOST_EVENTS:
+                renderer.invalidate()
+
             if event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     if currently_dragging_card:
                         if card_being_dragged.rect.colliderect(build_piles_rects[0]):
-                            if ((build_piles[0] and card_being_dragged.rank == build_piles[0][-1].rank + 1) or
-                                ((not build_piles[0] and card_being_dragged.rank == 1) or card_being_dragged.rank == 13) or
-                                    card_being_dragged.rank == len(build_piles[0]) + 1):
+                            if can_build(card_being_dragged.rank, len(build_piles[0])):
 
                                 card_being_dragged.rect.x = build_piles_rects[0].x
                                 card_being_dragged.rect.y = build_piles_rects[0].y
@@ -1182,97 +929,71 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles1[0]:
                                         discard_piles1[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[1]:
                                         discard_piles1[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[2]:
                                         discard_piles1[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[3]:
                                         discard_piles1[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile1_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 0")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile1_remaining_cards = int(data)
-
-                                        if payoff_pile1_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile1_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile1_top_card = None
 
                                 elif player_number == 2:
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles2[0]:
                                         discard_piles2[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[1]:
                                         discard_piles2[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[2]:
                                         discard_piles2[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[3]:
                                         discard_piles2[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 0")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile2_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 0")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile2_remaining_cards = int(data)
-
-                                        if payoff_pile2_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile2_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile2_top_card = None
 
                                 build_piles[0].append(card_being_dragged)
 
@@ -1288,9 +1009,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                 card_being_dragged = None
 
                         elif card_being_dragged.rect.colliderect(build_piles_rects[1]):
-                            if ((build_piles[1] and card_being_dragged.rank == build_piles[1][-1].rank + 1) or
-                                ((not build_piles[1] and card_being_dragged.rank == 1) or card_being_dragged.rank == 13) or
-                                    card_being_dragged.rank == len(build_piles[1]) + 1):
+                            if can_build(card_being_dragged.rank, len(build_piles[1])):
 
                                 card_being_dragged.rect.x = build_piles_rects[1].x
                                 card_being_dragged.rect.y = build_piles_rects[1].y
@@ -1300,97 +1019,71 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles1[0]:
                                         discard_piles1[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[1]:
                                         discard_piles1[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[2]:
                                         discard_piles1[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[3]:
                                         discard_piles1[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile1_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 1")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile1_remaining_cards = int(data)
-
-                                        if payoff_pile1_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile1_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile1_top_card = None
 
                                 elif player_number == 2:
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles2[0]:
                                         discard_piles2[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[1]:
                                         discard_piles2[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[2]:
                                         discard_piles2[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[3]:
                                         discard_piles2[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 1")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile2_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 1")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile2_remaining_cards = int(data)
-
-                                        if payoff_pile2_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile2_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile2_top_card = None
 
                                 build_piles[1].append(card_being_dragged)
 
@@ -1407,9 +1100,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
 
 
                         elif card_being_dragged.rect.colliderect(build_piles_rects[2]):
-                            if ((build_piles[2] and card_being_dragged.rank == build_piles[2][-1].rank + 1) or
-                                ((not build_piles[2] and card_being_dragged.rank == 1) or card_being_dragged.rank == 13) or
-                                    card_being_dragged.rank == len(build_piles[2]) + 1):
+                            if can_build(card_being_dragged.rank, len(build_piles[2])):
 
                                 card_being_dragged.rect.x = build_piles_rects[2].x
                                 card_being_dragged.rect.y = build_piles_rects[2].y
@@ -1419,97 +1110,71 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles1[0]:
                                         discard_piles1[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[1]:
                                         discard_piles1[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[2]:
                                         discard_piles1[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[3]:
                                         discard_piles1[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile1_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 2")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile1_remaining_cards = int(data)
-
-                                        if payoff_pile1_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile1_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile1_top_card = None
 
                                 elif player_number == 2:
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles2[0]:
                                         discard_piles2[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[1]:
                                         discard_piles2[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[2]:
                                         discard_piles2[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[3]:
                                         discard_piles2[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 2")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile2_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 2")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile2_remaining_cards = int(data)
-
-                                        if payoff_pile2_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile2_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile2_top_card = None
 
                                 build_piles[2].append(card_being_dragged)
 
@@ -1525,9 +1190,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                 card_being_dragged = None
 
                         elif card_being_dragged.rect.colliderect(build_piles_rects[3]):
-                            if ((build_piles[3] and card_being_dragged.rank == build_piles[3][-1].rank + 1) or
-                                ((not build_piles[3] and card_being_dragged.rank == 1) or card_being_dragged.rank == 13) or
-                                    card_being_dragged.rank == len(build_piles[3]) + 1):
+                            if can_build(card_being_dragged.rank, len(build_piles[3])):
 
                                 card_being_dragged.rect.x = build_piles_rects[3].x
                                 card_being_dragged.rect.y = build_piles_rects[3].y
@@ -1537,97 +1200,71 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles1[0]:
                                         discard_piles1[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[1]:
                                         discard_piles1[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[2]:
                                         discard_piles1[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles1[3]:
                                         discard_piles1[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile1_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 3")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile1_remaining_cards = int(data)
-
-                                        if payoff_pile1_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile1_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile1_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile1_top_card = None
 
                                 elif player_number == 2:
                                     if card_being_dragged in current_hand:
                                         current_hand.remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                         card_being_dragged.position = CardPosition.FACE_UP
                                     elif card_being_dragged in discard_piles2[0]:
                                         discard_piles2[0].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 0 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_0, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[1]:
                                         discard_piles2[1].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 1 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_1, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[2]:
                                         discard_piles2[2].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 2 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_2, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged in discard_piles2[3]:
                                         discard_piles2[3].remove(card_being_dragged)
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their discard pile 3 to build pile 3")
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.DISCARD_PILE_3, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
                                     elif card_being_dragged == payoff_pile2_top_card:
                                         network_traffic_lock.acquire()
-                                        send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their payoff pile to build pile 3")
-
-                                        send_message(server_socket,f"How many cards are left in player {player_number}'s payoff pile?")
-                                        data = receive_message(server_socket)
+                                        send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.PAYOFF_PILE, Pile.BUILD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                         network_traffic_lock.release()
 
-                                        if not data.isdigit():
-                                            raise ClientError("Invalid length of payoff pile received from server")
-
-                                        payoff_pile2_remaining_cards = int(data)
-
-                                        if payoff_pile2_remaining_cards > 0:
-                                            network_traffic_lock.acquire()
-                                            send_message(server_socket,f"Send the top card of player {player_number}'s payoff pile")
-                                            payoff_pile2_top_card = receive_cards(server_socket, 1)[0]
-                                            network_traffic_lock.release()
-                                        else:
-                                            payoff_pile2_top_card = None
+                                        # The server's card moved event carries the newly flipped top card
+                                        payoff_pile2_top_card = None
 
                                 build_piles[3].append(card_being_dragged)
 
@@ -1650,14 +1287,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 0")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles1[0].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1681,14 +1318,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 1")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles1[1].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1712,14 +1349,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 2")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles1[2].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1743,14 +1380,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 3")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles1[3].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1774,14 +1411,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 0")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_0, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles2[0].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1806,14 +1443,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 1")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_1, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles2[1].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1837,14 +1474,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 2")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_2, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles2[2].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1868,14 +1505,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     draggable_cards.remove(card_being_dragged)
                                     current_hand.remove(card_being_dragged)
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} moved {card_being_dragged.name} from their hand to discard pile 3")
+                                    send_request(server_socket, Opcode.MOVE_CARD, player_number, Pile.HAND, Pile.DISCARD_PILE_3, card_being_dragged.deck_index, card_being_dragged.card_index)
                                     network_traffic_lock.release()
                                     card_being_dragged.position = CardPosition.FACE_UP
                                     discard_piles2[3].append(card_being_dragged)
                                     currently_dragging_card = False
                                     card_being_dragged = None
                                     network_traffic_lock.acquire()
-                                    send_message(server_socket, f"Player {player_number} ended their turn")
+                                    send_request(server_socket, Opcode.END_TURN, player_number)
                                     network_traffic_lock.release()
                                     turn_switch = True
 
@@ -1913,192 +1550,156 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                 card_being_dragged.rect.centerx = mouse_x
                 card_being_dragged.rect.centery = mouse_y
 
-        display_surface.fill(DARK_GREEN)
+        renderer.begin_frame()
         for i in range(0, len(current_hand), 1):
             if current_hand[i] != card_being_dragged:
                 current_hand[i].rect.bottom = WINDOW_HEIGHT
                 current_hand[i].rect.left = 190 + i * 110
-                display_surface.blit(current_hand[i].surface, current_hand[i].rect)
+                renderer.blit(current_hand[i].surface, current_hand[i].rect)
 
 
         if player_number == 1:
             if payoff_pile1_remaining_cards > 1:
                 card_back_rect.left = 25
                 card_back_rect.bottom = WINDOW_HEIGHT
-                display_surface.blit(card_back, card_back_rect)
-                if payoff_pile1_top_card != card_being_dragged:
-                    payoff_pile1_top_card.rect.left = 25
-                    payoff_pile1_top_card.rect.bottom = WINDOW_HEIGHT
-                    display_surface.blit(payoff_pile1_top_card.surface, payoff_pile1_top_card.rect)
-            else:
-                if payoff_pile1_top_card != card_being_dragged:
-                    payoff_pile1_top_card.rect.left = 25
-                    payoff_pile1_top_card.rect.bottom = WINDOW_HEIGHT
-                    display_surface.blit(payoff_pile1_top_card.surface, payoff_pile1_top_card.rect)
+                renderer.blit(card_back, card_back_rect)
+            # The top card is unknown until the server's card moved event arrives
+            if payoff_pile1_top_card is not None and payoff_pile1_top_card != card_being_dragged:
+                payoff_pile1_top_card.rect.left = 25
+                payoff_pile1_top_card.rect.bottom = WINDOW_HEIGHT
+                renderer.blit(payoff_pile1_top_card.surface, payoff_pile1_top_card.rect)
         elif player_number == 2:
             if payoff_pile2_remaining_cards > 1:
                 card_back_rect.left = 25
                 card_back_rect.bottom = WINDOW_HEIGHT
-                display_surface.blit(card_back, card_back_rect)
-                if payoff_pile2_top_card != card_being_dragged:
-                    payoff_pile2_top_card.rect.left = 25
-                    payoff_pile2_top_card.rect.bottom = WINDOW_HEIGHT
-                    display_surface.blit(payoff_pile2_top_card.surface, payoff_pile2_top_card.rect)
-            else:
-                if payoff_pile2_top_card != card_being_dragged:
-                    payoff_pile2_top_card.rect.left = 25
-                    payoff_pile2_top_card.rect.bottom = WINDOW_HEIGHT
-                    display_surface.blit(payoff_pile2_top_card.surface, payoff_pile2_top_card.rect)
+                renderer.blit(card_back, card_back_rect)
+            # The top card is unknown until the server's card moved event arrives
+            if payoff_pile2_top_card is not None and payoff_pile2_top_card != card_being_dragged:
+                payoff_pile2_top_card.rect.left = 25
+                payoff_pile2_top_card.rect.bottom = WINDOW_HEIGHT
+                renderer.blit(payoff_pile2_top_card.surface, payoff_pile2_top_card.rect)
 
         if player_number == 1:
             for x in range(0, len(discard_piles1_rects), 1):
                 if discard_piles1[x]:
-                    for card in discard_piles1[x]:
-                        if card != card_being_dragged:
-                            if card.position == CardPosition.FACE_UP:
-                                card.rect.x = 225 + (x * 125)
-                                card.rect.y = 625
-                                display_surface.blit(card.surface, card.rect)
-                            else:
-                                card_back_rect.x = 225 + (x * 125)
-                                card_back_rect.y = 625
-                                display_surface.blit(card_back, card_back_rect)
+                    # A top card being dragged is drawn on its own
+                    pile_end = len(discard_piles1[x])
+                    if discard_piles1[x][-1] == card_being_dragged:
+                        pile_end -= 1
+                    if pile_end:
+                        top_card = discard_piles1[x][pile_end - 1]
+                        top_card.rect.x = 225 + (x * 125)
+                        top_card.rect.y = 625
+                        pile_surface = discard_piles1_views[x].render(discard_piles1[x], pile_end, card_back)
+                        renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=top_card.rect.bottomleft))
                 else:
-                    discard_piles1_rects[x] = pygame.draw.rect(display_surface, WHITE, (225 + (x * 125), 625, 100, 150), 2)
+                    discard_piles1_rects[x] = renderer.blit(empty_pile_outline, (225 + (x * 125), 625, 100, 150))
         elif player_number == 2:
             for x in range(0, len(discard_piles2_rects), 1):
                 if discard_piles2[x]:
-                    for card in discard_piles2[x]:
-                        if card != card_being_dragged:
-                            if card.position == CardPosition.FACE_UP:
-                                card.rect.x = 225 + (x * 125)
-                                card.rect.y = 625
-                                display_surface.blit(card.surface, card.rect)
-                            else:
-                                card_back_rect.x = 225 + (x * 125)
-                                card_back_rect.y = 625
-                                display_surface.blit(card_back, card_back_rect)
+                    # A top card being dragged is drawn on its own
+                    pile_end = len(discard_piles2[x])
+                    if discard_piles2[x][-1] == card_being_dragged:
+                        pile_end -= 1
+                    if pile_end:
+                        top_card = discard_piles2[x][pile_end - 1]
+                        top_card.rect.x = 225 + (x * 125)
+                        top_card.rect.y = 625
+                        pile_surface = discard_piles2_views[x].render(discard_piles2[x], pile_end, card_back)
+                        renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=top_card.rect.bottomleft))
                 else:
-                    discard_piles2_rects[x] = pygame.draw.rect(display_surface, WHITE,(225 + (x * 125), 625, 100, 150), 2)
+                    discard_piles2_rects[x] = renderer.blit(empty_pile_outline, (225 + (x * 125), 625, 100, 150))
 
         if player_number == 1:
             for y in range(0, len(build_piles_rects), 1):
                 if build_piles[y]:
-                    for card in build_piles[y]:
-                        if card.position == CardPosition.FACE_UP:
-                            card.rect.x = 225 + (y * 125)
-                            card.rect.y = 400
-                            display_surface.blit(card.surface, card.rect)
-                        else:
-                            card_back_rect.x = 225 + (y * 125)
-                            card_back_rect.y = 400
-                            display_surface.blit(card_back, card_back_rect)
+                    pile_surface = build_piles_views[y].render(build_piles[y], len(build_piles[y]), card_back)
+                    renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=(225 + (y * 125), 550)))
                 else:
-                    build_piles_rects[y] = pygame.draw.rect(display_surface, WHITE, (225 + (y * 125), 400, 100, 150), 2)
+                    build_piles_rects[y] = renderer.blit(empty_pile_outline, (225 + (y * 125), 400, 100, 150))
         elif player_number == 2:
             for y in range(0, len(build_piles_rects), 1):
                 if build_piles[y]:
-                    for card in build_piles[y]:
-                        if card.position == CardPosition.FACE_UP:
-                            card.rect.x = WINDOW_WIDTH - 325 - (y * 125)
-                            card.rect.y = 400
-                            display_surface.blit(card.surface, card.rect)
-                        else:
-                            card_back_rect.x = WINDOW_WIDTH - 325 - (y * 125)
-                            card_back_rect.y = 400
-                            display_surface.blit(card_back, card_back_rect)
+                    pile_surface = build_piles_views[y].render(build_piles[y], len(build_piles[y]), card_back)
+                    renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=(WINDOW_WIDTH - 325 - (y * 125), 550)))
                 else:
-                    build_piles_rects[y] = pygame.draw.rect(display_surface, WHITE, (WINDOW_WIDTH - 325 - (y * 125), 400, 100, 150), 2)
+                    build_piles_rects[y] = renderer.blit(empty_pile_outline, (WINDOW_WIDTH - 325 - (y * 125), 400, 100, 150))
 
 
         if player_number == 1:
             for z in range(0, len(discard_piles2_rects), 1):
                 if discard_piles2[z]:
-                    for card in discard_piles2[z]:
-                        if card.position == CardPosition.FACE_UP:
-                            card.rect.x = WINDOW_WIDTH - 325 - (z * 125)
-                            card.rect.y = 175
-                            display_surface.blit(card.surface, card.rect)
-                        else:
-                            card_back_rect.x = WINDOW_WIDTH - 325 - (z * 125)
-                            card_back_rect.y = 175
-                            display_surface.blit(card_back, card_back_rect)
+                    pile_surface = discard_piles2_views[z].render(discard_piles2[z], len(discard_piles2[z]), card_back)
+                    renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=(WINDOW_WIDTH - 325 - (z * 125), 325)))
                 else:
-                    discard_piles2_rects[z] = pygame.draw.rect(display_surface, WHITE,(WINDOW_WIDTH - 325 - (z * 125), 175, 100, 150), 2)
+                    discard_piles2_rects[z] = renderer.blit(empty_pile_outline, (WINDOW_WIDTH - 325 - (z * 125), 175, 100, 150))
         elif player_number == 2:
             for z in range(0, len(discard_piles1_rects), 1):
                 if discard_piles1[z]:
-                    for card in discard_piles1[z]:
-                        if card.position == CardPosition.FACE_UP:
-                            card.rect.x = WINDOW_WIDTH - 325 - (z * 125)
-                            card.rect.y = 175
-                            display_surface.blit(card.surface, card.rect)
-                        else:
-                            card_back_rect.x = WINDOW_WIDTH - 325 - (z * 125)
-                            card_back_rect.y = 175
-                            display_surface.blit(card_back, card_back_rect)
+                    pile_surface = discard_piles1_views[z].render(discard_piles1[z], len(discard_piles1[z]), card_back)
+                    renderer.blit(pile_surface, pile_surface.get_rect(bottomleft=(WINDOW_WIDTH - 325 - (z * 125), 325)))
                 else:
-                    discard_piles1_rects[z] = pygame.draw.rect(display_surface, WHITE, (WINDOW_WIDTH - 325 - (z * 125), 175, 100, 150), 2)
+                    discard_piles1_rects[z] = renderer.blit(empty_pile_outline, (WINDOW_WIDTH - 325 - (z * 125), 175, 100, 150))
 
         if player_number == 1:
             if payoff_pile2_top_card is not None:
                 payoff_pile2_top_card.rect.right = WINDOW_WIDTH - 25
                 payoff_pile2_top_card.rect.top = 0
-                display_surface.blit(payoff_pile2_top_card.surface, payoff_pile2_top_card.rect)
+                renderer.blit(payoff_pile2_top_card.surface, payoff_pile2_top_card.rect)
         elif player_number == 2:
             if payoff_pile1_top_card is not None:
                 payoff_pile1_top_card.rect.right = WINDOW_WIDTH - 25
                 payoff_pile1_top_card.rect.top = 0
-                display_surface.blit(payoff_pile1_top_card.surface, payoff_pile1_top_card.rect)
+                renderer.blit(payoff_pile1_top_card.surface, payoff_pile1_top_card.rect)
 
         for i in range(0, opponents_hand_size, 1):
             card_back_rect.x = 190 + i * 110
             card_back_rect.y = 0
-            display_surface.blit(card_back, card_back_rect)
+            renderer.blit(card_back, card_back_rect)
 
         if player_number == 1:
-            player_number1_text = font.render(f"Player 1\n{player_name}", True, WHITE, DARK_GREEN)
+            player_number1_text = render_text(font, f"Player 1\n{player_name}", True, WHITE, DARK_GREEN)
             player_number1_rect = player_number1_text.get_rect()
-            player_number2_text = font.render(f"Player 2\n{opponent_player_name}", True, WHITE, DARK_GREEN)
+            player_number2_text = render_text(font, f"Player 2\n{opponent_player_name}", True, WHITE, DARK_GREEN)
             player_number2_rect = player_number2_text.get_rect()
             player_number1_rect.centerx = WINDOW_WIDTH - 100
             player_number1_rect.centery = WINDOW_HEIGHT - 100
             player_number2_rect.centerx = 100
             player_number2_rect.centery = 100
-            display_surface.blit(player_number1_text, player_number1_rect)
-            display_surface.blit(player_number2_text, player_number2_rect)
+            renderer.blit(player_number1_text, player_number1_rect)
+            renderer.blit(player_number2_text, player_number2_rect)
         elif player_number == 2:
-            player_number1_text = font.render(f"Player 1\n{opponent_player_name}", True, WHITE, DARK_GREEN)
+            player_number1_text = render_text(font, f"Player 1\n{opponent_player_name}", True, WHITE, DARK_GREEN)
             player_number1_rect = player_number1_text.get_rect()
-            player_number2_text = font.render(f"Player 2\n{player_name}", True, WHITE, DARK_GREEN)
+            player_number2_text = render_text(font, f"Player 2\n{player_name}", True, WHITE, DARK_GREEN)
             player_number2_rect = player_number2_text.get_rect()
             player_number1_rect.centerx = 100
             player_number1_rect.centery = 100
             player_number2_rect.centerx = WINDOW_WIDTH - 100
             player_number2_rect.centery = WINDOW_HEIGHT - 100
-            display_surface.blit(player_number1_text, player_number1_rect)
-            display_surface.blit(player_number2_text, player_number2_rect)
+            renderer.blit(player_number1_text, player_number1_rect)
+            renderer.blit(player_number2_text, player_number2_rect)
 
         if current_turn == player_number:
-            current_turn_text = font.render(f"Current turn:\nPlayer {current_turn}\n{player_name}", True, WHITE, DARK_GREEN)
+            current_turn_text = render_text(font, f"Current turn:\nPlayer {current_turn}\n{player_name}", True, WHITE, DARK_GREEN)
             current_turn_rect = current_turn_text.get_rect()
             current_turn_rect.right = WINDOW_WIDTH - 25
             current_turn_rect.y = WINDOW_HEIGHT // 2
-            display_surface.blit(current_turn_text, current_turn_rect)
+            renderer.blit(current_turn_text, current_turn_rect)
         elif current_turn == opponent_player:
-            current_turn_text = font.render(f"Current turn:\nPlayer {current_turn}\n{opponent_player_name}", True, WHITE, DARK_GREEN)
+            current_turn_text = render_text(font, f"Current turn:\nPlayer {current_turn}\n{opponent_player_name}", True, WHITE, DARK_GREEN)
             current_turn_rect = current_turn_text.get_rect()
             current_turn_rect.right = WINDOW_WIDTH - 25
             current_turn_rect.y = WINDOW_HEIGHT // 2
-            display_surface.blit(current_turn_text, current_turn_rect)
+            renderer.blit(current_turn_text, current_turn_rect)
 
-        build_pile_value1_text = font.render(str(len(build_piles[0])), True, WHITE, DARK_GREEN)
+        build_pile_value1_text = render_text(font, str(len(build_piles[0])), True, WHITE, DARK_GREEN)
         build_pile_value1_rect = build_pile_value1_text.get_rect()
-        build_pile_value2_text = font.render(str(len(build_piles[1])), True, WHITE, DARK_GREEN)
+        build_pile_value2_text = render_text(font, str(len(build_piles[1])), True, WHITE, DARK_GREEN)
         build_pile_value2_rect = build_pile_value2_text.get_rect()
-        build_pile_value3_text = font.render(str(len(build_piles[2])), True, WHITE, DARK_GREEN)
+        build_pile_value3_text = render_text(font, str(len(build_piles[2])), True, WHITE, DARK_GREEN)
         build_pile_value3_rect = build_pile_value3_text.get_rect()
-        build_pile_value4_text = font.render(str(len(build_piles[3])), True, WHITE, DARK_GREEN)
+        build_pile_value4_text = render_text(font, str(len(build_piles[3])), True, WHITE, DARK_GREEN)
         build_pile_value4_rect = build_pile_value4_text.get_rect()
 
         if player_number == 1:
@@ -2120,14 +1721,14 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
             build_pile_value4_rect.x = 260
             build_pile_value4_rect.y = 550
 
-        display_surface.blit(build_pile_value1_text, build_pile_value1_rect)
-        display_surface.blit(build_pile_value2_text, build_pile_value2_rect)
-        display_surface.blit(build_pile_value3_text, build_pile_value3_rect)
-        display_surface.blit(build_pile_value4_text, build_pile_value4_rect)
+        renderer.blit(build_pile_value1_text, build_pile_value1_rect)
+        renderer.blit(build_pile_value2_text, build_pile_value2_rect)
+        renderer.blit(build_pile_value3_text, build_pile_value3_rect)
+        renderer.blit(build_pile_value4_text, build_pile_value4_rect)
 
-        payoff_pile1_remaining_cards_text = font.render(str(payoff_pile1_remaining_cards), True, WHITE, DARK_GREEN)
+        payoff_pile1_remaining_cards_text = render_text(font, str(payoff_pile1_remaining_cards), True, WHITE, DARK_GREEN)
         payoff_pile1_remaining_cards_rect = payoff_pile1_remaining_cards_text.get_rect()
-        payoff_pile2_remaining_cards_text = font.render(str(payoff_pile2_remaining_cards), True, WHITE, DARK_GREEN)
+        payoff_pile2_remaining_cards_text = render_text(font, str(payoff_pile2_remaining_cards), True, WHITE, DARK_GREEN)
         payoff_pile2_remaining_cards_rect = payoff_pile2_remaining_cards_text.get_rect()
 
         if player_number == 1:
@@ -2141,61 +1742,46 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
             payoff_pile2_remaining_cards_rect.x = 55
             payoff_pile2_remaining_cards_rect.y = 760
 
-        display_surface.blit(payoff_pile1_remaining_cards_text, payoff_pile1_remaining_cards_rect)
-        display_surface.blit(payoff_pile2_remaining_cards_text, payoff_pile2_remaining_cards_rect)
+        renderer.blit(payoff_pile1_remaining_cards_text, payoff_pile1_remaining_cards_rect)
+        renderer.blit(payoff_pile2_remaining_cards_text, payoff_pile2_remaining_cards_rect)
 
-        draw_pile_remaining_cards_text = font.render(f"Remaining\ndraw pile\ncards: {str(draw_pile_remaining_cards)}", True, WHITE, DARK_GREEN)
+        draw_pile_remaining_cards_text = render_text(font, f"Remaining\ndraw pile\ncards: {str(draw_pile_remaining_cards)}", True, WHITE, DARK_GREEN)
         draw_pile_remaining_cards_rect = draw_pile_remaining_cards_text.get_rect()
         draw_pile_remaining_cards_rect.x = 25
         draw_pile_remaining_cards_rect.y = WINDOW_HEIGHT // 2
-        display_surface.blit(draw_pile_remaining_cards_text, draw_pile_remaining_cards_rect)
+        renderer.blit(draw_pile_remaining_cards_text, draw_pile_remaining_cards_rect)
 
         if currently_dragging_card:
-            display_surface.blit(card_being_dragged.surface, card_being_dragged.rect)
+            renderer.blit(card_being_dragged.surface, card_being_dragged.rect)
+
+        dirty_rects = renderer.draw()
 
         if game_result_text is None:
-            if len(build_piles[0]) == 12:
-                build_piles[0] = []
-                draw_pile_needs_to_be_reshuffled = True
-            if len(build_piles[1]) == 12:
-                build_piles[1] = []
-                draw_pile_needs_to_be_reshuffled = True
-            if len(build_piles[2]) == 12:
-                build_piles[2] = []
-                draw_pile_needs_to_be_reshuffled = True
-            if len(build_piles[3]) == 12:
-                build_piles[3] = []
+            if clear_completed_build_piles(build_piles):
                 draw_pile_needs_to_be_reshuffled = True
             if draw_pile_needs_to_be_reshuffled:
                 network_traffic_lock.acquire()
-                send_message(server_socket, "Draw pile needs to be reshuffled")
+                send_request(server_socket, Opcode.RESHUFFLE_DRAW_PILE)
                 network_traffic_lock.release()
                 if sound_option == "On":
-                    shuffle_sound_effect = pygame.mixer.Sound(get_path("assets/shuffle_cards.wav"))
-                    shuffle_sound_effect.play()
+                    play_sound("shuffle_cards")
                 draw_pile_needs_to_be_reshuffled = False
 
         if first_turn:
             if sound_option == "On":
-                shuffle_sound_effect = pygame.mixer.Sound(get_path("assets/shuffle_cards.wav"))
-                shuffle_sound_effect.play()
-                pygame.time.wait(1000)
+                play_sound("shuffle_cards")
             first_turn = False
 
-        if screen_refresh_timer == 0:
-            screen_refresh_timer = 20
-        else:
-            screen_refresh_timer -= 1
-
         user_quit_game = False
         go_to_title_screen = False
 
         if game_result_text is not None and isinstance(game_result_text, pygame.Surface):
             draggable_cards = []
+            # The re-match screens draw over the table
+            renderer.invalidate()
 
             # Signal the networking thread to stop
-            game_in_progress = False
-            networking_thread.join()
+            stop_game_networking(server_socket, networking_thread)
 
             rematch_manager = pygame_gui.UIManager(
                 (WINDOW_WIDTH, WINDOW_HEIGHT), theme_path="theme.json")
@@ -2223,7 +1809,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                             paused = False
 
                         if event.ui_element == no_button:
-                            send_message(server_socket, f"Player {player_number} did not want a re-match")
+                            send_request(server_socket, Opcode.SET_REMATCH_DECISION, player_number, RematchDecision.NO)
                             paused = False
 
                     rematch_manager.process_events(event)
@@ -2235,7 +1821,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                 game_result_rect.centerx = WINDOW_WIDTH // 2
                 game_result_rect.centery = WINDOW_HEIGHT // 2 - 100
                 display_surface.blit(game_result_text, game_result_rect)
-                rematch_text = font.render("Request a re-match?", True, WHITE)
+                rematch_text = render_text(font, "Request a re-match?", True, WHITE)
                 rematch_rect = rematch_text.get_rect()
                 rematch_rect.centerx = 460
                 rematch_rect.centery = 485
@@ -2247,7 +1833,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
 
             if rematch:
                 display_surface.fill(DARK_GREEN)
-                status_text = pygame.font.SysFont("Arial", 32).render(
+                status_text = render_text(get_font("Arial", 32),
                     "Requesting a re-match...", True, WHITE)
                 status_rect = status_text.get_rect()
                 status_rect.centerx = WINDOW_WIDTH // 2
@@ -2255,7 +1841,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                 display_surface.blit(status_text, status_rect)
                 pygame.display.update()
 
-                send_message(server_socket,f"Player {player_number} wants a re-match")
+                send_request(server_socket, Opcode.SET_REMATCH_DECISION, player_number, RematchDecision.YES)
 
                 rematch_manager2 = pygame_gui.UIManager(
                     (WINDOW_WIDTH, WINDOW_HEIGHT), theme_path="theme.json")
@@ -2286,21 +1872,21 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
 
                     rematch_manager2.update(time_delta)
 
-                    send_message(server_socket,f"Does player {opponent_player} also want a re-match?")
-                    data = receive_message(server_socket)
+                    send_request(server_socket, Opcode.GET_REMATCH_DECISION, opponent_player)
+                    data = receive_reply(server_socket, Opcode.GET_REMATCH_DECISION)[0][0]
 
-                    if data == "No":
+                    if data == RematchDecision.NO:
                         display_surface.fill(DARK_GREEN)
-                        status_text = pygame.font.SysFont("Arial", 32).render(f"Player {opponent_player} ({opponent_player_name}) did not want a re-match!",True, WHITE)
+                        status_text = render_text(get_font("Arial", 32), f"Player {opponent_player} ({opponent_player_name}) did not want a re-match!",True, WHITE)
                         status_rect = status_text.get_rect()
                         status_rect.centerx = WINDOW_WIDTH // 2
                         status_rect.centery = WINDOW_HEIGHT // 2
                         display_surface.blit(status_text, status_rect)
                         rematch_manager2.draw_ui(display_surface)
                         pygame.display.update()
-                    elif data == "Yes":
+                    elif data == RematchDecision.YES:
                         display_surface.fill(DARK_GREEN)
-                        status_text = font.render(f"Player {opponent_player} ({opponent_player_name}) agreed to a re-match!\n        Setting up a new game...",
+                        status_text = render_text(font, f"Player {opponent_player} ({opponent_player_name}) agreed to a re-match!\n        Setting up a new game...",
                             True, WHITE)
                         status_rect = status_text.get_rect()
                         status_rect.centerx = WINDOW_WIDTH // 2
@@ -2313,6 +1899,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                         build_piles = [[], [], [], []]
                         draggable_cards_set = False
                         first_turn = True
+                        current_turn = 0
                         current_hand = []
                         game_result_text = None
 
@@ -2329,26 +1916,22 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
                                     user_quit_game = True
 
                             if rematch_setup_status == RematchStatus.IN_PROGRESS:
-                                status_text = font.render(
+                                status_text = render_text(font,
                                     "Re-match setup in progress, please wait...",
                                     True, WHITE)
                             elif rematch_setup_status == RematchStatus.ERROR:
                                 if rematch_setup_error_status == RematchErrorStatus.ERROR_RECEIVING_CARD_DATA:
-                                    status_text = font.render(
+                                    status_text = render_text(font,
                                         "      Error receiving card data from server!\nPlease restart the program to enter a new game",
                                         True, WHITE)
                             elif rematch_setup_status == RematchStatus.COMPLETE:
-                                status_text = font.render(
+                                status_text = render_text(font,
                                     "Re-match setup complete! Entering new game...",
                                     True, WHITE)
                                 setting_up_rematch = False
 
-                                # Used to signal the networking thread that it should keep running
-                                game_in_progress = True
-
                                 # Start the networking thread
-                                networking_thread = threading.Thread(target=game_networking_handler, args=(server_socket,), daemon=True)
-                                networking_thread.start()
+                                networking_thread = start_game_networking(server_socket)
 
                             display_surface.fill(DARK_GREEN)
                             status_rect = status_text.get_rect()
@@ -2360,9 +1943,9 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
 
                         break
 
-                    elif data == "Undecided":
+                    elif data == RematchDecision.UNDECIDED:
                         display_surface.fill(DARK_GREEN)
-                        status_text = pygame.font.SysFont("Arial", 32).render(
+                        status_text = render_text(get_font("Arial", 32),
                             f"Waiting for other player's re-match decision...",
                             True, WHITE)
                         status_rect = status_text.get_rect()
@@ -2383,7 +1966,7 @@ def run_game(server_socket: socket.socket, display_surface: pygame.Surface):
             main(display_surface)
             break
 
-        pygame.display.update()
+        pygame.display.update(dirty_rects)
 
     if not socket_closed:
        server_socket.close()
@@ -2404,7 +1987,7 @@ def main(display_surface: pygame.Surface):
 
             performing_setup = True
 
-            status_font = pygame.font.SysFont("Arial", 32)
+            status_font = get_font("Arial", 32)
 
             while performing_setup:
 
@@ -2418,17 +2001,17 @@ def main(display_surface: pygame.Surface):
 
                 status_text = None
                 if initial_setup_status == SetupStatus.CONNECTING_TO_SERVER:
-                    status_text = status_font.render("Connecting to server...", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, "Connecting to server...", True, WHITE, DARK_GREEN)
                 elif initial_setup_status == SetupStatus.PLAYER_ASSIGNED:
-                    status_text = status_font.render(f"You are player {player_number}", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, f"You are player {player_number}", True, WHITE, DARK_GREEN)
                 elif initial_setup_status == SetupStatus.WAITING_FOR_OTHER_PLAYER:
-                    status_text = status_font.render("Waiting for other player to join...", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, "Waiting for other player to join...", True, WHITE, DARK_GREEN)
                 elif initial_setup_status == SetupStatus.RECEIVING_CARD_DATA:
-                    status_text = status_font.render("Receiving card data from server...", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, "Receiving card data from server...", True, WHITE, DARK_GREEN)
                 elif initial_setup_status == SetupStatus.OTHER_PLAYER_STATUS_CHECK:
-                    status_text = status_font.render("Checking status of other player...", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, "Checking status of other player...", True, WHITE, DARK_GREEN)
                 elif initial_setup_status == SetupStatus.COMPLETE:
-                    status_text = status_font.render("Initial setup complete! Loading game...", True, WHITE, DARK_GREEN)
+                    status_text = render_text(status_font, "Initial setup complete! Loading game...", True, WHITE, DARK_GREEN)
 
                 if status_text is not None:
                     status_text_rect = status_text.get_rect()
@@ -2453,18 +2036,20 @@ def main(display_surface: pygame.Surface):
                     if initial_setup_error_status == SetupErrorStatus.COULD_NOT_CONNECT_TO_SERVER:
                         raise ClientError(f"Could not connect to server {host}:{port}")
                     elif initial_setup_error_status == SetupErrorStatus.GAME_LOBBY_FULL:
-                        raise ClientError("Game lobby full!")
+                        raise ClientError(f"Table {table} is full!")
                     elif initial_setup_error_status == SetupErrorStatus.CARD_DATA_RECEIVE_ERROR:
                         raise ClientError("Error receiving card data from server")
                     elif initial_setup_error_status == SetupErrorStatus.OTHER_PLAYER_DISCONNECTED:
                         raise ClientError("Other player disconnected!")
+                    elif initial_setup_error_status == SetupErrorStatus.PROTOCOL_VERSION_MISMATCH:
+                        raise ClientError("Server is running an incompatible version of the game")
 
         except TimeoutError:
             server_socket.close()
             display_surface.fill(DARK_GREEN)
             error_message = "An operation with the server timed out\n(other player may have disconnected\nor the server might be down)"
-            error_font = pygame.font.SysFont("Arial", 32)
-            error_text = error_font.render(error_message, True, WHITE, DARK_GREEN)
+            error_font = get_font("Arial", 32)
+            error_text = render_text(error_font, error_message, True, WHITE, DARK_GREEN)
             error_text_rect = error_text.get_rect()
             error_text_rect.centerx = WINDOW_WIDTH//2
             error_text_rect.centery = WINDOW_HEIGHT//2
@@ -2480,8 +2065,8 @@ def main(display_surface: pygame.Surface):
             server_socket.close()
             display_surface.fill(DARK_GREEN)
             error_message = "Server actively refused the client connection.\n       Please check the server and restart."
-            error_font = pygame.font.SysFont("Arial", 32)
-            error_text = error_font.render(error_message, True, WHITE, DARK_GREEN)
+            error_font = get_font("Arial", 32)
+            error_text = render_text(error_font, error_message, True, WHITE, DARK_GREEN)
             error_text_rect = error_text.get_rect()
             error_text_rect.centerx = WINDOW_WIDTH//2
             error_text_rect.centery = WINDOW_HEIGHT//2
@@ -2493,7 +2078,7 @@ def main(display_surface: pygame.Surface):
                 display_surface.fill(DARK_GREEN)
                 display_surface.blit(error_text, error_text_rect)
                 pygame.display.update()
-        except ClientError as ce:
+        except (ClientError, ProtocolError) as ce:
             server_socket.close()
             display_surface.fill(DARK_GREEN)
             if "]" in str(ce):
@@ -2502,8 +2087,8 @@ def main(display_surface: pygame.Surface):
                 error_message = "Connection to the server timed out (30 seconds)"
             else:
                 error_message = str(ce)
-            error_font = pygame.font.SysFont("Arial", 32)
-            error_text = error_font.render(error_message, True, WHITE, DARK_GREEN)
+            error_font = get_font("Arial", 32)
+            error_text = render_text(error_font, error_message, True, WHITE, DARK_GREEN)
             error_text_rect = error_text.get_rect()
             error_text_rect.centerx = WINDOW_WIDTH//2
             error_text_rect.centery = WINDOW_HEIGHT//2
@@ -2525,6 +2110,9 @@ if __name__ == "__main__":
         pygame.init()
         game_screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Spite and Malice")
+        load_card_faces(get_path("assets/card_faces"))
+        load_card_backs(get_path("assets/card_backs"))
+        load_sounds(get_path("assets"), ["dealing_cards", "shuffle_cards"])
         main(game_screen)
 
     else:
@@ -1,907 +1,856 @@
+import abc
+import asyncio
+import multiprocessing
 import socket
 import threading
-import re
-import random
 import tomllib
 import os
 import sys
 import platform
+import time
 from collections import deque
-from card import CardPosition, send_cards, deal, create_deck
-from socket_utils import receive_message, send_message
+from array import array
+from bot import BotPlayer, run_bot
+from engine import (CARDS_PER_DECK, EngineError, GameState, Hand, card_id, card_identity, clear_completed_build_piles,
+                    create_deck_template, encode_cards)
+from socket_utils import ReceiveBuffer, frame_packet, receive_packet
+from protocol import (PROTOCOL_VERSION, ProtocolError, Opcode, Event, Pile, JoinStatus, RematchDecision, GameResult,
+                      REQUEST_FORMATS, REPLY_FORMATS, EVENT_FORMATS, GAME_STATE_FORMAT, encode_message, decode_message,
+                      receive_request, async_receive_request)
 from path_utils import get_path
 from pathlib import Path
 
 VERSION = "1.0.1"
 HOST = "0.0.0.0"
-
-connection_count = 0
-current_turn = 0
-current_turn_lock = threading.Lock()
-connection_count_lock = threading.Lock()
-card_lock = threading.Lock()
-deck = []
-payoff_pile1 = []
-payoff_pile2 = []
-build_piles = [[], [], [], []]
-player1_discard_piles = [[], [], [], []]
-player2_discard_piles = [[], [], [], []]
-draw_pile = []
-player1_name = ""
-player1_hand = []
-player1_draw_count = 0
-player1_moves_queue = deque()
-player1_rematch = None
-player2_name = ""
-player2_hand = []
-player2_draw_count = 0
-player2_moves_queue = deque()
-player2_rematch = None
-rematch_setup_complete = False
-rematch_setup_lock = threading.Lock()
+# Sharded mode: how long the front listener waits for a new connection's
+# PLAYER_READY request and the largest request it will hand to a worker
+ROUTING_TIMEOUT = 10
+MAX_HANDOFF_SIZE = 1024
+
+# Game sessions keyed by table id. A session is created when the first player
+# joins its table and removed when the last player leaves.
+sessions = {}
+# Uncontended on the asyncio engine, where every client is served on one thread
+sessions_lock = threading.Lock()
+# Seconds player 1 waits alone at a table before a bot takes the other seat (0
+# never seats bots) and the port the bots connect back to
+bot_fill_delay = 0
+bot_port = 0
 
 class ServerError(Exception):
     pass
 
-def handle_client(client_socket: socket.socket, client_address: tuple[str, int], num_decks: int, payoff_pile_size: int) -> None:
-    global connection_count, current_turn, deck, payoff_pile1, payoff_pile2, draw_pile
-    global player1_hand, player2_hand, player1_draw_count, player2_draw_count
-    global player1_name, player2_name, player1_rematch, player2_rematch, rematch_setup_complete
-    global build_piles, player1_discard_piles, player2_discard_piles
+class NullLock:
+    # Stands in for the shared state locks when every client is served on one event loop thread
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+    def __enter__(self) -> bool:
+        return True
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+class ClientConnection(abc.ABC):
+    # Transport independent view of a connected client, subclasses provide write()
+
+    # Lock type guarding the game sessions this kind of connection creates
+    session_lock_type = threading.Lock
+
+    def __init__(self, address: tuple[str, int]):
+        self.address = address
+        self.session = None
+        self.player_number = 0
+        self.subscribed = False
+        self.send_lock = NullLock()
+
+    @abc.abstractmethod
+    def write(self, packet: bytes) -> None:
+        pass
+
+    def reply(self, opcode: Opcode, *fields: int, tail: bytes = b"") -> None:
+        with self.send_lock:
+            self.write(frame_packet(encode_message(REPLY_FORMATS, opcode, *fields, tail=tail)))
+
+    def push_event(self, event: Event, *fields: int, tail: bytes = b"") -> None:
+        with self.send_lock:
+            # Skip connections that unsubscribed after the subscriber list was copied
+            if self.subscribed:
+                self.write(frame_packet(encode_message(EVENT_FORMATS, event, *fields, tail=tail)))
+
+class ThreadedClientConnection(ClientConnection):
+    def __init__(self, client_socket: socket.socket, address: tuple[str, int]):
+        super().__init__(address)
+        self.socket = client_socket
+        # Other threads push events to this socket too, so every send takes this lock.
+        # Reentrant so a reply can be sent while the lock is held to unsubscribe.
+        self.send_lock = threading.RLock()
+
+    def write(self, packet: bytes) -> None:
+        self.socket.sendall(packet)
+
+class AsyncClientConnection(ClientConnection):
+    # Every client is served on the event loop thread, so the game state needs no locks
+    session_lock_type = NullLock
+
+    def __init__(self, writer: asyncio.StreamWriter, address: tuple[str, int]):
+        super().__init__(address)
+        self.writer = writer
+
+    def write(self, packet: bytes) -> None:
+        # Buffered by the transport, the connection's handler drains it after each request
+        self.writer.write(packet)
+
+class PileSnapshot:
+    # Read-only copy of everything the polling requests ask about. A new one is
+    # built under card_lock after every change and swapped in with a single
+    # assignment, so readers use it without taking any lock. Every snapshot gets
+    # the next state version, and the GET_STATE reply tail is encoded once here
+    # rather than for every client that polls.
+    __slots__ = ("version", "pile_counts", "current_turn", "game_result", "payoff_pile_tops", "game_state")
+
+    def __init__(self, version: int, pile_counts: tuple[int, int, int, int, int], current_turn: int, game_result: GameResult, payoff_pile_tops: tuple[bytes, bytes]):
+        self.version = version
+        self.pile_counts = pile_counts
+        self.current_turn = current_turn
+        self.game_result = game_result
+        self.payoff_pile_tops = payoff_pile_tops
+        self.game_state = GAME_STATE_FORMAT.pack(*pile_counts, current_turn, game_result) + payoff_pile_tops[0] + payoff_pile_tops[1]
+
+    def get_hand_size(self, target_player: int) -> int:
+        return self.pile_counts[3 + player_slot(target_player)]
+
+    def get_payoff_pile_size(self, target_player: int) -> int:
+        return self.pile_counts[player_slot(target_player)]
+
+    def get_payoff_pile_top(self, target_player: int) -> bytes:
+        return self.payoff_pile_tops[player_slot(target_player)]
+
+    def has_game_result(self) -> bool:
+        payoff_pile1_size, payoff_pile2_size, draw_pile_size = self.pile_counts[:3]
+        return not payoff_pile1_size or not payoff_pile2_size or not draw_pile_size
+
+def player_slot(target_player: int) -> int:
+    if target_player == 1 or target_player == 2:
+        return target_player - 1
+    raise ServerError(f"Invalid player ID ({target_player}) specified in client data")
+
+def check_turn(client: ClientConnection, opcode: Opcode, target_player: int) -> None:
+    # Only the player whose turn it is may move their cards, draw or end their turn
+    session = client.session
+    if target_player != client.player_number:
+        raise ServerError(f"Player {client.player_number} sent a {opcode.name} request for player {target_player}")
+    session.card_lock.acquire()
+    current_turn = session.state.current_turn
+    session.card_lock.release()
+    if current_turn != client.player_number:
+        raise ServerError(f"Player {client.player_number} sent a {opcode.name} request out of turn")
+
+class GameSession:
+    # Everything belonging to one table's game, including the locks guarding it
+    def __init__(self, table_id: int, lock_type: type = threading.Lock):
+        self.table_id = table_id
+        self.connection_count = 0
+        self.created_time = time.monotonic()
+        self.bot_requested = False
+        self.connection_count_lock = lock_type()
+        # Guards the piles and the turn while they change, readers use the snapshot instead
+        self.card_lock = lock_type()
+        # Held for the whole of deck creation so only one player builds the shoe,
+        # without holding card_lock while it is built
+        self.deck_creation_lock = lock_type()
+        # The table's game, every pile as compact card id arrays and whose turn it is
+        self.state = GameState()
+        self.player1_name = ""
+        self.player1_moves_queue = deque()
+        self.player1_rematch = None
+        self.player2_name = ""
+        self.player2_moves_queue = deque()
+        self.player2_rematch = None
+        self.rematch_setup_complete = False
+        self.rematch_setup_lock = lock_type()
+        # Connections at this table that asked to be pushed game events, keyed by player number
+        self.event_subscribers = {}
+        self.event_subscribers_lock = lock_type()
+        # Bumped on every snapshot, only ever goes up for the life of the table
+        self.state_version = 0
+        self.snapshot = None
+        self.refresh_snapshot()
+
+    def get_player_piles(self, target_player: int) -> tuple[Hand, list[array], array]:
+        slot = player_slot(target_player)
+        return self.state.hands[slot], self.state.discard_piles[slot], self.state.payoff_piles[slot]
+
+    def move_card(self, target_player: int, moving_from: int, moving_to: int, deck_index: int, card_index: int) -> int:
+        # Must be called with card_lock held
+        player_slot(target_player)
+        if card_index >= CARDS_PER_DECK:
+            raise ServerError("Invalid card specified in move request")
+        card_to_move = card_id(deck_index, card_index)
+
+        try:
+            self.state.move_card(target_player, moving_from, moving_to, card_to_move)
+        except EngineError as ee:
+            raise ServerError(f"Invalid move request: {ee}")
+
+        return card_to_move
+
+    def get_pile_counts(self) -> tuple[int, int, int, int, int]:
+        # Must be called with card_lock held
+        state = self.state
+        return len(state.payoff_piles[0]), len(state.payoff_piles[1]), len(state.draw_pile), len(state.hands[0]), len(state.hands[1])
+
+    def get_game_result(self) -> GameResult:
+        # Must be called with card_lock held
+        return self.state.winner()
+
+    def get_current_turn(self) -> int:
+        # Must be called with card_lock held. 0 until publish_current_turn has run.
+        return self.state.current_turn
+
+    def refresh_snapshot(self) -> PileSnapshot:
+        # Must be called with card_lock held, after every change to the piles or the turn
+        self.state_version += 1
+        self.snapshot = PileSnapshot(self.state_version, self.get_pile_counts(), self.get_current_turn(), self.get_game_result(),
+                                     (encode_cards(self.state.payoff_piles[0][-1:]), encode_cards(self.state.payoff_piles[1][-1:])))
+        return self.snapshot
+
+    def publish_current_turn(self) -> int:
+        # Decides who starts if nobody has asked yet and returns whose turn it is
+        self.card_lock.acquire()
+        if self.state.decide_first_player():
+            self.refresh_snapshot()
+        turn = self.state.current_turn
+        self.card_lock.release()
+        return turn
+
+    def publish_event(self, event: Event, *fields: int, tail: bytes = b"") -> None:
+        self.event_subscribers_lock.acquire()
+        subscribers = list(self.event_subscribers.values())
+        self.event_subscribers_lock.release()
+
+        for subscriber in subscribers:
+            try:
+                subscriber.push_event(event, *fields, tail=tail)
+            except OSError:
+                # The subscriber's own handler notices the broken connection and cleans up
+                pass
+
+    def reset(self) -> None:
+        # Must be called with card_lock held
+        self.state = GameState()
+        self.player1_moves_queue.clear()
+        self.player2_moves_queue.clear()
+        self.refresh_snapshot()
+
+def process_request(client: ClientConnection, opcode: Opcode, fields: tuple[int, ...], tail: bytes | memoryview,
+                    deck_template: list[int], num_decks: int, payoff_pile_size: int) -> None:
+
+    session = client.session
+    if session is None and opcode != Opcode.PLAYER_READY:
+        raise ServerError(f"Client sent a {opcode.name} request before joining a table")
+
+    if opcode == Opcode.PLAYER_READY:
+        protocol_version, table_id = fields
+        if protocol_version != PROTOCOL_VERSION:
+            client.reply(Opcode.PLAYER_READY, JoinStatus.VERSION_MISMATCH, 0)
+            raise ServerError(f"Client uses protocol version {protocol_version}, expected {PROTOCOL_VERSION}")
+
+        if session is not None:
+            raise ServerError(f"Client already joined table {session.table_id}")
+
+        try:
+            requested_name = str(tail, "utf-8")
+        except UnicodeDecodeError:
+            raise ServerError("Received an invalid player name")
+
+        session, player_number = join_table(table_id, client.session_lock_type)
+        if player_number == 0:
+            client.reply(Opcode.PLAYER_READY, JoinStatus.LOBBY_FULL, 0)
+        else:
+            client.session = session
+            client.player_number = player_number
+
+            if client.player_number == 1:
+                session.player1_name = requested_name
+                print(f"[*] Player {client.player_number} ({session.player1_name}) has joined table {table_id}", flush=True)
+            elif client.player_number == 2:
+                session.player2_name = requested_name
+                print(f"[*] Player {client.player_number} ({session.player2_name}) has joined table {table_id}", flush=True)
+            else:
+                raise ServerError("Player number cannot be 0!")
+            client.reply(Opcode.PLAYER_READY, JoinStatus.JOINED, client.player_number)
+
+    # Note: This request should only be sent by the player 1 client
+    elif opcode == Opcode.HAS_PLAYER2_JOINED:
+        session.connection_count_lock.acquire()
+        player2_joined = session.connection_count == 2
+        seat_bot = (not player2_joined and bot_fill_delay > 0 and not session.bot_requested
+                    and time.monotonic() - session.created_time >= bot_fill_delay)
+        if seat_bot:
+            session.bot_requested = True
+        client.reply(Opcode.HAS_PLAYER2_JOINED, player2_joined)
+        session.connection_count_lock.release()
+
+        if seat_bot:
+            print(f"[*] Nobody joined table {session.table_id} within {bot_fill_delay:g} seconds, seating a bot", flush=True)
+            start_bot(session.table_id)
+
+    elif opcode == Opcode.GET_PLAYER_NAME:
+        if fields[0] == 1:
+            client.reply(Opcode.GET_PLAYER_NAME, tail=session.player1_name.encode())
+        elif fields[0] == 2:
+            client.reply(Opcode.GET_PLAYER_NAME, tail=session.player2_name.encode())
+        else:
+            raise ServerError(f"Invalid player ID ({fields[0]}) specified in client data")
+
+    elif opcode == Opcode.SET_REMATCH_DECISION:
+        target_player, decision = fields
+        if decision == RematchDecision.YES:
+            wants_rematch = True
+        elif decision == RematchDecision.NO:
+            wants_rematch = False
+        else:
+            raise ServerError("Invalid re-match decision in client data")
+
+        if target_player == 1:
+            session.player1_rematch = wants_rematch
+        elif target_player == 2:
+            session.player2_rematch = wants_rematch
+
+    elif opcode == Opcode.GET_REMATCH_DECISION:
+        if fields[0] == 1:
+            target_rematch = session.player1_rematch
+        elif fields[0] == 2:
+            target_rematch = session.player2_rematch
+        else:
+            raise ServerError(f"Invalid player ID ({fields[0]}) specified in client data")
+
+        if target_rematch is True:
+            client.reply(Opcode.GET_REMATCH_DECISION, RematchDecision.YES)
+        elif target_rematch is False:
+            client.reply(Opcode.GET_REMATCH_DECISION, RematchDecision.NO)
+        else:
+            client.reply(Opcode.GET_REMATCH_DECISION, RematchDecision.UNDECIDED)
+
+    elif opcode == Opcode.SET_UP_NEW_GAME:
+        session.rematch_setup_lock.acquire()
+        if not session.rematch_setup_complete:
+            print("[*] New game requested, resetting game parameters...", flush=True)
+            session.card_lock.acquire()
+            session.reset()
+            session.card_lock.release()
+            session.rematch_setup_complete = True
+        else:
+            session.player1_rematch = None
+            session.player2_rematch = None
+            session.rematch_setup_complete = False
+        session.rematch_setup_lock.release()
+
+    elif opcode == Opcode.RESHUFFLE_DRAW_PILE:
+
+        session.card_lock.acquire()
+
+        cards_to_shuffle = clear_completed_build_piles(session.state.build_piles)
+        draw_pile_needs_to_be_reshuffled = bool(cards_to_shuffle)
+
+        if draw_pile_needs_to_be_reshuffled:
+            session.state.return_to_draw_pile(cards_to_shuffle)
+            session.refresh_snapshot()
+        draw_pile_size = len(session.state.draw_pile)
+
+        session.card_lock.release()
+
+        if draw_pile_needs_to_be_reshuffled:
+            session.publish_event(Event.DRAW_PILE_RESHUFFLED, draw_pile_size)
+
+    elif opcode == Opcode.CREATE_DECK:
+        session.deck_creation_lock.acquire()
+        try:
+            session.card_lock.acquire()
+            state = session.state
+            needs_deck = not state.payoff_piles[0] and not state.payoff_piles[1] and not state.draw_pile
+            session.card_lock.release()
+
+            if needs_deck:
+                # Built outside card_lock, only the finished game state is swapped in under it
+                print(f"[*] Creating the deck, payoff piles and draw pile (player {client.player_number} thread)...", flush=True)
+                new_state = GameState()
+                new_state.deal(num_decks, payoff_pile_size, deck_template)
+
+                session.card_lock.acquire()
+                session.state = new_state
+                session.refresh_snapshot()
+                session.card_lock.release()
+            else:
+                print(f"[*] Status update from player {client.player_number} thread: other thread already created decks and piles", flush=True)
+        finally:
+            session.deck_creation_lock.release()
+
+    elif opcode == Opcode.IS_OTHER_PLAYER_CONNECTED:
+        session.connection_count_lock.acquire()
+        client.reply(Opcode.IS_OTHER_PLAYER_CONNECTED, session.connection_count == 2)
+        session.connection_count_lock.release()
+
+    elif opcode == Opcode.GET_HAND_SIZE:
+        client.reply(Opcode.GET_HAND_SIZE, session.snapshot.get_hand_size(fields[0]))
+
+    elif opcode == Opcode.GET_PAYOFF_PILE_SIZE:
+        client.reply(Opcode.GET_PAYOFF_PILE_SIZE, session.snapshot.get_payoff_pile_size(fields[0]))
+
+    elif opcode == Opcode.GET_PAYOFF_PILE_TOP:
+        client.reply(Opcode.GET_PAYOFF_PILE_TOP, tail=session.snapshot.get_payoff_pile_top(fields[0]))
+
+    elif opcode == Opcode.HAS_GAME_RESULT:
+        client.reply(Opcode.HAS_GAME_RESULT, session.snapshot.has_game_result())
+
+    elif opcode == Opcode.GET_GAME_RESULT:
+        client.reply(Opcode.GET_GAME_RESULT, session.snapshot.game_result)
+
+    elif opcode == Opcode.GET_DRAW_PILE_SIZE:
+        client.reply(Opcode.GET_DRAW_PILE_SIZE, session.snapshot.pile_counts[2])
+
+    elif opcode == Opcode.GET_LAST_MOVE:
+        if fields[0] == 1:
+            target_moves_queue = session.player1_moves_queue
+        elif fields[0] == 2:
+            target_moves_queue = session.player2_moves_queue
+        else:
+            # Should never get here but raise an exception just in case
+            raise ServerError("Invalid player ID specified in request")
+
+        if target_moves_queue:
+            moving_from, moving_to, moved_card = target_moves_queue.popleft()
+            client.reply(Opcode.GET_LAST_MOVE, True, moving_from, moving_to, *card_identity(moved_card))
+        else:
+            client.reply(Opcode.GET_LAST_MOVE, False, 0, 0, 0, 0)
+
+    elif opcode == Opcode.GET_STATE:
+        # One round trip for everything the polling requests ask about, or just the version if nothing changed
+        snapshot = session.snapshot
+        if fields[0] == snapshot.version:
+            client.reply(Opcode.GET_STATE, snapshot.version, False)
+        else:
+            client.reply(Opcode.GET_STATE, snapshot.version, True, tail=snapshot.game_state)
+
+    elif opcode == Opcode.GET_CURRENT_TURN:
+        client.reply(Opcode.GET_CURRENT_TURN, session.publish_current_turn())
+
+    elif opcode == Opcode.END_TURN:
+        check_turn(client, opcode, fields[0])
+        session.card_lock.acquire()
+        session.state.end_turn()
+        new_turn = session.state.current_turn
+        session.refresh_snapshot()
+        session.card_lock.release()
+
+        session.publish_event(Event.TURN_CHANGED, new_turn)
+
+    elif opcode == Opcode.DRAW_CARDS:
+        target_player = fields[0]
+        check_turn(client, opcode, target_player)
+        session.card_lock.acquire()
+        try:
+            session.state.draw_cards(target_player)
+            encoded_hand = encode_cards(session.get_player_piles(target_player)[0])
+            snapshot = session.refresh_snapshot()
+        finally:
+            session.card_lock.release()
+
+        client.reply(Opcode.DRAW_CARDS, tail=encoded_hand)
+        session.publish_event(Event.PILE_COUNTS, *snapshot.pile_counts)
+        if snapshot.game_result != GameResult.UNDETERMINED:
+            session.publish_event(Event.GAME_OVER, snapshot.game_result)
+
+    elif opcode == Opcode.MOVE_CARD:
+        target_player, moving_from, moving_to, deck_index, card_index = fields
+        check_turn(client, opcode, target_player)
+        session.card_lock.acquire()
+        try:
+            moved_card = session.move_card(target_player, moving_from, moving_to, deck_index, card_index)
+            snapshot = session.refresh_snapshot()
+        finally:
+            session.card_lock.release()
+
+        if moving_from == Pile.PAYOFF_PILE:
+            # Subscribers learn the newly flipped payoff card along with the move
+            next_top_card = snapshot.get_payoff_pile_top(target_player)
+        else:
+            next_top_card = b""
+        session.publish_event(Event.CARD_MOVED, target_player, moving_from, moving_to, deck_index, card_index, tail=next_top_card)
+        session.publish_event(Event.PILE_COUNTS, *snapshot.pile_counts)
+        if snapshot.game_result != GameResult.UNDETERMINED:
+            session.publish_event(Event.GAME_OVER, snapshot.game_result)
+
+        if target_player == 1:
+            session.player1_moves_queue.append((moving_from, moving_to, moved_card))
+        elif target_player == 2:
+            session.player2_moves_queue.append((moving_from, moving_to, moved_card))
+
+    elif opcode == Opcode.SUBSCRIBE:
+        if client.player_number == 0:
+            raise ServerError("Client subscribed to game events before joining the game")
+
+        client.subscribed = True
+        session.event_subscribers_lock.acquire()
+        session.event_subscribers[client.player_number] = client
+        session.event_subscribers_lock.release()
+
+        # Bring the new subscriber up to date, later changes are pushed as they happen
+        turn = session.publish_current_turn()
+        snapshot = session.snapshot
+
+        with client.send_lock:
+            client.push_event(Event.PILE_COUNTS, *snapshot.pile_counts)
+            client.push_event(Event.TURN_CHANGED, turn)
+            if snapshot.game_result != GameResult.UNDETERMINED:
+                client.push_event(Event.GAME_OVER, snapshot.game_result)
+
+    elif opcode == Opcode.UNSUBSCRIBE:
+        # Unsubscribing and replying under the send lock guarantees no event follows the reply
+        with client.send_lock:
+            client.subscribed = False
+            session.event_subscribers_lock.acquire()
+            session.event_subscribers.pop(client.player_number, None)
+            session.event_subscribers_lock.release()
+            client.reply(Opcode.UNSUBSCRIBE)
 
-    player_number = 0
+    else:
+        print(f"[*] Client {client.address[0]}:{client.address[1]} sent incorrect data", flush=True)
+        raise ServerError("Incorrect data received from client")
+
+def configure_bots(fill_delay: float, port: int) -> None:
+    global bot_fill_delay, bot_port
+    bot_fill_delay = fill_delay
+    bot_port = port
+
+def start_bot(table_id: int) -> None:
+    # The bot connects like any other player, so it also works with asyncio and worker processes.
+    # It keeps accepting re-matches until its opponent stops.
+    bot = BotPlayer("127.0.0.1", bot_port, table_id, max_games=0)
+    threading.Thread(target=run_bot, args=(bot,), daemon=True).start()
+
+def join_table(table_id: int, lock_type: type = threading.Lock) -> tuple[GameSession, int]:
+    # Returns the table's session and the player number assigned, 0 if the table is full
+    sessions_lock.acquire()
+    session = sessions.get(table_id)
+    if session is None:
+        session = GameSession(table_id, lock_type)
+        sessions[table_id] = session
+    session.connection_count_lock.acquire()
+    if session.connection_count == 2:
+        player_number = 0
+    else:
+        session.connection_count += 1
+        player_number = session.connection_count
+    session.connection_count_lock.release()
+    sessions_lock.release()
+    return session, player_number
+
+def disconnect_client(client: ClientConnection) -> None:
+    session = client.session
+    if session is None:
+        # Never joined a table, so there is no game state to clean up
+        return
+
+    client.subscribed = False
+    session.event_subscribers_lock.acquire()
+    session.event_subscribers.pop(client.player_number, None)
+    session.event_subscribers_lock.release()
+    session.publish_event(Event.PLAYER_DISCONNECTED, client.player_number)
+
+    sessions_lock.acquire()
+    session.connection_count_lock.acquire()
+    session.connection_count -= 1
+    if session.connection_count == 0:
+        # Last player left, the next player to join this table starts a fresh session
+        del sessions[session.table_id]
+        print(f"[*] Table {session.table_id} closed", flush=True)
+    session.connection_count_lock.release()
+    sessions_lock.release()
+    session.card_lock.acquire()
+    session.state.current_turn = 0
+    session.refresh_snapshot()
+    session.card_lock.release()
+
+def handle_client(client_socket: socket.socket, client_address: tuple[str, int], deck_template: list[int], num_decks: int, payoff_pile_size: int, handed_off_request: bytes = b"") -> None:
+    client = ThreadedClientConnection(client_socket, client_address)
+    receive_buffer = ReceiveBuffer()
+    # A reply and the events after it are separate small writes, don't let Nagle hold them back
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     print(f"[+] Accepted connection from {client_address[0]}:{client_address[1]}", flush=True)
 
     try:
+        if handed_off_request:
+            # The front listener already read this request to pick the worker for the table
+            opcode, fields, tail = decode_message(REQUEST_FORMATS, Opcode, handed_off_request)
+            process_request(client, opcode, fields, tail, deck_template, num_decks, payoff_pile_size)
+
         while True:
-            request = receive_message(client_socket)
-            if not request:
+            request = receive_request(client_socket, receive_buffer)
+            if request is None:
                 print("[*] Client disconnected!", flush=True)
                 break
 
-            elif "Player ready!" in request:
-                connection_count_lock.acquire()
-                if connection_count == 2:
-                    send_message(client_socket, "Game lobby is full")
-                    connection_count_lock.release()
-                else:
-                    connection_count += 1
-                    player_number = connection_count
-                    connection_count_lock.release()
-
-                    player_name_match = re.search(r"Name: (.*)", request)
-                    if player_name_match:
-                        if player_number == 1:
-                            player1_name = player_name_match.group(1)
-                            print(f"[*] Player {player_number} ({player1_name}) has joined the game", flush=True)
-                            send_message(client_socket,f"You are player {player_number}")
-                        elif player_number == 2:
-                            player2_name = player_name_match.group(1)
-                            print(f"[*] Player {player_number} ({player2_name}) has joined the game", flush=True)
-                            send_message(client_socket,f"You are player {player_number}")
-                        else:
-                            raise ServerError("Player number cannot be 0!")
-                    else:
-                        raise ServerError("Received an invalid player name")
-
-            # Note: This request should only be sent by the player 1 client
-            elif request == "Has player 2 joined?":
-                connection_count_lock.acquire()
-                if connection_count == 2:
-                    connection_count_lock.release()
-                    send_message(client_socket, "Player 2 has joined")
-                else:
-                    connection_count_lock.release()
-                    send_message(client_socket, "Waiting for player 2")
-
-            elif "What is player" in request and "name" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError("Could not parse target player ID from client data")
-
-                if target_player == 1:
-                    send_message(client_socket, player1_name)
-                elif target_player == 2:
-                    send_message(client_socket, player2_name)
-                else:
-                    raise ServerError(f"Invalid player ID ({target_player}) specified in client data")
-
-            elif "Player" in request and "did not want a re-match" in request:
-                target_player = 0
-                pattern = r"Player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-
-                if target_player == 1:
-                    player1_rematch = False
-                elif target_player == 2:
-                    player2_rematch = False
-
-            elif "Player" in request and "wants a re-match" in request:
-                target_player = 0
-                pattern = r"Player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-
-                if target_player == 1:
-                    player1_rematch = True
-                elif target_player == 2:
-                    player2_rematch = True
-
-            elif "Does player" in request and "also want a re-match?" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-
-                if target_player == 1:
-                    if player1_rematch is True:
-                        send_message(client_socket, "Yes")
-                    elif player1_rematch is False:
-                        send_message(client_socket, "No")
-                    else:
-                        send_message(client_socket, "Undecided")
-                elif target_player == 2:
-                    if player2_rematch is True:
-                        send_message(client_socket, "Yes")
-                    elif player2_rematch is False:
-                        send_message(client_socket, "No")
-                    else:
-                        send_message(client_socket, "Undecided")
-
-            elif request == "Set up a new game":
-                rematch_setup_lock.acquire()
-                if not rematch_setup_complete:
-                    print("[*] New game requested, resetting game parameters...", flush=True)
-                    card_lock.acquire()
-                    deck = []
-                    payoff_pile1 = []
-                    payoff_pile2 = []
-                    build_piles = [[], [], [], []]
-                    player1_discard_piles = [[], [], [], []]
-                    player2_discard_piles = [[], [], [], []]
-                    draw_pile = []
-                    player1_hand = []
-                    player2_hand = []
-                    card_lock.release()
-                    player1_moves_queue.clear()
-                    player2_moves_queue.clear()
-                    player1_draw_count = 0
-                    player2_draw_count = 0
-                    current_turn_lock.acquire()
-                    current_turn = 0
-                    current_turn_lock.release()
-                    rematch_setup_complete = True
-                else:
-                    player1_rematch = None
-                    player2_rematch = None
-                    rematch_setup_complete = False
-                rematch_setup_lock.release()
-
-            elif request == "Draw pile needs to be reshuffled":
-
-                card_lock.acquire()
-
-                draw_pile_needs_to_be_reshuffled = False
-                cards_to_shuffle = []
-                if len(build_piles[0]) == 12:
-                    cards_to_shuffle += build_piles[0]
-                    build_piles[0] = []
-                    draw_pile_needs_to_be_reshuffled = True
-                if len(build_piles[1]) == 12:
-                    cards_to_shuffle += build_piles[1]
-                    build_piles[1] = []
-                    draw_pile_needs_to_be_reshuffled = True
-                if len(build_piles[2]) == 12:
-                    cards_to_shuffle += build_piles[2]
-                    build_piles[2] = []
-                    draw_pile_needs_to_be_reshuffled = True
-                if len(build_piles[3]) == 12:
-                    cards_to_shuffle += build_piles[3]
-                    build_piles[3] = []
-                    draw_pile_needs_to_be_reshuffled = True
-
-                if draw_pile_needs_to_be_reshuffled:
-                    draw_pile += cards_to_shuffle
-                    random.shuffle(draw_pile)
-
-                card_lock.release()
-
-            elif request == "Create new deck and payoff piles":
-                card_lock.acquire()
-
-                if not deck and not payoff_pile1 and not payoff_pile2 and not draw_pile:
-                    # Got the lock, create the deck, payoff piles and draw pile
-                    print(f"[*] Creating the deck (player {player_number} thread)...", flush=True)
-                    full_deck = create_deck(get_path("assets/card_faces"), num_decks)
-                    print(f"[*] Creating the payoff piles and draw pile (player {player_number} thread)...", flush=True)
-                    payoff_pile1, payoff_pile2, draw_pile = deal(full_deck, payoff_pile_size)
-                else:
-                    print(f"[*] Status update from player {player_number} thread: other thread already created decks and piles", flush=True)
-
-                card_lock.release()
-
-            elif request == "Is the other player still connected?":
-                connection_count_lock.acquire()
-                if connection_count == 1:
-                    send_message(client_socket, "No")
-                elif connection_count == 2:
-                    send_message(client_socket, "Yes")
-                connection_count_lock.release()
-
-            elif "How many cards are in player" in request and "hand" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-                card_lock.acquire()
-                if target_player == 1:
-                    send_message(client_socket, str(len(player1_hand)))
-                elif target_player == 2:
-                    send_message(client_socket, str(len(player2_hand)))
-                card_lock.release()
-
-            elif "How many cards are left in player" in request and "payoff pile?" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-
-                card_lock.acquire()
-
-                if target_player == 1:
-                    send_message(client_socket, str(len(payoff_pile1)))
-                elif target_player == 2:
-                    send_message(client_socket, str(len(payoff_pile2)))
-
-                card_lock.release()
-
-            elif "Send the top card of player" in request and "payoff pile" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError(
-                        "Could not parse target player ID from client data")
-
-                card_lock.acquire()
-                if target_player == 1:
-                    send_cards(client_socket, [payoff_pile1[-1]])
-                elif target_player == 2:
-                    send_cards(client_socket, [payoff_pile2[-1]])
-                card_lock.release()
-
-            elif request == "Has the game result been determined?":
-                card_lock.acquire()
-                if not payoff_pile1 or not payoff_pile2 or not draw_pile:
-                    send_message(client_socket, "Yes")
-                else:
-                    send_message(client_socket, "No")
-                card_lock.release()
-
-            elif request == "Who won the game?":
-                card_lock.acquire()
-                if not payoff_pile1:
-                    send_message(client_socket, "Player 1")
-                elif not payoff_pile2:
-                    send_message(client_socket, "Player 2")
-                elif not draw_pile and len(payoff_pile1) < len(payoff_pile2):
-                    send_message(client_socket, "Player 1")
-                elif not draw_pile and len(payoff_pile1) > len(payoff_pile2):
-                    send_message(client_socket, "Player 2")
-                elif not draw_pile and len(payoff_pile1) == len(payoff_pile2):
-                    send_message(client_socket, "Stalemate")
-                card_lock.release()
-
-            elif request == "How many cards are left in the draw pile?":
-
-                card_lock.acquire()
-                send_message(client_socket, str(len(draw_pile)))
-                card_lock.release()
-
-            elif "What was" in request and "last move" in request:
-                target_player = 0
-                pattern = r"player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).isdigit():
-                    target_player = int(first_match.group(1))
-                else:
-                    raise ServerError("Invalid player ID specified in request")
-
-                if target_player == 1:
-                    if player1_moves_queue:
-                        last_move = player1_moves_queue.popleft()
-                        send_message(client_socket, last_move[0])
-                        if last_move[1] is not None:
-                            send_cards(client_socket, [last_move[1]])
-                    else:
-                        send_message(client_socket, "Nothing")
-                elif target_player == 2:
-                    if player2_moves_queue:
-                        last_move = player2_moves_queue.popleft()
-                        send_message(client_socket, last_move[0])
-                        if last_move[1] is not None:
-                            send_cards(client_socket, [last_move[1]])
-                    else:
-                        send_message(client_socket, "Nothing")
-                else:
-                    # Should never get here but raise an exception just in case
-                    raise ServerError("Invalid player ID specified in request")
-
-            elif request == "Whose turn is it?":
-                current_turn_lock.acquire()
-                if current_turn == 0:
-                    if payoff_pile1[-1].rank > payoff_pile2[-1].rank:
-                        current_turn = 1
-                    elif payoff_pile1[-1].rank < payoff_pile2[-1].rank:
-                        current_turn = 2
-                    elif payoff_pile1[-1].rank == payoff_pile2[-1].rank:
-                        current_turn = random.randint(1, 2)
-                send_message(client_socket, f"Player {current_turn}")
-                current_turn_lock.release()
-
-            elif "ended their turn" in request:
-                current_turn_lock.acquire()
-                if current_turn == 1:
-                    player1_draw_count = 0
-                    current_turn = 2
-                elif current_turn == 2:
-                    player2_draw_count = 0
-                    current_turn = 1
-                current_turn_lock.release()
-
-            elif "Player" in request and "draws 5 cards" in request:
-                target_player = 0
-                pattern = r"Player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError("Invalid player ID specified in draw request")
-                card_lock.acquire()
-                if target_player == 1:
-                    for _ in range(0, 5, 1):
-                        player1_hand.append(draw_pile.pop())
-                    send_cards(client_socket, player1_hand)
-                elif target_player == 2:
-                    for _ in range(0, 5, 1):
-                        player2_hand.append(draw_pile.pop())
-                    send_cards(client_socket, player2_hand)
-
-                card_lock.release()
-
-                if target_player == 1:
-                    player1_draw_count += 5
-                elif target_player == 2:
-                    player2_draw_count += 5
-
-            elif "moved" in request and "from their" in request:
-                last_card_moved_from_hand = None
-                target_player = 0
-                pattern = r"Player (\d)"
-                first_match = re.search(pattern, request)
-                if first_match and first_match.group(1).strip().isdigit():
-                    target_player = int(first_match.group(1).strip())
-                else:
-                    raise ServerError("Invalid player ID specified in move request")
-                card_name = ""
-                pattern = r"moved\b(.*)\bfrom"
-                first_match = re.search(pattern, request)
-                if first_match:
-                    card_name = first_match.group(1).strip()
-                else:
-                    raise ServerError("Invalid card name specified in move request")
-                moving_from = ""
-                pattern = r"their\b(.*)\bto"
-                first_match = re.search(pattern, request)
-                if first_match:
-                    moving_from = first_match.group(1).strip()
-                else:
-                    raise ServerError("Invalid 'moving from' location specified in move request")
-                moving_to = ""
-                pattern = r"to\b(.*)$"
-                first_match = re.search(pattern, request)
-                if first_match:
-                    moving_to = first_match.group(1).strip()
-                else:
-                    raise ServerError("Invalid 'moving to' location specified in move request")
-
-                if target_player == 1:
-                    if moving_from == "hand":
-                        if moving_to == "discard pile 0":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player1_discard_piles[0].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 1":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player1_discard_piles[1].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 2":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player1_discard_piles[2].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 3":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player1_discard_piles[3].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 0":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[0].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[1].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[2].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player1_hand if card.name == card_name][0]
-                            player1_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[3].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        else:
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 0":
-                        card_lock.acquire()
-                        card_to_move = player1_discard_piles[0][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 0 did not match card name in move request")
-                        player1_discard_piles[0].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 1":
-                        card_lock.acquire()
-                        card_to_move = player1_discard_piles[1][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 1 did not match card name in move request")
-                        player1_discard_piles[1].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 2":
-                        card_lock.acquire()
-                        card_to_move = player1_discard_piles[2][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 2 did not match card name in move request")
-                        player1_discard_piles[2].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 3":
-                        card_lock.acquire()
-                        card_to_move = player1_discard_piles[3][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 3 did not match card name in move request")
-                        player1_discard_piles[3].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-
-                    elif moving_from == "payoff pile":
-                        card_lock.acquire()
-                        card_to_move = payoff_pile1[-1]
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on payoff pile did not match card name in move request")
-                        payoff_pile1.pop()
-
-                        if payoff_pile1:
-                            # Flip over next card
-                            payoff_pile1[-1].position = CardPosition.FACE_UP
-
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    else:
-                        raise ServerError("Invalid 'moving from' location specified in move request")
-
-                    if moving_from == "hand":
-                        player1_moves_queue.append((f"Player 1 moved {card_name} from {moving_from} to {moving_to}", last_card_moved_from_hand))
-                    else:
-                        player1_moves_queue.append((f"Player 1 moved {card_name} from {moving_from} to {moving_to}", None))
-
-                elif target_player == 2:
-                    if moving_from == "hand":
-                        if moving_to == "discard pile 0":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player2_discard_piles[0].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 1":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player2_discard_piles[1].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 2":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player2_discard_piles[2].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "discard pile 3":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            player2_discard_piles[3].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 0":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[0].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[1].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[2].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            card_lock.acquire()
-                            # if multiple items in list take first one
-                            card_to_move = [card for card in player2_hand if card.name == card_name][0]
-                            player2_hand.remove(card_to_move)
-                            card_to_move.position = CardPosition.FACE_UP
-                            build_piles[3].append(card_to_move)
-                            last_card_moved_from_hand = card_to_move
-                            card_lock.release()
-                        else:
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 0":
-                        card_lock.acquire()
-                        card_to_move = player2_discard_piles[0][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 0 did not match card name in move request")
-                        player2_discard_piles[0].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 1":
-                        card_lock.acquire()
-                        card_to_move = player2_discard_piles[1][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 1 did not match card name in move request")
-                        player2_discard_piles[1].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 2":
-                        card_lock.acquire()
-                        card_to_move = player2_discard_piles[2][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 2 did not match card name in move request")
-                        player2_discard_piles[2].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    elif moving_from == "discard pile 3":
-                        card_lock.acquire()
-                        card_to_move = player2_discard_piles[3][-1]
-                        # Top card should have the same name as the card in the move request
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on discard pile 3 did not match card name in move request")
-                        player2_discard_piles[3].pop()
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-
-                    elif moving_from == "payoff pile":
-                        card_lock.acquire()
-                        card_to_move = payoff_pile2[-1]
-                        if card_to_move.name != card_name:
-                            raise ServerError("Name of top card on payoff pile did not match card name in move request")
-                        payoff_pile2.pop()
-                        if payoff_pile2:
-                            # Flip over next card
-                            payoff_pile2[-1].position = CardPosition.FACE_UP
-                        if moving_to == "build pile 0":
-                            build_piles[0].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 1":
-                            build_piles[1].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 2":
-                            build_piles[2].append(card_to_move)
-                            card_lock.release()
-                        elif moving_to == "build pile 3":
-                            build_piles[3].append(card_to_move)
-                            card_lock.release()
-                        else:
-                            card_lock.release()
-                            raise ServerError("Invalid 'moving to' location specified in move request")
-                    else:
-                        raise ServerError("Invalid 'moving from' location specified in move request")
-
-                    if moving_from == "hand":
-                        player2_moves_queue.append((f"Player 2 moved {card_name} from {moving_from} to {moving_to}", last_card_moved_from_hand))
-                    else:
-                        player2_moves_queue.append((f"Player 2 moved {card_name} from {moving_from} to {moving_to}", None))
+            opcode, fields, tail = request
+            process_request(client, opcode, fields, tail, deck_template, num_decks, payoff_pile_size)
 
+    except (ServerError, ProtocolError) as se:
+        print(f"[*] Error handling client {client_address[0]}:{client_address[1]}: {se}", flush=True)
+    except ConnectionResetError:
+        print("[*] Connection reset by client (client disconnected)", flush=True)
+    except BrokenPipeError:
+        print("[*] Client disconnected in the middle of an operation", flush=True)
+    finally:
+        client_socket.close()
+        disconnect_client(client)
+        print(f"[-] Connection with {client_address[0]}:{client_address[1]} closed.", flush=True)
 
-            else:
-                print(f"[*] Client {client_address[0]}:{client_address[1]} sent incorrect data", flush=True)
-                raise ServerError("Incorrect data received from client")
+async def handle_client_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, deck_template: list[int], num_decks: int, payoff_pile_size: int, handed_off_request: bytes = b"") -> None:
+    client_address = writer.get_extra_info("peername")
+    client = AsyncClientConnection(writer, client_address)
+
+    print(f"[+] Accepted connection from {client_address[0]}:{client_address[1]}", flush=True)
+
+    try:
+        if handed_off_request:
+            # The front listener already read this request to pick the worker for the table
+            opcode, fields, tail = decode_message(REQUEST_FORMATS, Opcode, handed_off_request)
+            process_request(client, opcode, fields, tail, deck_template, num_decks, payoff_pile_size)
+            await writer.drain()
+
+        while True:
+            request = await async_receive_request(reader)
+            if request is None:
+                print("[*] Client disconnected!", flush=True)
+                break
+
+            opcode, fields, tail = request
+            # Runs to completion on the event loop, so no other client sees the game state half updated
+            process_request(client, opcode, fields, tail, deck_template, num_decks, payoff_pile_size)
+            await writer.drain()
 
-    except ServerError as se:
+    except (ServerError, ProtocolError) as se:
         print(f"[*] Error handling client {client_address[0]}:{client_address[1]}: {se}", flush=True)
     except ConnectionResetError:
-        print(f"[*] Connection reset by client (client disconnected)", flush=True)
+        print("[*] Connection reset by client (client disconnected)", flush=True)
     except BrokenPipeError:
-        print(f"[*] Client disconnected in the middle of an operation", flush=True)
+        print("[*] Client disconnected in the middle of an operation", flush=True)
     finally:
-        client_socket.close()
-        connection_count_lock.acquire()
-        connection_count -= 1
-        if connection_count == 0:
-            card_lock.acquire()
-            deck = []
-            payoff_pile1 = []
-            payoff_pile2 = []
-            draw_pile = []
-            player1_hand = []
-            player2_hand = []
-            build_piles = [[], [], [], []]
-            player1_discard_piles = [[], [], [], []]
-            player2_discard_piles = [[], [], [], []]
-            card_lock.release()
-            player1_name = ""
-            player2_name = ""
-            player1_moves_queue.clear()
-            player2_moves_queue.clear()
-            player1_draw_count = 0
-            player2_draw_count = 0
-            player1_rematch = None
-            player2_rematch = None
-        connection_count_lock.release()
-        current_turn_lock.acquire()
-        current_turn = 0
-        current_turn_lock.release()
+        writer.close()
+        disconnect_client(client)
         print(f"[-] Connection with {client_address[0]}:{client_address[1]} closed.", flush=True)
 
+def report_bind_error(ose: OSError, valid_port: int) -> None:
+    if "Address already in use" in str(ose):
+        print(f"[*] Error binding to address {HOST}:{valid_port}: Address already in use", flush=True)
+    elif "Permission denied" in str(ose):
+        # Should never reach here due to prior error checking
+        print(f"[*] Error binding to valid_port {valid_port}: Did you specify a privileged port?", flush=True)
+    elif "Invalid argument" in str(ose):
+        # Should never reach here due to prior error checking
+        print(f"[*] Error binding to port {valid_port}: Invalid port number specified", flush=True)
+
 def run_server(valid_port: int, num_decks: int, payoff_pile_size: int) -> None:
 
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
+    deck_template = create_deck_template(get_path("assets/card_faces"))
+
     try:
 
         server.bind((HOST, valid_port))
-        server.listen(2)
+        # Players for many tables can be connecting at once
+        server.listen(socket.SOMAXCONN)
         server.settimeout(1)
         print(f"[*] Listening on {HOST}:{valid_port}", flush=True)
 
         while True:
             try:
                 client_socket, addr = server.accept()
-                client_handler = threading.Thread(target=handle_client, args=(client_socket, addr, num_decks, payoff_pile_size,))
+                client_handler = threading.Thread(target=handle_client, args=(client_socket, addr, deck_template, num_decks, payoff_pile_size,))
                 client_handler.start()
             except socket.timeout:
                 pass
     except KeyboardInterrupt:
         print("\n[*] KeyboardInterrupt received. Server shutting down...", flush=True)
     except OSError as ose:
-        if "Address already in use" in str(ose):
-            print(f"[*] Error binding to address {HOST}:{valid_port}: Address already in use", flush=True)
-        elif "Permission denied" in str(ose):
-            # Should never reach here due to prior error checking
-            print(f"[*] Error binding to valid_port {valid_port}: Did you specify a privileged port?", flush=True)
-        elif "Invalid argument" in str(ose):
-            # Should never reach here due to prior error checking
-            print(f"[*] Error binding to port {valid_port}: Invalid port number specified", flush=True)
+        report_bind_error(ose, valid_port)
     finally:
         server.close()
 
+async def serve_async(valid_port: int, deck_template: list[int], num_decks: int, payoff_pile_size: int) -> None:
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client_async(reader, writer, deck_template, num_decks, payoff_pile_size),
+        HOST, valid_port)
+    print(f"[*] Listening on {HOST}:{valid_port} (asyncio)", flush=True)
+
+    async with server:
+        await server.serve_forever()
+
+def run_async_server(valid_port: int, num_decks: int, payoff_pile_size: int) -> None:
+    deck_template = create_deck_template(get_path("assets/card_faces"))
+
+    try:
+        asyncio.run(serve_async(valid_port, deck_template, num_decks, payoff_pile_size))
+    except KeyboardInterrupt:
+        print("\n[*] KeyboardInterrupt received. Server shutting down...", flush=True)
+    except OSError as ose:
+        report_bind_error(ose, valid_port)
+
+def receive_handoff(channel: socket.socket) -> tuple[bytes, socket.socket | None, tuple[str, int] | None] | None:
+    # Returns None once the front listener has closed its end of the channel,
+    # and no socket if the client hung up while it was being handed over
+    handed_off_request, fds, _, _ = socket.recv_fds(channel, MAX_HANDOFF_SIZE, 1)
+    if not fds:
+        return None
+    client_socket = socket.socket(fileno=fds[0])
+    try:
+        client_address = client_socket.getpeername()
+    except OSError:
+        client_socket.close()
+        return handed_off_request, None, None
+    return handed_off_request, client_socket, client_address
+
+async def serve_handoffs_async(channel: socket.socket, deck_template: list[int], num_decks: int, payoff_pile_size: int) -> None:
+    loop = asyncio.get_running_loop()
+    # The event loop only keeps weak references to tasks
+    client_tasks = set()
+
+    while True:
+        # recv_fds has no event loop counterpart, wait for handoffs on an executor thread
+        handoff = await loop.run_in_executor(None, receive_handoff, channel)
+        if handoff is None:
+            break
+        handed_off_request, client_socket, _ = handoff
+        if client_socket is None:
+            continue
+        reader, writer = await asyncio.open_connection(sock=client_socket)
+        client_task = asyncio.create_task(handle_client_async(reader, writer, deck_template, num_decks, payoff_pile_size, handed_off_request))
+        client_tasks.add(client_task)
+        client_task.add_done_callback(client_tasks.discard)
+
+def run_worker(worker_index: int, channel: socket.socket, num_decks: int, payoff_pile_size: int, engine: str, fill_delay: float, port: int) -> None:
+    # Runs in a worker process, serving every table the front listener routes to it
+    configure_bots(fill_delay, port)
+    deck_template = create_deck_template(get_path("assets/card_faces"))
+    print(f"[*] Worker {worker_index} started (pid {os.getpid()}, {engine})", flush=True)
+
+    try:
+        if engine == "asyncio":
+            asyncio.run(serve_handoffs_async(channel, deck_template, num_decks, payoff_pile_size))
+            return
+
+        while True:
+            handoff = receive_handoff(channel)
+            if handoff is None:
+                break
+            handed_off_request, client_socket, client_address = handoff
+            if client_socket is None:
+                continue
+            client_handler = threading.Thread(target=handle_client, args=(client_socket, client_address, deck_template, num_decks, payoff_pile_size, handed_off_request,))
+            client_handler.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        channel.close()
+
+def start_worker(worker_index: int, num_decks: int, payoff_pile_size: int, engine: str) -> tuple[multiprocessing.Process, socket.socket]:
+    # Datagram socket pair so each handed over socket arrives with exactly its own request
+    front_channel, worker_channel = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    # Spawned rather than forked so the worker does not inherit the listener or the routing threads
+    worker = multiprocessing.get_context("spawn").Process(target=run_worker, args=(worker_index, worker_channel, num_decks, payoff_pile_size, engine, bot_fill_delay, bot_port,), daemon=True)
+    worker.start()
+    worker_channel.close()
+    return worker, front_channel
+
+def route_client(client_socket: socket.socket, client_address: tuple[str, int], worker_channels: list[socket.socket], worker_channel_locks: list[threading.Lock]) -> None:
+    # Every player at a table must land on the same worker, so route on the table id in PLAYER_READY
+    try:
+        client_socket.settimeout(ROUTING_TIMEOUT)
+        payload = receive_packet(client_socket)
+        if payload is None:
+            print(f"[*] Client {client_address[0]}:{client_address[1]} disconnected before joining a table", flush=True)
+            return
+        if len(payload) > MAX_HANDOFF_SIZE:
+            raise ServerError("First request is too large to hand to a worker")
+        opcode, fields, _ = decode_message(REQUEST_FORMATS, Opcode, payload)
+        if opcode != Opcode.PLAYER_READY:
+            raise ServerError(f"Expected PLAYER_READY as the first request but received {opcode.name}")
+        client_socket.settimeout(None)
+
+        worker_index = fields[1] % len(worker_channels)
+        worker_channel_locks[worker_index].acquire()
+        try:
+            socket.send_fds(worker_channels[worker_index], [bytes(payload)], [client_socket.fileno()])
+        finally:
+            worker_channel_locks[worker_index].release()
+    except (ServerError, ProtocolError) as se:
+        print(f"[*] Error routing client {client_address[0]}:{client_address[1]}: {se}", flush=True)
+    except (socket.timeout, OSError) as ose:
+        print(f"[*] Could not hand client {client_address[0]}:{client_address[1]} to a worker: {ose}", flush=True)
+    finally:
+        # The worker holds its own copy of the socket from here on
+        client_socket.close()
+
+def supervise_workers(workers: list[multiprocessing.Process], worker_channels: list[socket.socket], worker_channel_locks: list[threading.Lock], num_decks: int, payoff_pile_size: int, engine: str) -> None:
+    for worker_index, worker in enumerate(workers):
+        if worker.is_alive():
+            continue
+        print(f"[-] Worker {worker_index} exited with code {worker.exitcode}, its tables were lost. Restarting...", flush=True)
+        new_worker, new_channel = start_worker(worker_index, num_decks, payoff_pile_size, engine)
+        worker_channel_locks[worker_index].acquire()
+        worker_channels[worker_index].close()
+        worker_channels[worker_index] = new_channel
+        worker_channel_locks[worker_index].release()
+        workers[worker_index] = new_worker
+
+def run_sharded_server(valid_port: int, num_decks: int, payoff_pile_size: int, num_workers: int, engine: str) -> None:
+    # Front listener and supervisor. Tables are spread over worker processes by table id,
+    # so game logic is not limited to the one core a single process can use.
+    workers = []
+    worker_channels = []
+    worker_channel_locks = []
+    for worker_index in range(0, num_workers, 1):
+        worker, front_channel = start_worker(worker_index, num_decks, payoff_pile_size, engine)
+        workers.append(worker)
+        worker_channels.append(front_channel)
+        worker_channel_locks.append(threading.Lock())
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    try:
+
+        server.bind((HOST, valid_port))
+        server.listen(socket.SOMAXCONN)
+        server.settimeout(1)
+        print(f"[*] Listening on {HOST}:{valid_port} ({num_workers} {engine} worker processes)", flush=True)
+
+        while True:
+            supervise_workers(workers, worker_channels, worker_channel_locks, num_decks, payoff_pile_size, engine)
+            try:
+                client_socket, addr = server.accept()
+                router = threading.Thread(target=route_client, args=(client_socket, addr, worker_channels, worker_channel_locks,), daemon=True)
+                router.start()
+            except socket.timeout:
+                pass
+    except KeyboardInterrupt:
+        print("\n[*] KeyboardInterrupt received. Server shutting down...", flush=True)
+    except OSError as ose:
+        report_bind_error(ose, valid_port)
+    finally:
+        server.close()
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+        for front_channel in worker_channels:
+            front_channel.close()
+
 def main():
 
     unknown_os = False
@@ -916,6 +865,12 @@ def main():
     port = 0
     decks = 0
     payoff_pile_size = 0
+    # Optional config file settings, "threads" (one thread per client) or "asyncio",
+    # the number of worker processes to spread tables over and the seconds before
+    # a bot fills an empty seat
+    engine = "threads"
+    workers = 1
+    fill_delay = 0
 
     try:
         if config_file_path.exists():
@@ -923,10 +878,16 @@ def main():
             with open(config_file_path, "rb") as config_file:
                 data = tomllib.load(config_file)
             if ("port" in data and 32768 <= data["port"] <= 65535 and "decks" in data and 2 <= data["decks"] <= 6
-                    and "payoff_pile_size" in data and 20 <= data["payoff_pile_size"] <= 30):
+                    and "payoff_pile_size" in data and 20 <= data["payoff_pile_size"] <= 30
+                    and data.get("engine", "threads") in ("threads", "asyncio")
+                    and isinstance(data.get("workers", 1), int) and 1 <= data.get("workers", 1) <= 256
+                    and isinstance(data.get("bot_fill_delay", 0), (int, float)) and 0 <= data.get("bot_fill_delay", 0) <= 3600):
                 port = data["port"]
                 decks = data["decks"]
                 payoff_pile_size = data["payoff_pile_size"]
+                engine = data.get("engine", "threads")
+                workers = data.get("workers", 1)
+                fill_delay = data.get("bot_fill_delay", 0)
             else:
                 print("Config file contains incorrect data, rewriting config file with new input")
                 receiving_port_input = True
@@ -989,7 +950,18 @@ def main():
 
                 print(f"Wrote new config file to {str(config_file_path)}", flush=True)
 
-        run_server(port, decks, payoff_pile_size)
+        if workers > 1 and not hasattr(socket, "send_fds"):
+            print("[*] Worker processes need socket handoff, which this platform does not support. Running a single process.", flush=True)
+            workers = 1
+
+        configure_bots(fill_delay, port)
+
+        if workers > 1:
+            run_sharded_server(port, decks, payoff_pile_size, workers, engine)
+        elif engine == "asyncio":
+            run_async_server(port, decks, payoff_pile_size)
+        else:
+            run_server(port, decks, payoff_pile_size)
 
     except KeyboardInterrupt:
         print("\nExiting...", flush=True)
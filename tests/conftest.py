@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run from the repository root so the modules and the server's assets are found
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)
@@ -0,0 +1,53 @@
+import random
+
+from bot import BotPlayer
+from engine import card_identity, clear_completed_build_piles
+from protocol import Pile
+from spite_and_malice_server import GameSession
+
+
+def sync_bot(bot: BotPlayer, session: GameSession) -> None:
+    # Gives the bot what its events and replies would have told it
+    state = session.state
+    bot.hand = list(state.hands[bot.player_number - 1])
+    bot.build_piles = [list(build_pile) for build_pile in state.build_piles]
+    bot.discard_piles = [[list(discard_pile) for discard_pile in discard_piles] for discard_piles in state.discard_piles]
+    bot.payoff_pile_tops = [payoff_pile[-1] if payoff_pile else None for payoff_pile in state.payoff_piles]
+    bot.pile_counts = session.get_pile_counts()
+
+def test_server_accepts_every_bot_move():
+    for seed in range(0, 5, 1):
+        session = GameSession(seed)
+        session.state.rng = random.Random(seed)
+        session.state.deal(2, 20)
+        bots = [BotPlayer("127.0.0.1", 0, seed, budget=0.002), BotPlayer("127.0.0.1", 0, seed, budget=0.002)]
+        for player_number, bot in enumerate(bots, 1):
+            bot.player_number = player_number
+            bot.opponent_player = 3 - player_number
+        state = session.state
+        state.decide_first_player()
+        moves_played = 0
+
+        while not state.is_over() and moves_played < 3000:
+            player = state.current_turn
+            hand = state.hands[player - 1]
+            if not hand:
+                # What the server does on DRAW_CARDS
+                state.draw_cards(player)
+                continue
+
+            bot = bots[player - 1]
+            sync_bot(bot, session)
+            moving_from, moving_to, moved_card = bot.choose_move()
+            assert session.move_card(player, moving_from, moving_to, *card_identity(moved_card)) == moved_card
+            moves_played += 1
+
+            completed_cards = clear_completed_build_piles(state.build_piles)
+            if completed_cards:
+                # What the server does on RESHUFFLE_DRAW_PILE
+                state.return_to_draw_pile(completed_cards)
+            if Pile.DISCARD_PILE_0 <= moving_to <= Pile.DISCARD_PILE_3:
+                # What the server does on END_TURN
+                state.end_turn()
+
+        assert state.is_over()
@@ -0,0 +1,156 @@
+import random
+from array import array
+
+import pytest
+
+from engine import COMPLETE_BUILD_PILE_SIZE, HAND_SIZE, EngineError, GameState, Hand, card_id
+from protocol import Pile, GameResult
+
+
+def card_of_rank(rank: int, deck_index: int = 0) -> int:
+    # Clubs of the given rank, ace is 1 and king 13
+    return card_id(deck_index, rank - 1)
+
+def make_state(hand: list[int] = (), payoff_pile: list[int] = (), draw_pile_size: int = 20) -> GameState:
+    # Player 1 to move with the given hand and payoff pile, player 2 has a king on their payoff pile
+    state = GameState(random.Random(1))
+    state.current_turn = 1
+    state.turn_count = 1
+    state.hands[0] = Hand(hand)
+    state.hands[1] = Hand([card_of_rank(5, 1)])
+    state.payoff_piles[0] = array("H", payoff_pile or [card_of_rank(9, 2)])
+    state.payoff_piles[1] = array("H", [card_of_rank(13, 2)])
+    state.draw_pile = array("H", [card_id(3, i) for i in range(0, draw_pile_size, 1)])
+    return state
+
+
+def test_hand_card_onto_empty_build_pile():
+    ace = card_of_rank(1)
+    state = make_state([ace, card_of_rank(7)])
+    state.apply_move(Pile.HAND, Pile.BUILD_PILE_2, ace)
+    assert list(state.build_piles[2]) == [ace]
+    assert ace not in state.hands[0]
+    assert state.is_face_up(ace)
+    assert state.current_turn == 1
+
+def test_king_is_wild():
+    king = card_of_rank(13)
+    state = make_state([king, card_of_rank(7)])
+    state.build_piles[0] = array("H", [card_of_rank(1, 1), card_of_rank(2, 1)])
+    assert (Pile.HAND, Pile.BUILD_PILE_0, king) in state.legal_moves()
+    state.apply_move(Pile.HAND, Pile.BUILD_PILE_0, king)
+    assert len(state.build_piles[0]) == 3
+
+def test_illegal_rank_is_rejected():
+    five = card_of_rank(5)
+    state = make_state([five])
+    key = state.key()
+    assert (Pile.HAND, Pile.BUILD_PILE_0, five) not in state.legal_moves()
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.HAND, Pile.BUILD_PILE_0, five)
+    assert state.key() == key
+
+def test_card_not_in_hand_is_rejected():
+    state = make_state([card_of_rank(1)])
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.HAND, Pile.BUILD_PILE_0, card_of_rank(1, 1))
+
+def test_only_top_cards_can_be_played():
+    ace = card_of_rank(1)
+    state = make_state([card_of_rank(7)], payoff_pile=[ace, card_of_rank(9, 2)])
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.PAYOFF_PILE, Pile.BUILD_PILE_0, ace)
+    state.discard_piles[0][1] = array("H", [ace, card_of_rank(8)])
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.DISCARD_PILE_1, Pile.BUILD_PILE_0, ace)
+
+def test_only_hand_cards_can_be_discarded():
+    ace = card_of_rank(1)
+    state = make_state([card_of_rank(7)], payoff_pile=[card_of_rank(9, 2), ace])
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.PAYOFF_PILE, Pile.DISCARD_PILE_0, ace)
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.HAND, Pile.PAYOFF_PILE, card_of_rank(7))
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.BUILD_PILE_0, Pile.BUILD_PILE_1, ace)
+
+def test_payoff_card_flips_the_next_one():
+    ace = card_of_rank(1)
+    under = card_of_rank(9, 2)
+    state = make_state([card_of_rank(7)], payoff_pile=[under, ace])
+    state.apply_move(Pile.PAYOFF_PILE, Pile.BUILD_PILE_0, ace)
+    assert list(state.payoff_piles[0]) == [under]
+    assert state.is_face_up(under)
+
+def test_discard_ends_the_turn():
+    seven = card_of_rank(7)
+    state = make_state([seven, card_of_rank(8)])
+    state.apply_move(Pile.HAND, Pile.DISCARD_PILE_3, seven)
+    assert list(state.discard_piles[0][3]) == [seven]
+    assert state.current_turn == 2
+    assert state.turn_count == 2
+    # Discards are only ever played onto build piles
+    assert all(move[0] != Pile.DISCARD_PILE_3 for move in state.legal_moves())
+
+def test_empty_hand_is_refilled():
+    ace = card_of_rank(1)
+    state = make_state([ace])
+    draw_pile_size = len(state.draw_pile)
+    state.apply_move(Pile.HAND, Pile.BUILD_PILE_0, ace)
+    assert len(state.hands[0]) == HAND_SIZE
+    assert len(state.draw_pile) == draw_pile_size - HAND_SIZE
+
+def test_completed_build_pile_returns_to_draw_pile():
+    queen = card_of_rank(12)
+    state = make_state([queen, card_of_rank(7)])
+    state.build_piles[1] = array("H", [card_of_rank(rank, 1) for rank in range(1, COMPLETE_BUILD_PILE_SIZE, 1)])
+    for card in state.build_piles[1]:
+        state.face_up |= 1 << card
+    draw_pile_size = len(state.draw_pile)
+    state.apply_move(Pile.HAND, Pile.BUILD_PILE_1, queen)
+    assert len(state.build_piles[1]) == 0
+    assert len(state.draw_pile) == draw_pile_size + COMPLETE_BUILD_PILE_SIZE
+    assert queen in state.draw_pile
+    assert not state.is_face_up(queen)
+    assert state.reshuffle_count == 1
+
+def test_emptying_the_payoff_pile_wins():
+    ace = card_of_rank(1)
+    state = make_state([card_of_rank(7)], payoff_pile=[ace])
+    state.apply_move(Pile.PAYOFF_PILE, Pile.BUILD_PILE_0, ace)
+    assert state.winner() == GameResult.PLAYER1_WON
+    assert state.legal_moves() == []
+    with pytest.raises(EngineError):
+        state.apply_move(Pile.HAND, Pile.DISCARD_PILE_0, card_of_rank(7))
+
+def test_every_legal_move_applies():
+    # Random games where each move is picked from legal_moves must never be rejected
+    for seed in range(0, 20, 1):
+        rng = random.Random(seed)
+        state = GameState.new_game(2, 20, rng)
+        for _ in range(0, 2000, 1):
+            moves = state.legal_moves()
+            if not moves:
+                break
+            copy = state.copy()
+            state.apply_move(*rng.choice(moves))
+            assert copy.key() != state.key()
+        assert all(0 <= len(build_pile) < COMPLETE_BUILD_PILE_SIZE for build_pile in state.build_piles)
+
+def test_draw_cards_counts_what_was_drawn():
+    state = make_state([], draw_pile_size=7)
+    assert state.draw_cards(1) == HAND_SIZE
+    assert state.draw_cards(1) == 2
+    assert len(state.hands[0]) == 7
+    assert state.draw_counts == [7, 0]
+    state.end_turn()
+    assert state.draw_counts == [0, 0]
+    assert state.current_turn == 2
+
+def test_first_player_is_decided_once():
+    state = make_state([card_of_rank(7)])
+    state.current_turn = 0
+    # Player 2's king beats player 1's nine
+    assert state.decide_first_player()
+    assert state.current_turn == 2
+    assert not state.decide_first_player()
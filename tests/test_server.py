@@ -0,0 +1,119 @@
+from array import array
+
+import pytest
+
+from engine import Hand, card_id, card_identity, card_rank, create_deck_template
+from path_utils import get_path
+from protocol import PROTOCOL_VERSION, REPLY_FORMATS, Opcode, Pile, decode_card_identities, decode_game_state, decode_message
+from socket_utils import HEADER_SIZE
+from spite_and_malice_server import (AsyncClientConnection, ClientConnection, GameSession, NullLock, ServerError, disconnect_client,
+                                     process_request)
+
+DECK_TEMPLATE = create_deck_template(get_path("assets/card_faces"))
+
+
+class RecordingClientConnection(ClientConnection):
+    # Keeps the replies so tests can read them back
+    def __init__(self):
+        super().__init__(("test", 0))
+        self.replies = []
+
+    def write(self, packet: bytes) -> None:
+        self.replies.append(decode_message(REPLY_FORMATS, Opcode, packet[HEADER_SIZE:]))
+
+def request(client: RecordingClientConnection, opcode: Opcode, *fields: int, tail: bytes = b"") -> tuple[tuple[int, ...], bytes]:
+    process_request(client, opcode, fields, tail, DECK_TEMPLATE, 2, 20)
+    reply_opcode, reply_fields, reply_tail = client.replies.pop()
+    assert reply_opcode == opcode
+    return reply_fields, bytes(reply_tail)
+
+
+def test_move_card_uses_the_engine_rules():
+    session = GameSession(0)
+    ace, five = card_id(0, 0), card_id(0, 4)
+    session.state.hands[0] = Hand([ace, five])
+    session.state.payoff_piles[0] = array("H", [card_id(1, 1)])
+    session.state.payoff_piles[1] = array("H", [card_id(1, 0)])
+    assert session.publish_current_turn() == 1
+
+    with pytest.raises(ServerError):
+        session.move_card(1, Pile.HAND, Pile.BUILD_PILE_0, *card_identity(five))
+    with pytest.raises(ServerError):
+        session.move_card(1, Pile.PAYOFF_PILE, Pile.DISCARD_PILE_0, 1, 1)
+    with pytest.raises(ServerError):
+        session.move_card(3, Pile.HAND, Pile.BUILD_PILE_0, *card_identity(ace))
+
+    assert session.move_card(1, Pile.HAND, Pile.BUILD_PILE_0, *card_identity(ace)) == ace
+    assert list(session.state.build_piles[0]) == [ace]
+    # The server ends turns on END_TURN, not when a card is discarded
+    assert session.move_card(1, Pile.HAND, Pile.DISCARD_PILE_2, *card_identity(five)) == five
+    assert list(session.state.discard_piles[0][2]) == [five]
+    assert session.get_current_turn() == 1
+
+def test_get_state_reports_the_player_who_goes_first():
+    for table_id in range(1000, 1040, 1):
+        players = [RecordingClientConnection(), RecordingClientConnection()]
+        for player in players:
+            assert request(player, Opcode.PLAYER_READY, PROTOCOL_VERSION, table_id, tail=b"test")[0][1] in (1, 2)
+        process_request(players[0], Opcode.CREATE_DECK, (), b"", DECK_TEMPLATE, 2, 20)
+
+        # Nobody has asked whose turn it is yet, so it is undecided
+        (version, modified), tail = request(players[1], Opcode.GET_STATE, 0)
+        assert modified
+        assert decode_game_state(tail)[0][5] == 0
+
+        current_turn = request(players[0], Opcode.GET_CURRENT_TURN)[0][0]
+        (new_version, modified), tail = request(players[1], Opcode.GET_STATE, version)
+        assert modified and new_version > version
+        fields, payoff_pile1_top, payoff_pile2_top = decode_game_state(tail)
+        assert fields[5] == current_turn
+        rank1, rank2 = card_rank(card_id(*payoff_pile1_top[0])), card_rank(card_id(*payoff_pile2_top[0]))
+        if rank1 != rank2:
+            assert current_turn == (1 if rank1 > rank2 else 2)
+
+        # Asking again neither changes the turn nor the state
+        assert request(players[1], Opcode.GET_CURRENT_TURN)[0][0] == current_turn
+        assert request(players[1], Opcode.GET_STATE, new_version)[0] == (new_version, False)
+
+        for player in players:
+            disconnect_client(player)
+
+def test_only_the_current_player_may_play():
+    players = [RecordingClientConnection(), RecordingClientConnection()]
+    for player in players:
+        request(player, Opcode.PLAYER_READY, PROTOCOL_VERSION, 1100, tail=b"test")
+    process_request(players[0], Opcode.CREATE_DECK, (), b"", DECK_TEMPLATE, 2, 20)
+    current_turn = request(players[0], Opcode.GET_CURRENT_TURN)[0][0]
+    mover, waiter = players[current_turn - 1], players[2 - current_turn]
+
+    for client, opcode, fields in ((waiter, Opcode.DRAW_CARDS, (waiter.player_number,)),
+                                   (waiter, Opcode.END_TURN, (waiter.player_number,)),
+                                   (mover, Opcode.DRAW_CARDS, (waiter.player_number,)),
+                                   (mover, Opcode.END_TURN, (waiter.player_number,))):
+        with pytest.raises(ServerError):
+            process_request(client, opcode, fields, b"", DECK_TEMPLATE, 2, 20)
+
+    hand = decode_card_identities(request(mover, Opcode.DRAW_CARDS, mover.player_number)[1])
+    assert len(hand) == 5
+    with pytest.raises(ServerError):
+        process_request(waiter, Opcode.MOVE_CARD, (mover.player_number, Pile.HAND, Pile.DISCARD_PILE_0, *hand[0]), b"", DECK_TEMPLATE, 2, 20)
+    process_request(mover, Opcode.MOVE_CARD, (mover.player_number, Pile.HAND, Pile.DISCARD_PILE_0, *hand[0]), b"", DECK_TEMPLATE, 2, 20)
+    process_request(mover, Opcode.END_TURN, (mover.player_number,), b"", DECK_TEMPLATE, 2, 20)
+    assert request(waiter, Opcode.GET_CURRENT_TURN)[0][0] == waiter.player_number
+
+    for player in players:
+        disconnect_client(player)
+
+class DiscardingAsyncClientConnection(AsyncClientConnection):
+    def write(self, packet: bytes) -> None:
+        pass
+
+def test_sessions_get_the_locks_of_their_engine():
+    async_client = DiscardingAsyncClientConnection(None, ("test", 0))
+    threaded_client = RecordingClientConnection()
+    process_request(async_client, Opcode.PLAYER_READY, (PROTOCOL_VERSION, 1200), b"test", DECK_TEMPLATE, 2, 20)
+    process_request(threaded_client, Opcode.PLAYER_READY, (PROTOCOL_VERSION, 1201), b"test", DECK_TEMPLATE, 2, 20)
+    assert isinstance(async_client.session.card_lock, NullLock)
+    assert not isinstance(threaded_client.session.card_lock, NullLock)
+    for client in (async_client, threaded_client):
+        disconnect_client(client)